@@ -0,0 +1,141 @@
+//! Aggregates depth updates into the price levels of a book, best first.
+
+use oxidiser_macro::oxidiser_component;
+
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum Side {
+    #[default]
+    Bid,
+    Ask,
+}
+
+/// Sets the size at a price, removing the level when the size is zero.
+/// Default so a circuit can store the last update it loaded
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct DepthUpdate {
+    pub side: Side,
+    pub price: f64,
+    pub size: f64,
+}
+
+pub type Levels = Vec<f64>;
+
+oxidiser_component! {
+    Name: BookAggregator;
+
+    Inputs: {
+        depth -> generic D,
+    };
+
+    Outputs: {
+        bid_prices -> using BookOutput,
+        bid_sizes -> using BookOutput,
+        ask_prices -> using BookOutput,
+        ask_sizes -> using BookOutput,
+    };
+
+    Calls: {
+        on_depth: {
+            Takes: {
+                depth,
+            };
+
+            Observes: {};
+
+            Writes: {
+                bid_prices,
+                bid_sizes,
+                ask_prices,
+                ask_sizes,
+            };
+        };
+    };
+}
+
+pub trait BookOutput {
+    type BidPrices;
+    type BidSizes;
+    type AskPrices;
+    type AskSizes;
+}
+
+#[derive(Default)]
+pub struct BookAggregator {
+    // (price, size), best first
+    bids: Vec<(f64, f64)>,
+    asks: Vec<(f64, f64)>,
+}
+
+impl BookOutput for BookAggregator {
+    type BidPrices = Levels;
+    type BidSizes = Levels;
+    type AskPrices = Levels;
+    type AskSizes = Levels;
+}
+
+fn apply(levels: &mut Vec<(f64, f64)>, price: f64, size: f64, better: fn(f64, f64) -> bool) {
+    let idx = levels.partition_point(|(level, _)| better(*level, price));
+    let exists = levels.get(idx).map_or(false, |(level, _)| *level == price);
+    match (exists, size == 0.0) {
+        (true, true) => {
+            levels.remove(idx);
+        }
+        (true, false) => levels[idx].1 = size,
+        (false, false) => levels.insert(idx, (price, size)),
+        (false, true) => {}
+    }
+}
+
+fn write_levels(levels: &[(f64, f64)], prices: &mut Levels, sizes: &mut Levels) {
+    prices.clear();
+    sizes.clear();
+    prices.extend(levels.iter().map(|(price, _)| *price));
+    sizes.extend(levels.iter().map(|(_, size)| *size));
+}
+
+impl BookAggregator {
+    pub fn on_depth(
+        &mut self,
+        inputs: impl BookAggregatorOnDepthInput<D = DepthUpdate>,
+        outputs: impl BookAggregatorOnDepthOutput<Self>,
+    ) -> BookAggregatorOnDepthOutputValid {
+        let valid = match inputs.depth() {
+            Some(update) => {
+                match update.side {
+                    Side::Bid => apply(&mut self.bids, update.price, update.size, |a, b| a > b),
+                    Side::Ask => apply(&mut self.asks, update.price, update.size, |a, b| a < b),
+                }
+                write_levels(&self.bids, outputs.bid_prices(), outputs.bid_sizes());
+                write_levels(&self.asks, outputs.ask_prices(), outputs.ask_sizes());
+                true
+            }
+            None => false,
+        };
+        BookAggregatorOnDepthOutputValid {
+            bid_prices: valid,
+            bid_sizes: valid,
+            ask_prices: valid,
+            ask_sizes: valid,
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_apply_levels() {
+        let mut bids = Vec::new();
+        let better = |a: f64, b: f64| a > b;
+        apply(&mut bids, 10.0, 1.0, better);
+        apply(&mut bids, 12.0, 2.0, better);
+        apply(&mut bids, 11.0, 3.0, better);
+        assert_eq!(bids, vec![(12.0, 2.0), (11.0, 3.0), (10.0, 1.0)]);
+
+        apply(&mut bids, 11.0, 4.0, better);
+        apply(&mut bids, 12.0, 0.0, better);
+        apply(&mut bids, 9.0, 0.0, better);
+        assert_eq!(bids, vec![(11.0, 4.0), (10.0, 1.0)]);
+    }
+}
@@ -0,0 +1,31 @@
+/// Runs the passed closure out of line.
+///
+/// Generated call trees wrap rarely-triggered calls in this, so that the closure body is
+/// monomorphized into a separate cold function and kept away from the hot path.
+#[cold]
+#[inline(never)]
+pub fn cold_call<R, F: FnOnce() -> R>(f: F) -> R {
+    f()
+}
+
+/// Hints that the passed condition is usually true, by making the other branch cold.
+#[inline(always)]
+pub fn likely(b: bool) -> bool {
+    if !b {
+        cold_path();
+    }
+    b
+}
+
+/// Hints that the passed condition is usually false, by making the taken branch cold.
+#[inline(always)]
+pub fn unlikely(b: bool) -> bool {
+    if b {
+        cold_path();
+    }
+    b
+}
+
+#[cold]
+#[inline(never)]
+fn cold_path() {}
@@ -1 +1,7 @@
 pub mod add;
+pub mod arithmetic;
+pub mod constant;
+pub mod index;
+pub mod parameter;
+pub mod select;
+pub mod value;
@@ -0,0 +1,432 @@
+//! Arithmetic on the outputs of other components, as generated by
+//! signals.arithmetic and signals.unary_arithmetic.
+//!
+//! Chains of these are usually fused into inline expressions by codegen,
+//! so the components themselves only run when a chain can't be fused.
+
+use std::marker::PhantomData;
+use std::ops::{Add, Div, Mul, Neg, Sub};
+
+use oxidiser_macro::oxidiser_component;
+
+/// The type every arithmetic component writes to out
+pub trait ArithmeticOutput {
+    type Out;
+}
+
+macro_rules! binary_component {
+    ($name:ident) => {
+        oxidiser_component! {
+            Name: $name;
+
+            Inputs: {
+                a -> generic A,
+                b -> generic B,
+            };
+
+            Outputs: {
+                out -> using ArithmeticOutput,
+            };
+
+            Calls: {
+                call: {
+                    Takes: {
+                        a,
+                        b,
+                    };
+
+                    Observes: {};
+
+                    Writes: {
+                        out,
+                    };
+                };
+            };
+        }
+
+        #[derive(Default)]
+        pub struct $name<A, B> {
+            _types: PhantomData<(A, B)>,
+        }
+    };
+}
+
+macro_rules! unary_component {
+    ($name:ident) => {
+        oxidiser_component! {
+            Name: $name;
+
+            Inputs: {
+                a -> generic A,
+            };
+
+            Outputs: {
+                out -> using ArithmeticOutput,
+            };
+
+            Calls: {
+                call: {
+                    Takes: {
+                        a,
+                    };
+
+                    Observes: {};
+
+                    Writes: {
+                        out,
+                    };
+                };
+            };
+        }
+
+        #[derive(Default)]
+        pub struct $name<A> {
+            _types: PhantomData<A>,
+        }
+    };
+}
+
+/// a op b, through the std::ops trait of the operator
+macro_rules! operator_component {
+    ($name:ident, $input:ident, $output:ident, $valid:ident, $op:ident, $fn:ident) => {
+        binary_component!($name);
+
+        impl<A: $op<B>, B> ArithmeticOutput for $name<A, B> {
+            type Out = <A as $op<B>>::Output;
+        }
+
+        impl<A: Copy + $op<B>, B: Copy> $name<A, B> {
+            #[inline]
+            pub fn call(
+                &self,
+                inputs: impl $input<A = A, B = B>,
+                outputs: impl $output<Self>,
+            ) -> $valid {
+                let out = match (inputs.a(), inputs.b()) {
+                    (Some(a), Some(b)) => {
+                        *outputs.out() = (*a).$fn(*b);
+                        true
+                    }
+                    _ => false,
+                };
+                $valid { out }
+            }
+        }
+    };
+}
+
+/// a compared to b, writing a bool
+macro_rules! comparison_component {
+    ($name:ident, $input:ident, $output:ident, $valid:ident, $cmp:ident, $fn:ident) => {
+        binary_component!($name);
+
+        impl<A: $cmp<B>, B> ArithmeticOutput for $name<A, B> {
+            type Out = bool;
+        }
+
+        impl<A: $cmp<B>, B> $name<A, B> {
+            #[inline]
+            pub fn call(
+                &self,
+                inputs: impl $input<A = A, B = B>,
+                outputs: impl $output<Self>,
+            ) -> $valid {
+                let out = match (inputs.a(), inputs.b()) {
+                    (Some(a), Some(b)) => {
+                        *outputs.out() = <A as $cmp<B>>::$fn(a, b);
+                        true
+                    }
+                    _ => false,
+                };
+                $valid { out }
+            }
+        }
+    };
+}
+
+/// The lesser or greater of a and b, which must have the same type
+macro_rules! extremum_component {
+    ($name:ident, $input:ident, $output:ident, $valid:ident, $keep_a:tt) => {
+        binary_component!($name);
+
+        impl<A> ArithmeticOutput for $name<A, A> {
+            type Out = A;
+        }
+
+        impl<A: Copy + PartialOrd> $name<A, A> {
+            #[inline]
+            pub fn call(
+                &self,
+                inputs: impl $input<A = A, B = A>,
+                outputs: impl $output<Self>,
+            ) -> $valid {
+                let out = match (inputs.a(), inputs.b()) {
+                    (Some(a), Some(b)) => {
+                        *outputs.out() = if *a $keep_a *b { *a } else { *b };
+                        true
+                    }
+                    _ => false,
+                };
+                $valid { out }
+            }
+        }
+    };
+}
+
+/// A method of f64, like exp or sqrt
+macro_rules! float_component {
+    ($name:ident, $input:ident, $output:ident, $valid:ident, $fn:ident) => {
+        unary_component!($name);
+
+        impl ArithmeticOutput for $name<f64> {
+            type Out = f64;
+        }
+
+        impl $name<f64> {
+            #[inline]
+            pub fn call(
+                &self,
+                inputs: impl $input<A = f64>,
+                outputs: impl $output<Self>,
+            ) -> $valid {
+                let out = match inputs.a() {
+                    Some(a) => {
+                        *outputs.out() = a.$fn();
+                        true
+                    }
+                    None => false,
+                };
+                $valid { out }
+            }
+        }
+    };
+}
+
+operator_component!(
+    AddComponent,
+    AddComponentCallInput,
+    AddComponentCallOutput,
+    AddComponentCallOutputValid,
+    Add,
+    add
+);
+operator_component!(
+    SubComponent,
+    SubComponentCallInput,
+    SubComponentCallOutput,
+    SubComponentCallOutputValid,
+    Sub,
+    sub
+);
+operator_component!(
+    MulComponent,
+    MulComponentCallInput,
+    MulComponentCallOutput,
+    MulComponentCallOutputValid,
+    Mul,
+    mul
+);
+operator_component!(
+    DivComponent,
+    DivComponentCallInput,
+    DivComponentCallOutput,
+    DivComponentCallOutputValid,
+    Div,
+    div
+);
+
+comparison_component!(
+    LtComponent,
+    LtComponentCallInput,
+    LtComponentCallOutput,
+    LtComponentCallOutputValid,
+    PartialOrd,
+    lt
+);
+comparison_component!(
+    LeComponent,
+    LeComponentCallInput,
+    LeComponentCallOutput,
+    LeComponentCallOutputValid,
+    PartialOrd,
+    le
+);
+comparison_component!(
+    GtComponent,
+    GtComponentCallInput,
+    GtComponentCallOutput,
+    GtComponentCallOutputValid,
+    PartialOrd,
+    gt
+);
+comparison_component!(
+    GeComponent,
+    GeComponentCallInput,
+    GeComponentCallOutput,
+    GeComponentCallOutputValid,
+    PartialOrd,
+    ge
+);
+comparison_component!(
+    EqComponent,
+    EqComponentCallInput,
+    EqComponentCallOutput,
+    EqComponentCallOutputValid,
+    PartialEq,
+    eq
+);
+
+extremum_component!(
+    MinComponent,
+    MinComponentCallInput,
+    MinComponentCallOutput,
+    MinComponentCallOutputValid,
+    <=
+);
+extremum_component!(
+    MaxComponent,
+    MaxComponentCallInput,
+    MaxComponentCallOutput,
+    MaxComponentCallOutputValid,
+    >=
+);
+
+float_component!(
+    LogComponent,
+    LogComponentCallInput,
+    LogComponentCallOutput,
+    LogComponentCallOutputValid,
+    ln
+);
+float_component!(
+    ExpComponent,
+    ExpComponentCallInput,
+    ExpComponentCallOutput,
+    ExpComponentCallOutputValid,
+    exp
+);
+float_component!(
+    SqrtComponent,
+    SqrtComponentCallInput,
+    SqrtComponentCallOutput,
+    SqrtComponentCallOutputValid,
+    sqrt
+);
+float_component!(
+    AbsComponent,
+    AbsComponentCallInput,
+    AbsComponentCallOutput,
+    AbsComponentCallOutputValid,
+    abs
+);
+
+unary_component!(NegComponent);
+
+impl<A: Neg> ArithmeticOutput for NegComponent<A> {
+    type Out = <A as Neg>::Output;
+}
+
+impl<A: Copy + Neg> NegComponent<A> {
+    #[inline]
+    pub fn call(
+        &self,
+        inputs: impl NegComponentCallInput<A = A>,
+        outputs: impl NegComponentCallOutput<Self>,
+    ) -> NegComponentCallOutputValid {
+        let out = match inputs.a() {
+            Some(a) => {
+                *outputs.out() = -*a;
+                true
+            }
+            None => false,
+        };
+        NegComponentCallOutputValid { out }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::cell::UnsafeCell;
+
+    use super::*;
+
+    struct Pair(Option<f64>, Option<f64>);
+
+    macro_rules! pair_input {
+        ($input:ident) => {
+            impl $input for &Pair {
+                type A = f64;
+                type B = f64;
+                fn a(&self) -> Option<&f64> {
+                    self.0.as_ref()
+                }
+                fn b(&self) -> Option<&f64> {
+                    self.1.as_ref()
+                }
+            }
+        };
+    }
+
+    pair_input!(SubComponentCallInput);
+    pair_input!(LtComponentCallInput);
+    pair_input!(MaxComponentCallInput);
+
+    impl ExpComponentCallInput for &Pair {
+        type A = f64;
+        fn a(&self) -> Option<&f64> {
+            self.0.as_ref()
+        }
+    }
+
+    struct Out<T>(UnsafeCell<T>);
+
+    macro_rules! out_output {
+        ($output:ident, $component:ty, $out:ty) => {
+            impl $output<$component> for &Out<$out> {
+                #[allow(clippy::mut_from_ref)]
+                fn out(&self) -> &mut $out {
+                    unsafe { &mut *self.0.get() }
+                }
+            }
+        };
+    }
+
+    out_output!(SubComponentCallOutput, SubComponent<f64, f64>, f64);
+    out_output!(LtComponentCallOutput, LtComponent<f64, f64>, bool);
+    out_output!(MaxComponentCallOutput, MaxComponent<f64, f64>, f64);
+    out_output!(ExpComponentCallOutput, ExpComponent<f64>, f64);
+
+    #[test]
+    fn test_binary() {
+        let out = Out(UnsafeCell::new(0.0));
+        let valid = SubComponent::default().call(&Pair(Some(3.0), Some(1.0)), &out);
+        assert!(valid.out);
+        assert_eq!(out.0.into_inner(), 2.0);
+
+        let out = Out(UnsafeCell::new(false));
+        let valid = LtComponent::default().call(&Pair(Some(1.0), Some(3.0)), &out);
+        assert!(valid.out);
+        assert!(out.0.into_inner());
+
+        let out = Out(UnsafeCell::new(0.0));
+        let valid = MaxComponent::default().call(&Pair(Some(1.0), Some(3.0)), &out);
+        assert!(valid.out);
+        assert_eq!(out.0.into_inner(), 3.0);
+    }
+
+    #[test]
+    fn test_missing_input() {
+        let out = Out(UnsafeCell::new(5.0));
+        let valid = SubComponent::default().call(&Pair(Some(3.0), None), &out);
+        assert!(!valid.out);
+        assert_eq!(out.0.into_inner(), 5.0);
+
+        let out = Out(UnsafeCell::new(0.0));
+        assert!(
+            ExpComponent::default()
+                .call(&Pair(Some(0.0), None), &out)
+                .out
+        );
+        assert_eq!(out.0.into_inner(), 1.0);
+    }
+}
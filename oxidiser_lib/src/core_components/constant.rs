@@ -0,0 +1,88 @@
+//! Constants, as made by CircuitBuilder.make_constant and
+//! make_triggerable_constant.
+//!
+//! The value itself is the default constructor of the output variable,
+//! so these only decide the type and when the output is valid.
+
+use std::marker::PhantomData;
+
+use oxidiser_macro::oxidiser_component;
+
+/// Always valid, and never called
+pub struct CtorConstant<T> {
+    _types: PhantomData<T>,
+}
+
+impl<T> Default for CtorConstant<T> {
+    fn default() -> Self {
+        CtorConstant {
+            _types: PhantomData,
+        }
+    }
+}
+
+pub trait CtorConstantOutputExport {
+    type Out;
+}
+
+impl<T> CtorConstantOutputExport for CtorConstant<T> {
+    type Out = T;
+}
+
+oxidiser_component! {
+    Name: TriggerableConstant;
+
+    Inputs: {
+        tick -> generic Tick,
+    };
+
+    Outputs: {
+        out -> using ConstantOutput,
+    };
+
+    Calls: {
+        tick: {
+            Takes: {
+                tick,
+            };
+
+            Observes: {};
+
+            Writes: {
+                out,
+            };
+        };
+    };
+}
+
+pub trait ConstantOutput {
+    type Out;
+}
+
+/// Invalid until the first tick, and valid on every tick after
+pub struct TriggerableConstant<T> {
+    _types: PhantomData<T>,
+}
+
+impl<T> Default for TriggerableConstant<T> {
+    fn default() -> Self {
+        TriggerableConstant {
+            _types: PhantomData,
+        }
+    }
+}
+
+impl<T> ConstantOutput for TriggerableConstant<T> {
+    type Out = T;
+}
+
+impl<T> TriggerableConstant<T> {
+    #[inline]
+    pub fn tick(
+        &self,
+        _inputs: impl TriggerableConstantTickInput,
+        _outputs: impl TriggerableConstantTickOutput<Self>,
+    ) -> TriggerableConstantTickOutputValid {
+        TriggerableConstantTickOutputValid { out: true }
+    }
+}
@@ -0,0 +1,92 @@
+//! Reads the element at a fixed index of a sequence, as made by
+//! indexing an output in the circuit builder.
+
+use std::marker::PhantomData;
+
+use oxidiser_macro::oxidiser_component;
+
+oxidiser_component! {
+    Name: StaticIndex;
+
+    Inputs: {
+        a -> generic A,
+    };
+
+    Outputs: {
+        out -> using IndexOutput,
+    };
+
+    Calls: {
+        call: {
+            Takes: {
+                a,
+            };
+
+            Observes: {};
+
+            Writes: {
+                out,
+            };
+        };
+    };
+}
+
+/// Sequences which can be indexed, like the levels of a book
+pub trait Indexable {
+    type Item;
+
+    fn at(&self, idx: usize) -> Option<&Self::Item>;
+}
+
+impl<T, const M: usize> Indexable for [T; M] {
+    type Item = T;
+
+    #[inline]
+    fn at(&self, idx: usize) -> Option<&T> {
+        self.get(idx)
+    }
+}
+
+impl<T> Indexable for Vec<T> {
+    type Item = T;
+
+    #[inline]
+    fn at(&self, idx: usize) -> Option<&T> {
+        self.get(idx)
+    }
+}
+
+pub trait IndexOutput {
+    type Out;
+}
+
+#[derive(Default)]
+pub struct StaticIndex<A, const N: usize> {
+    _types: PhantomData<A>,
+}
+
+impl<A: Indexable, const N: usize> IndexOutput for StaticIndex<A, N> {
+    type Out = A::Item;
+}
+
+impl<A: Indexable, const N: usize> StaticIndex<A, N>
+where
+    A::Item: Clone,
+{
+    /// The output is invalid when the sequence is too short
+    #[inline]
+    pub fn call(
+        &self,
+        inputs: impl StaticIndexCallInput<A = A>,
+        outputs: impl StaticIndexCallOutput<Self>,
+    ) -> StaticIndexCallOutputValid {
+        let out = match inputs.a().and_then(|a| a.at(N)) {
+            Some(value) => {
+                *outputs.out() = value.clone();
+                true
+            }
+            None => false,
+        };
+        StaticIndexCallOutputValid { out }
+    }
+}
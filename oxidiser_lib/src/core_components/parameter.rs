@@ -0,0 +1,55 @@
+//! Parameters fit by the differentiator, as made by
+//! CircuitBuilder.make_parameter and summarize.
+//!
+//! Parameters are set once when the circuit is initialized and are
+//! always valid after that.
+
+#[derive(Debug, PartialEq, Eq)]
+pub struct MissingParameter;
+
+#[derive(Default)]
+pub struct DoubleParameter<const REQUIRED: bool> {
+    value: f64,
+}
+
+pub trait DoubleParameterOutputExport {
+    type Out;
+}
+
+impl<const REQUIRED: bool> DoubleParameterOutputExport for DoubleParameter<REQUIRED> {
+    type Out = f64;
+}
+
+impl<const REQUIRED: bool> DoubleParameter<REQUIRED> {
+    /// Sets the fit value, which required parameters must have
+    pub fn init(&mut self, value: Option<f64>) -> Result<(), MissingParameter> {
+        match value {
+            Some(value) => self.value = value,
+            None if REQUIRED => return Err(MissingParameter),
+            None => {}
+        }
+        Ok(())
+    }
+
+    #[inline]
+    pub fn value(&self) -> f64 {
+        self.value
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_init() {
+        let mut optional = DoubleParameter::<false>::default();
+        assert_eq!(optional.init(None), Ok(()));
+        assert_eq!(optional.value(), 0.0);
+
+        let mut required = DoubleParameter::<true>::default();
+        assert_eq!(required.init(None), Err(MissingParameter));
+        assert_eq!(required.init(Some(1.5)), Ok(()));
+        assert_eq!(required.value(), 1.5);
+    }
+}
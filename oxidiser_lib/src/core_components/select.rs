@@ -0,0 +1,72 @@
+//! Picks a if select_a is true and b otherwise, as made by signals.select.
+
+use std::marker::PhantomData;
+
+use oxidiser_macro::oxidiser_component;
+
+oxidiser_component! {
+    Name: Select;
+
+    Inputs: {
+        a -> generic A,
+        b -> generic B,
+        select_a -> generic S,
+    };
+
+    Outputs: {
+        out -> using SelectOutput,
+    };
+
+    Calls: {
+        call: {
+            Takes: {
+                a,
+                b,
+                select_a,
+            };
+
+            Observes: {};
+
+            Writes: {
+                out,
+            };
+        };
+    };
+}
+
+pub trait SelectOutput {
+    type Out;
+}
+
+#[derive(Default)]
+pub struct Select<A, B> {
+    _types: PhantomData<(A, B)>,
+}
+
+impl<A> SelectOutput for Select<A, A> {
+    type Out = A;
+}
+
+impl<A: Clone> Select<A, A> {
+    /// Only the selected side has to be valid
+    #[inline]
+    pub fn call(
+        &self,
+        inputs: impl SelectCallInput<A = A, B = A, S = bool>,
+        outputs: impl SelectCallOutput<Self>,
+    ) -> SelectCallOutputValid {
+        let selected = match inputs.select_a() {
+            Some(true) => inputs.a(),
+            Some(false) => inputs.b(),
+            None => None,
+        };
+        let out = match selected {
+            Some(value) => {
+                *outputs.out() = value.clone();
+                true
+            }
+            None => false,
+        };
+        SelectCallOutputValid { out }
+    }
+}
@@ -0,0 +1,63 @@
+//! Stores the latest value of an input, usually an external, so that
+//! other call groups can read it after the call which wrote it.
+
+use std::marker::PhantomData;
+
+use oxidiser_macro::oxidiser_component;
+
+oxidiser_component! {
+    Name: Value;
+
+    Inputs: {
+        a -> generic A,
+    };
+
+    Outputs: {
+        out -> using ValueOutput,
+    };
+
+    Calls: {
+        call: {
+            Takes: {
+                a,
+            };
+
+            Observes: {};
+
+            Writes: {
+                out,
+            };
+        };
+    };
+}
+
+pub trait ValueOutput {
+    type Out;
+}
+
+#[derive(Default)]
+pub struct Value<A> {
+    _types: PhantomData<A>,
+}
+
+impl<A> ValueOutput for Value<A> {
+    type Out = A;
+}
+
+impl<A: Clone> Value<A> {
+    #[inline]
+    pub fn call(
+        &self,
+        inputs: impl ValueCallInput<A = A>,
+        outputs: impl ValueCallOutput<Self>,
+    ) -> ValueCallOutputValid {
+        let out = match inputs.a() {
+            Some(a) => {
+                *outputs.out() = a.clone();
+                true
+            }
+            None => false,
+        };
+        ValueCallOutputValid { out }
+    }
+}
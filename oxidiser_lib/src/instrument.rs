@@ -0,0 +1,53 @@
+//! Counters and cycle timers for instrumented call trees.
+//!
+//! Codegen assigns every instrumented call a slot, and writes a metadata json
+//! mapping the slots back to component and callset names.
+
+#[cfg(not(target_arch = "x86_64"))]
+use std::{sync::OnceLock, time::Instant};
+
+/// Returns a timestamp in cycles (rdtsc) on x86_64, otherwise in nanoseconds
+#[inline(always)]
+pub fn now() -> u64 {
+    #[cfg(target_arch = "x86_64")]
+    {
+        // Safety: rdtsc is available on every x86_64 processor
+        unsafe { core::arch::x86_64::_rdtsc() }
+    }
+    #[cfg(not(target_arch = "x86_64"))]
+    {
+        static EPOCH: OnceLock<Instant> = OnceLock::new();
+        EPOCH.get_or_init(Instant::now).elapsed().as_nanos() as u64
+    }
+}
+
+pub struct CallStats<const N: usize> {
+    pub counts: [u64; N],
+    pub elapsed: [u64; N],
+}
+
+impl<const N: usize> Default for CallStats<N> {
+    fn default() -> Self {
+        CallStats {
+            counts: [0; N],
+            elapsed: [0; N],
+        }
+    }
+}
+
+impl<const N: usize> CallStats<N> {
+    #[inline(always)]
+    pub fn count(&mut self, slot: usize) {
+        self.counts[slot] += 1;
+    }
+
+    #[inline(always)]
+    pub fn record(&mut self, slot: usize, start: u64) {
+        self.counts[slot] += 1;
+        self.elapsed[slot] += now().wrapping_sub(start);
+    }
+
+    pub fn reset(&mut self) {
+        *self = Self::default();
+    }
+}
@@ -1 +1,5 @@
+pub mod book;
+pub mod cold;
 pub mod core_components;
+pub mod instrument;
+pub mod soa;
@@ -0,0 +1,144 @@
+//! Struct-of-arrays inputs for components taking arrays of inputs.
+//!
+//! Every element of an array input field is held in one contiguous array, with
+//! their validity packed into a bitmask, instead of passing an Option<&_> per
+//! element. Codegen writes per-call elements straight into the array when it
+//! packs arrays, and otherwise copies them into it before the call.
+
+/// Validity of the elements of an array input, one bit per element
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub struct ValidMask<const WORDS: usize> {
+    words: [u64; WORDS],
+}
+
+impl<const WORDS: usize> Default for ValidMask<WORDS> {
+    fn default() -> Self {
+        ValidMask { words: [0; WORDS] }
+    }
+}
+
+impl<const WORDS: usize> ValidMask<WORDS> {
+    #[inline(always)]
+    pub const fn from_words(words: [u64; WORDS]) -> Self {
+        ValidMask { words }
+    }
+
+    #[inline(always)]
+    pub fn is_valid(&self, idx: usize) -> bool {
+        (self.words[idx / 64] >> (idx % 64)) & 1 == 1
+    }
+
+    #[inline(always)]
+    pub fn set(&mut self, idx: usize, valid: bool) {
+        let bit = 1u64 << (idx % 64);
+        if valid {
+            self.words[idx / 64] |= bit;
+        } else {
+            self.words[idx / 64] &= !bit;
+        }
+    }
+
+    /// Whether the first len elements are all valid
+    #[inline]
+    pub fn all_valid(&self, len: usize) -> bool {
+        let full_words = len / 64;
+        if self.words[..full_words].iter().any(|word| *word != u64::MAX) {
+            return false;
+        }
+        let remaining = len % 64;
+        remaining == 0 || {
+            let tail_mask = (1u64 << remaining) - 1;
+            self.words[full_words] & tail_mask == tail_mask
+        }
+    }
+
+    #[inline]
+    pub fn count_valid(&self) -> usize {
+        self.words.iter().map(|word| word.count_ones() as usize).sum()
+    }
+}
+
+/// A single field of an array input, stored contiguously
+#[derive(Clone, Copy, Debug)]
+pub struct SoaArray<'a, T, const WORDS: usize> {
+    values: &'a [T],
+    valid: &'a ValidMask<WORDS>,
+}
+
+impl<'a, T, const WORDS: usize> SoaArray<'a, T, WORDS> {
+    #[inline(always)]
+    pub fn new(values: &'a [T], valid: &'a ValidMask<WORDS>) -> Self {
+        debug_assert!(values.len() <= WORDS * 64);
+        SoaArray { values, valid }
+    }
+
+    #[inline(always)]
+    pub fn len(&self) -> usize {
+        self.values.len()
+    }
+
+    #[inline(always)]
+    pub fn is_empty(&self) -> bool {
+        self.values.is_empty()
+    }
+
+    #[inline(always)]
+    pub fn get(&self, idx: usize) -> Option<&'a T> {
+        if self.valid.is_valid(idx) {
+            Some(&self.values[idx])
+        } else {
+            None
+        }
+    }
+
+    /// Every element regardless of validity, for loops which check the mask separately
+    #[inline(always)]
+    pub fn values(&self) -> &'a [T] {
+        self.values
+    }
+
+    #[inline(always)]
+    pub fn valid(&self) -> &'a ValidMask<WORDS> {
+        self.valid
+    }
+
+    #[inline(always)]
+    pub fn all_valid(&self) -> bool {
+        self.valid.all_valid(self.values.len())
+    }
+
+    #[inline]
+    pub fn iter(&self) -> impl Iterator<Item = Option<&'a T>> + '_ {
+        (0..self.values.len()).map(move |idx| self.get(idx))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_mask() {
+        let mut mask = ValidMask::<2>::default();
+        for idx in 0..70 {
+            mask.set(idx, true);
+        }
+        assert!(mask.all_valid(70));
+        mask.set(65, false);
+        assert!(!mask.all_valid(70));
+        assert!(mask.all_valid(64));
+        assert_eq!(mask.count_valid(), 69);
+    }
+
+    #[test]
+    fn test_soa() {
+        let values = [1.0, 2.0, 3.0];
+        let valid = ValidMask::<1>::from_words([0b101]);
+        let soa = SoaArray::new(&values, &valid);
+        assert_eq!(
+            soa.iter().collect::<Vec<_>>(),
+            vec![Some(&1.0), None, Some(&3.0)]
+        );
+        assert!(!soa.all_valid());
+    }
+}
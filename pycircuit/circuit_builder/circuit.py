@@ -1,5 +1,5 @@
 from collections import OrderedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Mapping, Optional, Set, Union
 
 from dataclasses_json import DataClassJsonMixin
@@ -25,6 +25,7 @@ from .signals.constant import (
     generate_parameter_definition,
     generate_summary_definition,
     generate_triggerable_constant_definition,
+    rust_type,
 )
 
 
@@ -85,6 +86,27 @@ class CallGroup(DataClassJsonMixin):
         return set(self.external_field_mapping.values())
 
 
+@dataclass
+class Throttle(DataClassJsonMixin):
+    """Limits how often a subgraph is recomputed
+
+    Attributes:
+
+        components: Roots of the throttled subgraph. Triggering one only marks its
+                    callsets pending, and pending callsets are called along with
+                    the subgraph below them when the throttle is flushed
+
+        interval_us: Flush at most once per this many microseconds,
+                     from a timer the host schedules on the flush function
+
+        every_events: Flush once every this many triggers of the roots
+    """
+
+    components: List[str]
+    interval_us: Optional[int] = None
+    every_events: Optional[int] = None
+
+
 @dataclass
 class _PartialJsonCircuit(DataClassJsonMixin):
     externals: Dict[str, ExternalInput]
@@ -92,6 +114,7 @@ class _PartialJsonCircuit(DataClassJsonMixin):
     definitions: Dict[str, Definition]
     call_groups: Dict[str, CallGroup]
     call_structs: Dict[str, CallStruct]
+    throttles: Dict[str, Throttle] = field(default_factory=dict)
 
 
 @dataclass
@@ -114,6 +137,7 @@ class CircuitData:
     definitions: Dict[str, Definition]
     call_groups: Dict[str, CallGroup]
     call_structs: Dict[str, CallStruct]
+    throttles: Dict[str, Throttle] = field(default_factory=dict)
 
     def _must_trigger_outputs(self) -> Set[ComponentOutput]:
         return {
@@ -144,6 +168,7 @@ class CircuitData:
             },
             call_groups=partial.call_groups,
             call_structs=partial.call_structs,
+            throttles=partial.throttles,
         )
 
         data.validate()
@@ -167,6 +192,7 @@ class CircuitData:
             externals=self.external_inputs,
             call_groups=self.call_groups,
             call_structs=self.call_structs,
+            throttles=self.throttles,
             components={
                 comp_name: _PartialComponent(
                     name=comp.name,
@@ -209,6 +235,31 @@ class CircuitData:
                     f"different types {field_type} and {external_type}"
                 )
 
+    def validate_throttle(self, name: str, throttle: Throttle):
+        if (throttle.interval_us is None) == (throttle.every_events is None):
+            raise ValueError(
+                f"Throttle {name} must set exactly one of interval_us and every_events"
+            )
+
+        for limit in [throttle.interval_us, throttle.every_events]:
+            if limit is not None and limit <= 0:
+                raise ValueError(f"Throttle {name} has nonpositive limit {limit}")
+
+        if not throttle.components:
+            raise ValueError(f"Throttle {name} has no components")
+
+        for component_name in throttle.components:
+            if component_name not in self.components:
+                raise ValueError(
+                    f"Throttle {name} requested nonexistent component {component_name}"
+                )
+
+            for (other_name, other) in self.throttles.items():
+                if other_name != name and component_name in other.components:
+                    raise ValueError(
+                        f"Component {component_name} is in throttles {name} and {other_name}"
+                    )
+
     def validate(self):
         for component in self.components.values():
             component.validate(self)
@@ -216,6 +267,9 @@ class CircuitData:
         for name, group in self.call_groups.items():
             self.validate_call_group(name, group)
 
+        for (name, throttle) in self.throttles.items():
+            self.validate_throttle(name, throttle)
+
 
 class CircuitBuilder(CircuitData):
     def __init__(self, definitions: Dict[str, Definition]):
@@ -225,6 +279,7 @@ class CircuitBuilder(CircuitData):
             definitions=definitions,
             call_groups={},
             call_structs={},
+            throttles={},
         )
         self.running_external = 0
         self.registry: Dict[ComponentIndex, Component] = {}
@@ -315,6 +370,14 @@ class CircuitBuilder(CircuitData):
 
         self.call_groups[name] = group
 
+    def add_throttle(self, name: str, throttle: Throttle):
+        if name in self.throttles:
+            raise ValueError(f"Circuit builder already has throttle {name}")
+
+        self.validate_throttle(name, throttle)
+
+        self.throttles[name] = throttle
+
     def add_definition(self, name: str, definition: Definition):
         if name in self.definitions:
             if definition != self.definitions[name]:
@@ -392,7 +455,7 @@ class CircuitBuilder(CircuitData):
             inputs={},
             output_options={},
             params=None,
-            class_generics={},
+            class_generics={"REQUIRED": str(required).lower()},
         )
 
         return self._insert_component(comp, force=force)
@@ -411,7 +474,7 @@ class CircuitBuilder(CircuitData):
             inputs={"a": SingleComponentInput(input=input.output(), input_name="a")},
             output_options={},
             params=None,
-            class_generics={},
+            class_generics={"REQUIRED": "false"},
         )
 
         return self._insert_component(comp, force=False)
@@ -421,7 +484,7 @@ class CircuitBuilder(CircuitData):
             ctor_name = constructor
         else:
             ctor_name = "{}"
-        definition = generate_constant_definition(type, ctor_name)
+        definition = generate_constant_definition(ctor_name)
 
         def_name = f"constant_{type}_{ctor_name}"
 
@@ -434,7 +497,7 @@ class CircuitBuilder(CircuitData):
             definition=definition,
             inputs={},
             output_options={},
-            class_generics={},
+            class_generics={"T": rust_type(type)},
             params=None,
         )
 
@@ -450,7 +513,7 @@ class CircuitBuilder(CircuitData):
         else:
             ctor_name = "{}"
 
-        definition = generate_triggerable_constant_definition(type, ctor_name)
+        definition = generate_triggerable_constant_definition(ctor_name)
 
         def_name = f"triggerable_constant_{type}_{ctor_name}"
 
@@ -463,7 +526,7 @@ class CircuitBuilder(CircuitData):
             definition=definition,
             inputs={"tick": SingleComponentInput(input=on.output(), input_name="tick")},
             output_options={},
-            class_generics={},
+            class_generics={"T": rust_type(type)},
             params=None,
         )
 
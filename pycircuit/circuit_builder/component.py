@@ -69,7 +69,7 @@ class HasOutput(ABC):
             raise ValueError(
                 "Can only compare an output for equality against another output"
             )
-        return self._make_math_component(other, "eq", "eqComponent")
+        return self._make_math_component(other, "eq", "EqComponent")
 
     def __getitem__(self, index: int) -> "Component":
         from .circuit_context import CircuitContextManager
@@ -181,10 +181,19 @@ class OutputOptions(DataClassJsonMixin):
     force_stored: bool = False
     block_propagation: bool = False
 
+    # Calls which only write cold outputs are moved out of the hot path in codegen
+    cold: bool = False
+
+    # Components whose outputs are all lazy are only marked dirty when triggered,
+    # and computed when one of their outputs is next read
+    lazy: bool = False
+
     def strongest_of(self, other: "OutputOptions") -> "OutputOptions":
         return OutputOptions(
             force_stored=self.force_stored or other.force_stored,
             block_propagation=self.block_propagation or other.block_propagation,
+            cold=self.cold or other.cold,
+            lazy=self.lazy or other.lazy,
         )
 
 
@@ -274,6 +283,13 @@ class Component(HasOutput):
                         f"Component {self.name} requested output {output_name} be stored, despite being assumed_invalid"
                     )
 
+            # Lazy outputs are stored until recomputed, so the same applies
+            if output_options.lazy:
+                if self.definition.d_output_specs[output_name].assume_invalid:
+                    raise ValueError(
+                        f"Component {self.name} requested output {output_name} be lazy, despite being assumed_invalid"
+                    )
+
         for (input_name, comp_input) in self.inputs.items():
             # this really only possible via api misuse, no point in real exception
             assert input_name == comp_input.input_name
@@ -338,6 +354,24 @@ class Component(HasOutput):
                 self.output_options[real_output.output_name], block_propagation=True
             )
 
+    def mark_cold(self, output: str | None = None):
+        real_output = self.output(output)
+        if real_output.output_name not in self.output_options:
+            self.output_options[real_output.output_name] = OutputOptions(cold=True)
+        else:
+            self.output_options[real_output.output_name] = dataclasses.replace(
+                self.output_options[real_output.output_name], cold=True
+            )
+
+    def mark_lazy(self, output: str | None = None):
+        real_output = self.output(output)
+        if real_output.output_name not in self.output_options:
+            self.output_options[real_output.output_name] = OutputOptions(lazy=True)
+        else:
+            self.output_options[real_output.output_name] = dataclasses.replace(
+                self.output_options[real_output.output_name], lazy=True
+            )
+
     def index(self) -> ComponentIndex:
         return ComponentIndex(
             inputs=FrozenDict(self.inputs),
@@ -57,6 +57,8 @@ InputType = BasicInput | ArrayInput
 # Test this more - python pattern matching has some weird behavior with dict overrides
 def decode_input(input: Any) -> InputType:
 
+    # Don't consume the metadata of the caller's dict, it may be decoded again
+    input = dict(input)
     always_valid = bool(input.pop("always_valid", False))
     optional = bool(input.pop("optional", False))
     allow_unused = bool(input.pop("allow_unused", False))
@@ -90,7 +92,7 @@ def encode_input(input: InputType) -> Dict[str, Any]:
             input_type = "single"
         case ArrayInput(fields=fields):
             input_type = "array"
-            meta_dict["fields"] = fields
+            meta_dict["fields"] = sorted(fields)
         case _:
             raise ValueError("Wrong input type passed")
 
@@ -210,6 +212,12 @@ class CallSpec(DataClassJsonMixin):
         output_struct_path: Prexisting struct in the class to use for outputs
 
         name: An optional name for the callset for use in ordering and disambiguation
+
+        batch_callback: An optional static function which codegen can call instead of the
+                        callback for a batch of independent components of the definition.
+                        It takes an array of mutable component references, then an array
+                        of Option<&_> per input and of &mut _ per output (each sorted by name)
+                        and returns an array of the output valid structs
     """
 
     written_set: frozenset[str]
@@ -234,6 +242,8 @@ class CallSpec(DataClassJsonMixin):
 
     name: Optional[str] = None
 
+    batch_callback: Optional[str] = None
+
     @property
     def skippable(self):
         """Returns whether the callback can be skipped"""
@@ -284,6 +294,10 @@ class OutputSpec(DataClassJsonMixin):
 
         assume_default: Forcibly specifies that said input contains the default value
                         if it has not been written to
+
+        valid_with_inputs: Whether every call writing the output makes it valid
+                           when all of the component's inputs are valid, like arithmetic.
+                           Pycircuit uses this to infer validity statically
     """
 
     type_path: str
@@ -292,6 +306,7 @@ class OutputSpec(DataClassJsonMixin):
     assume_invalid: bool = False
     assume_default: bool = False
     default_constructor: Optional[str] = None
+    valid_with_inputs: bool = False
 
     # TODO proper forcibly edge-triggered component
     # make an input that you can only reference when it's actualy triggered?
@@ -456,6 +471,12 @@ class Definition(DataClassJsonMixin):
         if callset.callback is None and len(callset.outputs) > 0:
             raise ValueError("A non-triggering callback has outputs listed")
 
+        if callset.batch_callback is not None and callset.skippable:
+            raise ValueError(
+                f"A callset has a batch callback {callset.batch_callback} "
+                f"but no callback for {self.class_name}"
+            )
+
         aggregate_inputs = {
             input
             for input in callset.inputs()
@@ -466,6 +487,12 @@ class Definition(DataClassJsonMixin):
             case []:
                 pass
 
+            case [_] if callset.batch_callback is not None:
+                raise ValueError(
+                    f"A call set has aggregate inputs {aggregate_inputs} "
+                    f"but has a batch callback {callset.batch_callback}"
+                )
+
             case [_] if callset.cleanup is not None:
                 # TODO can loosen to only explode on aggregate inputs that result
                 # in multiple calls, when single-call aggregates are supported
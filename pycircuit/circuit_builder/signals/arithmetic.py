@@ -2,13 +2,17 @@ from pycircuit.circuit_builder.definition import CallSpec, Definition, OutputSpe
 from pycircuit.circuit_builder.definition import BasicInput
 from pycircuit.common.frozen import FrozenDict
 
+ARITHMETIC_MODULE = "::pycircuit_rs::core_components::arithmetic"
+
 
 def generate_binary_definition(diff_name: str, operator_name: str) -> Definition:
     return Definition(
         class_name=operator_name,
-        output_specs=FrozenDict(out=OutputSpec(ephemeral=True, type_path="Output")),
+        output_specs=FrozenDict(
+            out=OutputSpec(ephemeral=True, type_path="Output", valid_with_inputs=True)
+        ),
         inputs=FrozenDict({"a": BasicInput(), "b": BasicInput()}),
-        header="signals/basic_arithmetic.hh",
+        module=ARITHMETIC_MODULE,
         generic_callset=CallSpec(
             observes=frozenset(),
             written_set=frozenset(["a", "b"]),
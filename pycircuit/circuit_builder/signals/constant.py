@@ -10,6 +10,16 @@ from pycircuit.circuit_builder.definition import BasicInput
 from pycircuit.circuit_builder.component import HasOutput
 from pycircuit.common.frozen import FrozenDict
 
+CONSTANT_MODULE = "::pycircuit_rs::core_components::constant"
+PARAMETER_MODULE = "::pycircuit_rs::core_components::parameter"
+
+# Constants are made with the type names of the old C++ backend
+RUST_TYPES = {"double": "f64", "float": "f32", "bool": "bool"}
+
+
+def rust_type(type_name: str) -> str:
+    return RUST_TYPES.get(type_name, type_name)
+
 
 def clean_float_name(f_name: str) -> str:
     return f_name.replace(".", "_").replace("-", "_")
@@ -22,9 +32,9 @@ def make_double(val: float) -> HasOutput:
     return circuit.make_constant("double", str(val))
 
 
-def generate_constant_definition(constant_type: str, constructor: str) -> Definition:
+def generate_constant_definition(constructor: str) -> Definition:
     defin = Definition(
-        class_name=f"CtorConstant<{constant_type}>",
+        class_name="CtorConstant",
         output_specs=FrozenDict(
             out=OutputSpec(
                 ephemeral=True,
@@ -35,7 +45,8 @@ def generate_constant_definition(constant_type: str, constructor: str) -> Defini
             )
         ),
         inputs=FrozenDict(),
-        header="signals/constant.hh",
+        module=CONSTANT_MODULE,
+        class_generics=FrozenDict({"T": 0}),
         differentiable_operator_name="constant",
         metadata=FrozenDict({"constant_value": constructor}),
     )
@@ -43,11 +54,9 @@ def generate_constant_definition(constant_type: str, constructor: str) -> Defini
     return defin
 
 
-def generate_triggerable_constant_definition(
-    constant_type: str, constructor: str
-) -> Definition:
+def generate_triggerable_constant_definition(constructor: str) -> Definition:
     defin = Definition(
-        class_name=f"TriggerableConstant<{constant_type}>",
+        class_name="TriggerableConstant",
         output_specs=FrozenDict(
             out=OutputSpec(
                 ephemeral=True,
@@ -58,13 +67,14 @@ def generate_triggerable_constant_definition(
             )
         ),
         inputs=FrozenDict({"tick": BasicInput()}),
-        header="signals/constant.hh",
+        module=CONSTANT_MODULE,
         generic_callset=CallSpec(
             written_set=frozenset(["tick"]),
             observes=frozenset(),
             outputs=frozenset(["out"]),
             callback="tick",
         ),
+        class_generics=FrozenDict({"T": 0}),
         differentiable_operator_name="constant",
         metadata=FrozenDict({"constant_value": constructor}),
     )
@@ -75,7 +85,7 @@ def generate_triggerable_constant_definition(
 
 def _do_generate_parameter_definition(required: bool, op_name: str) -> Definition:
     defin = Definition(
-        class_name=f"DoubleParameter<{str(required).lower()}>",
+        class_name="DoubleParameter",
         output_specs=FrozenDict(
             out=OutputSpec(
                 type_path="Output",
@@ -85,11 +95,12 @@ def _do_generate_parameter_definition(required: bool, op_name: str) -> Definitio
         inputs=FrozenDict(
             {"a": BasicInput(meta=InputMetadata(optional=True, allow_unused=True))}
         ),
-        header="signals/parameter.hh",
+        module=PARAMETER_MODULE,
         init_spec=InitSpec(
             init_call="init",
             takes_params=True,
         ),
+        class_generics=FrozenDict({"REQUIRED": 0}),
         differentiable_operator_name=op_name,
     )
     defin.validate()
@@ -2,13 +2,15 @@ from pycircuit.circuit_builder.definition import CallSpec, Definition, OutputSpe
 from pycircuit.circuit_builder.definition import BasicInput
 from pycircuit.common.frozen import FrozenDict
 
+INDEX_MODULE = "::pycircuit_rs::core_components::index"
+
 
 def generate_static_index_definition(offset: int) -> Definition:
     return Definition(
         class_name=f"StaticIndex",
         output_specs=FrozenDict(out=OutputSpec(ephemeral=True, type_path="Output")),
         inputs=FrozenDict({"a": BasicInput()}),
-        header="signals/basic_operators.hh",
+        module=INDEX_MODULE,
         generic_callset=CallSpec(
             observes=frozenset(),
             written_set=frozenset(["a"]),
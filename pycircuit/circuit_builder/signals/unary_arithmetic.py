@@ -3,6 +3,7 @@ from pycircuit.circuit_builder.definition import CallSpec, Definition, OutputSpe
 from pycircuit.circuit_builder.definition import BasicInput
 from pycircuit.circuit_builder.circuit_context import CircuitContextManager
 from pycircuit.circuit_builder.component import HasOutput, Component
+from .arithmetic import ARITHMETIC_MODULE
 from .running_name import get_novel_name
 from pycircuit.common.frozen import FrozenDict
 
@@ -10,9 +11,11 @@ from pycircuit.common.frozen import FrozenDict
 def generate_unary_definition(diff_name: str, operator_name: str) -> Definition:
     return Definition(
         class_name=operator_name,
-        output_specs=FrozenDict(out=OutputSpec(ephemeral=True, type_path="Output")),
+        output_specs=FrozenDict(
+            out=OutputSpec(ephemeral=True, type_path="Output", valid_with_inputs=True)
+        ),
         inputs=FrozenDict({"a": BasicInput()}),
-        header="signals/basic_arithmetic.hh",
+        module=ARITHMETIC_MODULE,
         generic_callset=CallSpec(
             observes=frozenset(),
             written_set=frozenset(["a"]),
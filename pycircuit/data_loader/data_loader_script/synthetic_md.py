@@ -0,0 +1,101 @@
+import os
+from dataclasses import dataclass
+import random
+import sys
+from typing import Any, Dict, Iterator, Tuple
+from argparse_dataclass import ArgumentParser
+from .binance_normalizer import binance_trade_normalizer, binance_depth_normalizer
+import flatbuffers
+import gzip
+
+
+@dataclass
+class SyntheticArgs:
+    events: int = 1000000
+    levels: int = 20
+    trade_frac: float = 0.2
+    seed: int = 0
+    out_dir: str = "./"
+
+
+def synthetic_binance_messages(
+    events: int, levels: int, trade_frac: float, seed: int
+) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """Random walk market data in the format binance-futures sends through tardis.
+
+    Yields the channel, local timestamp and message of every event, so that
+    they can be normalized exactly like downloaded data"""
+
+    rng = random.Random(seed)
+    mid = 20000.0
+    tick = 0.1
+    time_us = 1_600_000_000_000_000
+
+    for _ in range(events):
+        time_us += rng.randint(50, 5000)
+        mid = max(tick, mid + tick * rng.choice([-1, 0, 0, 1]))
+        exchange_ms = time_us // 1000
+
+        if rng.random() < trade_frac:
+            buy = rng.random() < 0.5
+            price = mid + (tick if buy else -tick) / 2
+            yield (
+                "trade",
+                time_us,
+                {
+                    "data": {
+                        "T": exchange_ms,
+                        "p": f"{price:.2f}",
+                        "q": f"{rng.expovariate(10):.3f}",
+                        "m": not buy,
+                    }
+                },
+            )
+        else:
+            bids = [
+                (f"{mid - tick * (level + 0.5):.2f}", f"{rng.expovariate(1):.3f}")
+                for level in range(levels)
+            ]
+            asks = [
+                (f"{mid + tick * (level + 0.5):.2f}", f"{rng.expovariate(1):.3f}")
+                for level in range(levels)
+            ]
+            yield ("depth", time_us, {"data": {"T": exchange_ms, "b": bids, "a": asks}})
+
+
+NORMALIZERS = {
+    "trade": binance_trade_normalizer,
+    "depth": binance_depth_normalizer,
+}
+
+
+def write_synthetic(args: SyntheticArgs):
+    """Writes one file per channel, in the same format as tardis_download"""
+    files = {
+        channel: gzip.open(
+            os.path.join(args.out_dir, f"synthetic_{channel}.md.gz"), "wb"
+        )
+        for channel in NORMALIZERS.keys()
+    }
+
+    for (channel, local_time_us, message) in synthetic_binance_messages(
+        args.events, args.levels, args.trade_frac, args.seed
+    ):
+        builder = flatbuffers.Builder(1024)
+        NORMALIZERS[channel](builder, local_time_us, message)
+        output = builder.Output()
+
+        files[channel].write(len(output).to_bytes(4, "little"))
+        files[channel].write(output)
+
+    for file in files.values():
+        file.close()
+
+
+def main():
+    args: SyntheticArgs = ArgumentParser(SyntheticArgs).parse_args(sys.argv[1:])
+    write_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
 from dataclasses import dataclass, field
 from dataclasses_json import DataClassJsonMixin, config
-from typing import Any, Dict, List, Sequence, Set
+from typing import Any, Callable, Dict, Iterable, List, Set
 from pycircuit.circuit_builder.circuit import CircuitData
 from pycircuit.circuit_builder.component import (
     HasOutput,
     ComponentOutput,
+    ExternalOutput,
+    GraphOutput,
     SingleComponentInput,
     ArrayComponentInput,
 )
 from pycircuit.differentiator.operators.all_operators import ALL_OPERATORS
-from pycircuit.circuit_builder.component import InputBatch
 from pycircuit.differentiator.tensor import CircuitTensor
 
 from pycircuit.differentiator.tensor import (
@@ -17,9 +18,18 @@ from pycircuit.differentiator.tensor import (
     make_parameter,
     make_constant,
 )
-from pycircuit.differentiator.operator import OperatorFn, DagOperator
+from pycircuit.differentiator.operator import (
+    CompiledDagOperator,
+    OperatorFn,
+    DagOperator,
+)
 from pycircuit.differentiator.tensor import Module
+from pycircuit.differentiator.schedule import (
+    batch_by_level,
+    precompute_parameter_free,
+)
 from pycircuit.differentiator.tensor import make_empty
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
 
 
 def _node_from(input: Any) -> "Node":
@@ -37,8 +47,10 @@ def _node_from(input: Any) -> "Node":
 
 
 def output_from_name(input: str) -> ComponentOutput:
-    parent, output = input.split("::")
-    return ComponentOutput(parent=parent, output_name=output)
+    (parent, output) = input.split("::")
+    if parent == "external":
+        return ExternalOutput(external_name=output)
+    return GraphOutput(parent=parent, output_name=output)
 
 
 def output_to_name(output: ComponentOutput) -> str:
@@ -88,25 +100,48 @@ class OperatorNode(DataClassJsonMixin):
 Node = EdgeNode | OperatorNode | ParamNode | ConstantNode
 
 
-def _extract_array_batch(
-    circuit: CircuitData,
-    array: Sequence[InputBatch],
-    cache: Dict[ComponentOutput, Node],
-    block_propagating: Set[ComponentOutput],
-) -> List[NodeBatch]:
-    batches = [NodeBatch(nodes=batch.d_inputs.copy()) for batch in array]
-
-    for batch in batches:
-        for output in batch.nodes.values():
-            _traverse_circuit_from(circuit, output, cache, block_propagating)
-
-    return batches
-
-
-def _do_traverse_circuit_from(
+def node_inputs(node: Node) -> List[ComponentOutput]:
+    "The outputs a node reads, single inputs first and then each array in order"
+    match node:
+        case OperatorNode(single_inputs=single, array_inputs=array):
+            return list(single.values()) + [
+                output
+                for batches in array.values()
+                for batch in batches
+                for output in batch.nodes.values()
+            ]
+    return []
+
+
+def post_order(
+    root: ComponentOutput,
+    children: Callable[[ComponentOutput], Iterable[ComponentOutput]],
+) -> List[ComponentOutput]:
+    """Every output reachable from root, each one after all of its children.
+
+    This is the order a recursive depth first search would finish them in,
+    but walks an explicit stack so deep graphs can't hit the recursion limit"""
+    order: List[ComponentOutput] = []
+    seen = {root}
+    stack = [(root, iter(children(root)))]
+
+    while stack:
+        (output, pending) = stack[-1]
+        for child in pending:
+            if child not in seen:
+                seen.add(child)
+                stack.append((child, iter(children(child))))
+                break
+        else:
+            stack.pop()
+            order.append(output)
+
+    return order
+
+
+def _node_for(
     circuit: CircuitData,
     root_output: ComponentOutput,
-    cache: Dict[ComponentOutput, Node],
     block_propagating: Set[ComponentOutput],
 ) -> Node:
 
@@ -139,13 +174,10 @@ def _do_traverse_circuit_from(
                 match input:
                     case SingleComponentInput(input=single):
                         single_inputs[input_name] = single
-                        _traverse_circuit_from(
-                            circuit, single, cache, block_propagating
-                        )
                     case ArrayComponentInput(inputs=array):
-                        array_inputs[input_name] = _extract_array_batch(
-                            circuit, array, cache, block_propagating
-                        )
+                        array_inputs[input_name] = [
+                            NodeBatch(nodes=batch.d_inputs.copy()) for batch in array
+                        ]
 
             rval = OperatorNode(
                 output=root_output,
@@ -161,23 +193,59 @@ def _do_traverse_circuit_from(
     raise ValueError(f"Operator name {op_name} not in known tensor operators")
 
 
-def _traverse_circuit_from(
+def _discover_nodes(
     circuit: CircuitData,
     root_output: ComponentOutput,
-    cache: Dict[ComponentOutput, Node],
     block_propagating: Set[ComponentOutput],
-):
-    if root_output in cache:
-        return cache[root_output]
-    rval = _do_traverse_circuit_from(circuit, root_output, cache, block_propagating)
-    cache[root_output] = rval
-    return rval
+) -> Dict[ComponentOutput, Node]:
+    nodes: Dict[ComponentOutput, Node] = {}
 
+    def children(output: ComponentOutput) -> List[ComponentOutput]:
+        nodes[output] = _node_for(circuit, output, block_propagating)
+        return node_inputs(nodes[output])
 
-# TODO - should consider how to create minimal trees
-# Much of the 'differentiable' computation is not attached to parameters
-# and just condenses already-sampled data down.
-# We should instead try and discover the minimum-sampling graph
+    return {output: nodes[output] for output in post_order(root_output, children)}
+
+
+def _cut_sampled_subtrees(
+    root_output: ComponentOutput, nodes: Dict[ComponentOutput, Node]
+) -> Dict[ComponentOutput, Node]:
+    """Turns operators reading sampled data but no parameters into edges.
+
+    Much of the 'differentiable' computation is not attached to parameters
+    and just condenses already-sampled data down. Sampling those outputs
+    instead means they aren't recomputed every epoch. Subtrees of only
+    constants are left alone, since there's nothing to sample in them"""
+    dependent: Set[ComponentOutput] = set()
+    sampled: Set[ComponentOutput] = set()
+
+    # Nodes are discovered in topological order
+    for (output, node) in nodes.items():
+        match node:
+            case ParamNode():
+                dependent.add(output)
+            case EdgeNode():
+                sampled.add(output)
+            case OperatorNode():
+                inputs = node_inputs(node)
+                if any(input in dependent for input in inputs):
+                    dependent.add(output)
+                elif any(input in sampled for input in inputs):
+                    sampled.add(output)
+
+    cut: Dict[ComponentOutput, Node] = {
+        output: (
+            EdgeNode(output=output)
+            if isinstance(node, OperatorNode) and output in sampled
+            else node
+        )
+        for (output, node) in nodes.items()
+    }
+
+    return {
+        output: cut[output]
+        for output in post_order(root_output, lambda out: node_inputs(cut[out]))
+    }
 
 
 @dataclass
@@ -188,17 +256,30 @@ class Graph(DataClassJsonMixin):
     )
     root: ComponentOutput
 
+    def __post_init__(self):
+        # Every node after its inputs, so that traversals can be done in a loop
+        self._order = post_order(self.root, lambda out: node_inputs(self.nodes[out]))
+
     @staticmethod
     def discover_from_circuit(
         circuit: CircuitData,
         root: HasOutput,
         block_propagating: Set[ComponentOutput] = set(),
+        minimal: bool = False,
     ) -> "Graph":
+        """Discovers the differentiable graph computing root.
+
+        With minimal=True, operators which don't depend on any parameter are
+        sampled as edges rather than recomputed by the model"""
         circuit.validate()
-        node_map: Dict[ComponentOutput, Node] = {}
-        _traverse_circuit_from(circuit, root.output(), node_map, block_propagating)
+        node_map = _discover_nodes(circuit, root.output(), block_propagating)
+        if minimal:
+            node_map = _cut_sampled_subtrees(root.output(), node_map)
         return Graph(root=root.output(), nodes=node_map)
 
+    def topological_order(self) -> List[ComponentOutput]:
+        return list(self._order)
+
     def find_edges(self) -> List[ComponentOutput]:
 
         all_edge_outputs = {
@@ -215,29 +296,65 @@ class Graph(DataClassJsonMixin):
         return sorted(all_parameter_names)
 
     def pretty(self) -> Any:
-        return self._traverse_pretty(self.root, dict())
+        pretty: Dict[ComponentOutput, Any] = {}
+        for node_output in self._order:
+            pretty[node_output] = self._pretty_node(self.nodes[node_output], pretty)
+        return pretty[self.root]
 
     def traverse_model_into(
         self,
         data: Dict[ComponentOutput, CircuitTensor],
         parameters: Dict[str, CircuitParameter],
+        batched: bool = False,
+        precompute: bool = False,
     ) -> DagOperator:
         running_storage: List[CircuitTensor] = []
         ordered_operators: List[OperatorFn] = []
-        self._traverse_model(
-            self.root, data, parameters, dict(), running_storage, ordered_operators
-        )
+        storage_idx: Dict[ComponentOutput, int] = {}
+
+        for node_output in self._order:
+            self._add_model_node(
+                node_output,
+                data,
+                parameters,
+                storage_idx,
+                running_storage,
+                ordered_operators,
+            )
+            storage_idx[node_output] = len(running_storage) - 1
+
+        if precompute:
+            ordered_operators = precompute_parameter_free(
+                running_storage, ordered_operators
+            )
+
+        if batched:
+            return DagOperator(
+                ordered=batch_by_level(running_storage, ordered_operators),
+                storage=running_storage,
+            )
 
         return DagOperator(ordered=ordered_operators, storage=running_storage)
 
     def mark_stored(self, circuit: CircuitData):
+        "Stores every edge, so that a writer can sample it"
         for edge in self.find_edges():
-            circuit.components[edge.parent].force_stored(edge.output_name)
+            # Externals are always stored
+            if isinstance(edge, GraphOutput):
+                circuit.components[edge.parent].force_stored(edge.output_name)
+
+    def writer_config(
+        self, target_output: ComponentOutput, sample_on: ComponentOutput, ms_future: int
+    ) -> WriterConfig:
+        "The writer config sampling exactly the edges of this graph"
+        return WriterConfig(
+            outputs=self.find_edges(),
+            target_output=target_output,
+            sample_on=sample_on,
+            ms_future=ms_future,
+        )
 
-    def _do_traverse_pretty(
-        self, node_output: ComponentOutput, cache: Dict[ComponentOutput, Any]
-    ) -> Any:
-        node = self.nodes[node_output]
+    def _pretty_node(self, node: Node, pretty: Dict[ComponentOutput, Any]) -> Any:
         match node:
             case ConstantNode(val=val):
                 return str(val)
@@ -246,23 +363,19 @@ class Graph(DataClassJsonMixin):
             case EdgeNode(output=out):
                 return output_to_name(out)
             case OperatorNode(
-                output,
                 operator_name=opname,
                 single_inputs=single,
                 array_inputs=array,
                 param_names=True,
             ):
-                if output in cache:
-                    return cache[output]
                 single_ops = {
-                    s_name: self._traverse_pretty(s_node, cache)
-                    for (s_name, s_node) in single.items()
+                    s_name: pretty[s_node] for (s_name, s_node) in single.items()
                 }
 
                 array_ops = {
                     a_name: [
                         {
-                            b_name: self._traverse_pretty(b_node, cache)
+                            b_name: pretty[b_node]
                             for (b_name, b_node) in batch.nodes.items()
                         }
                         for batch in a_batches
@@ -276,25 +389,16 @@ class Graph(DataClassJsonMixin):
                     return {opname: single_ops}
 
             case OperatorNode(
-                output,
                 operator_name=opname,
                 single_inputs=single,
                 array_inputs=array,
                 param_names=False,
             ):
-
-                if output in cache:
-                    return cache[output]
-                single_ops_l = [
-                    self._traverse_pretty(s_node, cache) for s_node in single.values()
-                ]
+                single_ops_l = [pretty[s_node] for s_node in single.values()]
 
                 array_ops_l = [
                     [
-                        [
-                            self._traverse_pretty(b_node, cache)
-                            for b_node in batch.nodes.values()
-                        ]
+                        [pretty[b_node] for b_node in batch.nodes.values()]
                         for batch in a_batches
                     ]
                     for a_batches in array.values()
@@ -302,25 +406,15 @@ class Graph(DataClassJsonMixin):
 
                 return {opname: single_ops_l + array_ops_l}
 
-    def _traverse_pretty(
-        self, node_output: ComponentOutput, cache: Dict[ComponentOutput, Any]
-    ) -> Any:
-        if node_output in cache:
-            return cache[node_output]
-
-        rval = self._do_traverse_pretty(node_output, cache)
-        cache[node_output] = rval
-        return rval
-
-    def _do_traverse_model(
+    def _add_model_node(
         self,
         node_output: ComponentOutput,
         data: Dict[ComponentOutput, CircuitTensor],
         parameters: Dict[str, CircuitParameter],
-        cache: Dict[ComponentOutput, int],
+        storage_idx: Dict[ComponentOutput, int],
         running_storage: List[CircuitTensor],
         operator_list: List[OperatorFn],
-    ) -> int:
+    ):
         node = self.nodes[node_output]
         match node:
             case ConstantNode(val=val):
@@ -346,22 +440,13 @@ class Graph(DataClassJsonMixin):
                 operator = ALL_OPERATORS[opname]
 
                 singles = {
-                    s_name: self._traverse_model(
-                        s_node, data, parameters, cache, running_storage, operator_list
-                    )
+                    s_name: storage_idx[s_node]
                     for (s_name, s_node) in node.single_inputs.items()
                 }
                 arrays = {
                     b_name: [
                         {
-                            b_id_name: self._traverse_model(
-                                b_node,
-                                data,
-                                parameters,
-                                cache,
-                                running_storage,
-                                operator_list,
-                            )
+                            b_id_name: storage_idx[b_node]
                             for (b_id_name, b_node) in batch.nodes.items()
                         }
                         for batch in array
@@ -378,25 +463,6 @@ class Graph(DataClassJsonMixin):
             case _:
                 raise TypeError("Bad node type")
 
-        return len(running_storage) - 1
-
-    def _traverse_model(
-        self,
-        node_output: ComponentOutput,
-        data: Dict[ComponentOutput, CircuitTensor],
-        parameters: Dict[str, CircuitParameter],
-        cache: Dict[ComponentOutput, OperatorFn],
-        running_storage: List[CircuitTensor],
-        operator_list: List[OperatorFn],
-    ) -> OperatorFn:
-        if node_output in cache:
-            return cache[node_output]
-        rval = self._do_traverse_model(
-            node_output, data, parameters, cache, running_storage, operator_list
-        )
-        cache[node_output] = rval
-        return rval
-
 
 class Model:
     def __init__(self, graph: Graph, initial_values: Dict[str, CircuitTensor] = {}):
@@ -407,8 +473,26 @@ class Model:
             name: make_parameter(initial_values.get(name)) for name in parameter_names
         }
 
-    def create_module(self, data: Dict[ComponentOutput, CircuitTensor]):
-        return self._graph.traverse_model_into(data, self._parameters)
+    def create_module(
+        self,
+        data: Dict[ComponentOutput, CircuitTensor],
+        compiled: bool = False,
+        script: bool = False,
+        batched: bool = False,
+        precompute: bool = True,
+    ) -> Module:
+        """Creates a module evaluating the graph over data.
+
+        compiled lowers the graph into a single generated function,
+        and script additionally compiles that function with TorchScript.
+        batched stacks independent operators of the same kind at each depth.
+        precompute evaluates everything not depending on a parameter up front"""
+        dag = self._graph.traverse_model_into(
+            data, self._parameters, batched=batched, precompute=precompute
+        )
+        if compiled or script:
+            return CompiledDagOperator(dag, script=script)
+        return dag
 
     def parameters(self) -> Dict[str, CircuitParameter]:
         return self._parameters.copy()
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Sequence, Set
 
 from pycircuit.circuit_builder.component import ComponentOutput
 
@@ -29,6 +29,25 @@ class OperatorFn(ABC, torch.nn.Module):
     def do_forward(self, tensors: List[CircuitTensor]):
         pass
 
+    @abstractmethod
+    def expression(self, var: Callable[[int], str]) -> str:
+        """The python expression computing this operator, used by CompiledDagOperator.
+
+        var gives the name of the variable holding each index of the storage"""
+        pass
+
+    @classmethod
+    def elementwise(cls) -> bool:
+        """Whether each element of the output only depends on the same element
+        of the inputs, so that independent operators can be stacked together"""
+        return False
+
+    def filled(self) -> List[int]:
+        return [self.fill_idx]
+
+    def statements(self, var: Callable[[int], str]) -> List[str]:
+        return [f"{var(self.fill_idx)} = {self.expression(var)}"]
+
     # need to refactor this to not have hacks
 
     def set_output(self, output: ComponentOutput):
@@ -99,8 +118,75 @@ class OperatorFn(ABC, torch.nn.Module):
                     )
 
 
+class BatchedOperatorFn(torch.nn.Module):
+    """Runs independent elementwise operators of the same kind as one stacked operator.
+
+    Every input is gathered from the operators into a [k, *shape] tensor, the
+    operator runs once over the stack, and each row is scattered back to the
+    storage of the operator it came from. Inputs are expanded to the output
+    shape first, so the rows match what the operators would compute alone"""
+
+    def __init__(self, operators: Sequence[OperatorFn], shape: Sequence[int]):
+        super(BatchedOperatorFn, self).__init__()
+
+        op_class = type(operators[0])
+        assert op_class.elementwise()
+        assert all(type(operator) is op_class for operator in operators)
+
+        input_names = sorted(op_class.single_inputs())
+        self.gather = [
+            [operator.single_mapping[name] for operator in operators]
+            for name in input_names
+        ]
+        self.fill_indices = [operator.fill_idx for operator in operators]
+        self.shape = list(shape)
+
+        # Reads the stacked inputs from a list in the order of input_names
+        self.stacked = op_class(
+            {name: idx for (idx, name) in enumerate(input_names)},
+            {},
+            len(input_names),
+        )
+
+    def name(self) -> str:
+        return self.stacked.name()
+
+    def filled(self) -> List[int]:
+        return self.fill_indices
+
+    def forward(self, tensors: List[CircuitTensor]):
+        stacked = [
+            torch.stack([tensors[idx].expand(self.shape) for idx in gather])
+            for gather in self.gather
+        ]
+        rval = self.stacked.do_forward(stacked)
+        for (idx, row) in zip(self.fill_indices, rval.unbind(0)):
+            tensors[idx] = row
+        return rval
+
+    def statements(self, var: Callable[[int], str]) -> List[str]:
+        batch = f"b{self.fill_indices[0]}"
+        stacks = [f"{batch}_{idx}" for idx in range(len(self.gather))]
+
+        lines = [
+            f"{stack} = torch.stack(["
+            + ", ".join(f"{var(idx)}.expand({self.shape})" for idx in gather)
+            + "])"
+            for (stack, gather) in zip(stacks, self.gather)
+        ]
+        lines.append(f"{batch} = {self.stacked.expression(lambda idx: stacks[idx])}")
+        lines += [
+            f"{var(fill_idx)} = {batch}[{row}]"
+            for (row, fill_idx) in enumerate(self.fill_indices)
+        ]
+        return lines
+
+
+DagStep = OperatorFn | BatchedOperatorFn
+
+
 class DagOperator(torch.nn.Module):
-    def __init__(self, storage: List[CircuitTensor], ordered: List[OperatorFn]):
+    def __init__(self, storage: List[CircuitTensor], ordered: List[DagStep]):
         super(DagOperator, self).__init__()
 
         self.storage = storage
@@ -108,8 +194,57 @@ class DagOperator(torch.nn.Module):
 
     def forward(self):
 
+        # Everything may have been precomputed if the root has no parameters
+        last_returned = self.storage[-1]
         for operator in self.ordered:
             last_returned = operator.forward(self.storage)
 
         assert last_returned is self.storage[-1]
         return last_returned
+
+
+_COMPILED_FUNCTION = "dag_forward"
+
+
+def _var(idx: int) -> str:
+    return f"t{idx}"
+
+
+class CompiledDagOperator(torch.nn.Module):
+    """Computes the same result as a DagOperator, but as a single generated function.
+
+    Every operator becomes straight-line tensor code, so evaluating
+    the graph doesn't dispatch through a module and the storage list per operator.
+    Storage which isn't written by an operator becomes an argument of the function.
+
+    With script=True the function is compiled with TorchScript. Either way,
+    the module can still be passed to torch.compile, on torch 2.0 and later"""
+
+    def __init__(self, dag: DagOperator, script: bool = False):
+        super(CompiledDagOperator, self).__init__()
+
+        filled = {idx for operator in dag.ordered for idx in operator.filled()}
+        self.leaf_indices = [
+            idx for idx in range(len(dag.storage)) if idx not in filled
+        ]
+        self.leaves = [dag.storage[idx] for idx in self.leaf_indices]
+        self.source = self._generate_source(dag)
+
+        if script:
+            unit = torch.jit.CompilationUnit(self.source)
+            self.compiled = getattr(unit, _COMPILED_FUNCTION)
+        else:
+            scope = {"torch": torch}
+            exec(compile(self.source, f"<{_COMPILED_FUNCTION}>", "exec"), scope)
+            self.compiled = scope[_COMPILED_FUNCTION]
+
+    def _generate_source(self, dag: DagOperator) -> str:
+        args = ", ".join(f"{_var(idx)}: torch.Tensor" for idx in self.leaf_indices)
+        lines = [f"def {_COMPILED_FUNCTION}({args}) -> torch.Tensor:"]
+        for operator in dag.ordered:
+            lines += [f"    {line}" for line in operator.statements(_var)]
+        lines.append(f"    return {_var(len(dag.storage) - 1)}")
+        return "\n".join(lines) + "\n"
+
+    def forward(self):
+        return self.compiled(*self.leaves)
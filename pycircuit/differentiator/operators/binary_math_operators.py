@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Dict, List, Set, Type
+from typing import Callable, Dict, List, Set, Type
 from pycircuit.differentiator.operator import OperatorFn
 from pycircuit.differentiator.tensor import (
     tensor_max,
@@ -17,6 +17,10 @@ class BinaryOp(OperatorFn):
     def array_inputs(cls) -> Dict[str, Set[str]]:
         return {}
 
+    @classmethod
+    def elementwise(cls) -> bool:
+        return True
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -33,9 +37,17 @@ class BinaryOp(OperatorFn):
     def do_op(cls, a: CircuitTensor, b: CircuitTensor) -> CircuitTensor:
         pass
 
+    @classmethod
+    @abstractmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        pass
+
     def do_forward(self, tensors: List[CircuitTensor]) -> CircuitTensor:
         return self.do_op(tensors[self.a_module], tensors[self.b_module])
 
+    def expression(self, var: Callable[[int], str]) -> str:
+        return self.do_expression(var(self.a_module), var(self.b_module))
+
 
 class Add(BinaryOp):
     @classmethod
@@ -46,6 +58,10 @@ class Add(BinaryOp):
     def do_op(self, a, b) -> CircuitTensor:
         return a + b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} + {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -64,6 +80,10 @@ class Sub(BinaryOp):
     def do_op(siwclslf, a, b) -> CircuitTensor:
         return a - b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} - {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -82,6 +102,10 @@ class Mul(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a * b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} * {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -100,6 +124,10 @@ class Div(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a / b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} / {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -118,6 +146,10 @@ class Lt(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a < b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} < {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -136,6 +168,10 @@ class Le(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a <= b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} <= {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -154,6 +190,10 @@ class Gt(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a > b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} > {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -172,6 +212,10 @@ class Ge(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return a >= b
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"({a} >= {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -190,6 +234,10 @@ class Min(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return tensor_min(a, b)
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"torch.minimum({a}, {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -208,6 +256,10 @@ class Max(BinaryOp):
     def do_op(cls, a, b) -> CircuitTensor:
         return tensor_max(a, b)
 
+    @classmethod
+    def do_expression(cls, a: str, b: str) -> str:
+        return f"torch.maximum({a}, {b})"
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -18,6 +18,10 @@ class Select(OperatorFn):
     def array_inputs(cls) -> Dict[str, Set[str]]:
         return {}
 
+    @classmethod
+    def elementwise(cls) -> bool:
+        return True
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -34,3 +38,9 @@ class Select(OperatorFn):
         return torch.where(
             tensors[self.select_a], tensors[self.a_module], tensors[self.b_module]
         )
+
+    def expression(self, var: Callable[[int], str]) -> str:
+        return (
+            f"torch.where({var(self.select_a)}, "
+            f"{var(self.a_module)}, {var(self.b_module)})"
+        )
@@ -19,10 +19,18 @@ class Mean(AUnaryOp):
     ):
         super(Mean, self).__init__(single_inputs, array_inputs, fill_idx)
 
+    @classmethod
+    def elementwise(cls) -> bool:
+        return False
+
     @classmethod
     def do_op(self, a):
         return torch.mean(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"torch.mean({a})"
+
 
 class Std(AUnaryOp):
     @classmethod
@@ -37,12 +45,20 @@ class Std(AUnaryOp):
     ):
         super(Std, self).__init__(single_inputs, array_inputs, fill_idx)
 
+    @classmethod
+    def elementwise(cls) -> bool:
+        return False
+
     @classmethod
     def do_op(self, a):
         if len(a) <= 1:
             return torch.tensor([1])
         return torch.std(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"(torch.std({a}) if len({a}) > 1 else torch.tensor([1]))"
+
 
 SUMMARY_OPERATORS: Dict[str, Type[OperatorFn]] = {
     "mean": Mean,
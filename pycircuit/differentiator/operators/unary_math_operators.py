@@ -16,14 +16,26 @@ class AUnaryOp(OperatorFn):
     def array_inputs(cls) -> Dict[str, Set[str]]:
         return {}
 
+    @classmethod
+    def elementwise(cls) -> bool:
+        return True
+
     @classmethod
     @abstractmethod
     def do_op(cls, a: CircuitTensor) -> CircuitTensor:
         pass
 
+    @classmethod
+    @abstractmethod
+    def do_expression(cls, a: str) -> str:
+        pass
+
     def do_forward(self, tensors: List[CircuitTensor]):
         return self.do_op(tensors[self.a_module])
 
+    def expression(self, var: Callable[[int], str]) -> str:
+        return self.do_expression(var(self.a_module))
+
     def __init__(
         self,
         single_inputs: Dict[str, int],
@@ -51,6 +63,10 @@ class Exp(AUnaryOp):
     def do_op(self, a):
         return torch.exp(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"torch.exp({a})"
+
 
 class Log(AUnaryOp):
     @classmethod
@@ -69,6 +85,10 @@ class Log(AUnaryOp):
     def do_op(self, a):
         return torch.log(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"torch.log({a})"
+
 
 class Sqrt(AUnaryOp):
     @classmethod
@@ -87,6 +107,10 @@ class Sqrt(AUnaryOp):
     def do_op(self, a):
         return torch.sqrt(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"torch.sqrt({a})"
+
 
 class Abs(AUnaryOp):
     @classmethod
@@ -105,6 +129,10 @@ class Abs(AUnaryOp):
     def do_op(self, a):
         return torch.abs(a)
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"torch.abs({a})"
+
 
 class Neg(AUnaryOp):
     @classmethod
@@ -123,6 +151,10 @@ class Neg(AUnaryOp):
     def do_op(self, a):
         return -a
 
+    @classmethod
+    def do_expression(cls, a: str) -> str:
+        return f"(-{a})"
+
 
 UNARY_OPERATORS: Dict[str, Type[OperatorFn]] = {
     "exp": Exp,
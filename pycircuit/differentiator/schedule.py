@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+from pycircuit.differentiator.operator import BatchedOperatorFn, DagStep, OperatorFn
+from pycircuit.differentiator.tensor import CircuitTensor
+
+
+def _input_indices(operator: OperatorFn) -> List[int]:
+    return list(operator.single_mapping.values()) + [
+        idx
+        for batches in operator.array_mapping.values()
+        for batch in batches
+        for idx in batch.values()
+    ]
+
+
+def precompute_parameter_free(
+    storage: List[CircuitTensor], ordered: List[OperatorFn]
+) -> List[OperatorFn]:
+    """Runs every operator which doesn't depend on a parameter once, in place.
+
+    Their results stay in the storage as constants, without autograd history,
+    and the operators which still have to run each forward pass are returned"""
+
+    filled = {operator.fill_idx for operator in ordered}
+    dependent = {
+        idx
+        for (idx, tensor) in enumerate(storage)
+        if idx not in filled and tensor.requires_grad
+    }
+
+    remaining: List[OperatorFn] = []
+    with torch.no_grad():
+        for operator in ordered:
+            if any(idx in dependent for idx in _input_indices(operator)):
+                dependent.add(operator.fill_idx)
+                remaining.append(operator)
+            else:
+                operator.forward(storage)
+
+    return remaining
+
+
+def batch_by_level(
+    storage: List[CircuitTensor], ordered: List[OperatorFn]
+) -> List[DagStep]:
+    """Groups operators at the same depth of the dag with the same kind and shape.
+
+    Operators at the same depth never read each other, so each group of
+    elementwise operators runs as a single BatchedOperatorFn. Operators which
+    can't be stacked run alone. The result runs level by level, which keeps the
+    root last since it's the only operator at the deepest level"""
+
+    filled = {operator.fill_idx for operator in ordered}
+    depths: Dict[int, int] = {}
+    shapes: Dict[int, Optional[torch.Size]] = {
+        idx: tensor.shape for (idx, tensor) in enumerate(storage) if idx not in filled
+    }
+
+    levels: Dict[int, Dict[Tuple, List[OperatorFn]]] = {}
+
+    for operator in ordered:
+        inputs = _input_indices(operator)
+        depth = 1 + max((depths.get(idx, 0) for idx in inputs), default=0)
+        depths[operator.fill_idx] = depth
+
+        input_shapes = [shapes[idx] for idx in inputs]
+        if operator.elementwise() and None not in input_shapes:
+            shape = torch.broadcast_shapes(*input_shapes)
+            key: Tuple = (operator.name(), tuple(shape))
+        else:
+            shape = None
+            key = (operator.fill_idx,)
+        shapes[operator.fill_idx] = shape
+
+        levels.setdefault(depth, {}).setdefault(key, []).append(operator)
+
+    scheduled: List[DagStep] = []
+    for depth in sorted(levels.keys()):
+        for (key, operators) in levels[depth].items():
+            if len(operators) == 1:
+                scheduled.append(operators[0])
+            else:
+                scheduled.append(BatchedOperatorFn(operators, shape=key[1]))
+
+    return scheduled
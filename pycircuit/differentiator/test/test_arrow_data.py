@@ -0,0 +1,88 @@
+import math
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pa = pytest.importorskip("pyarrow")
+
+from pycircuit.differentiator.test.test_streaming import (
+    MISSING_ROWS,
+    OUTPUTS,
+    ROWS,
+    START_TIME,
+    make_samples,
+)
+from pycircuit.differentiator.trainer.arrow_data import (
+    SampleTensors,
+    column_tensor,
+    drop_missing,
+    read_samples,
+)
+
+
+def test_drop_missing():
+    table = make_samples()
+    dropped = drop_missing(table)
+
+    assert dropped.num_rows == ROWS - len(MISSING_ROWS)
+    assert dropped.column("time").to_pylist() == [
+        START_TIME + idx * 1000 for idx in range(ROWS) if idx not in MISSING_ROWS
+    ]
+    for column in dropped.columns:
+        assert column.null_count == 0
+        assert not any(math.isnan(value) for value in column.to_pylist())
+
+    # Complete tables aren't filtered at all
+    assert drop_missing(dropped) is dropped
+
+
+def test_column_tensor_zero_copy():
+    values = pa.array([1.0, 2.0, 3.0], pa.float64())
+    address = values.buffers()[1].address
+
+    assert column_tensor(values).data_ptr() == address
+    assert column_tensor(pa.chunked_array([values])).data_ptr() == address
+
+    # Several chunks and other types have to be copied
+    chunked = pa.chunked_array([values, values])
+    combined = column_tensor(chunked)
+    assert combined.data_ptr() not in (address, chunked.chunk(1).buffers()[1].address)
+    assert combined.tolist() == [1.0, 2.0, 3.0] * 2
+
+    cast = column_tensor(pa.array([1, 2, 3], pa.int64()))
+    assert cast.dtype == torch.float64
+    assert cast.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_read_samples_maps_ipc(tmp_path):
+    table = drop_missing(make_samples()).combine_chunks()
+    path = str(tmp_path / "samples.arrow")
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    # Columns of an IPC file point into the mapping instead of being read
+    allocated = pa.total_allocated_bytes()
+    mapped = read_samples(path)
+    assert pa.total_allocated_bytes() == allocated
+
+    assert mapped.equals(table)
+
+
+def test_split_views():
+    samples = SampleTensors(
+        inputs={output: torch.arange(10, dtype=torch.float64) for output in OUTPUTS},
+        target_returns=torch.arange(10, dtype=torch.float64) * 2,
+    )
+    (train, test) = samples.split(0.8)
+
+    assert (len(train), len(test)) == (8, 2)
+    assert test.target_returns.tolist() == [16.0, 18.0]
+
+    # Both share storage with the samples rather than copying them
+    for (view, start) in [(train, 0), (test, 8)]:
+        for (output, data) in samples.inputs.items():
+            assert view.inputs[output].data_ptr() == data[start:].data_ptr()
+        assert (
+            view.target_returns.data_ptr() == samples.target_returns[start:].data_ptr()
+        )
@@ -0,0 +1,124 @@
+import json
+from typing import List
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.circuit_builder.component import ComponentOutput, ExternalOutput
+from pycircuit.differentiator.graph import (
+    EdgeNode,
+    Graph,
+    Model,
+    ParamNode,
+    node_inputs,
+)
+
+from .test_model import make_circuit, make_data, make_graph, make_model
+
+# Well past the default recursion limit of 1000, with a frame or more per node
+DEEP_CHAIN = 6000
+
+
+def recursive_order(graph: Graph) -> List[ComponentOutput]:
+    "The order the recursive traversal used to fill storage in"
+    order: List[ComponentOutput] = []
+
+    def visit(output: ComponentOutput):
+        if output in order:
+            return
+        for child in node_inputs(graph.nodes[output]):
+            visit(child)
+        order.append(output)
+
+    visit(graph.root)
+    return order
+
+
+def test_storage_matches_recursive_order():
+    graph = make_graph()
+    data = make_data()
+    model = make_model(graph)
+
+    order = graph.topological_order()
+    assert order == recursive_order(graph)
+    assert order[-1] == graph.root
+
+    dag = model.create_module(data, precompute=False)
+    assert len(dag.storage) == len(order)
+    for (output, stored) in zip(order, dag.storage):
+        match graph.nodes[output]:
+            case EdgeNode():
+                assert stored is data[output]
+            case ParamNode(name=name):
+                assert stored is model.parameters()[name]
+
+
+def test_deep_chain():
+    circuit = CircuitBuilder(definitions={})
+
+    with CircuitContextManager(circuit):
+        x = circuit.get_external("x", "double")
+        p = circuit.make_parameter("p")
+
+        chain = x
+        for _ in range(DEEP_CHAIN):
+            chain = chain + p
+
+    graph = Graph.discover_from_circuit(circuit, chain)
+    # The chain of adds, the external and the parameter
+    assert len(graph.nodes) == DEEP_CHAIN + 2
+
+    model = Model(graph, initial_values={"p": torch.tensor([0.25])})
+    data = {ExternalOutput("x"): torch.tensor([1.0, 2.0])}
+
+    out = model.create_module(data)()
+    assert torch.allclose(out, data[ExternalOutput("x")] + DEEP_CHAIN * 0.25)
+
+    loaded = Graph.from_dict(json.loads(json.dumps(graph.to_dict())))
+    assert loaded.topological_order() == graph.topological_order()
+
+
+def test_dict_round_trip():
+    graph = make_graph()
+
+    loaded = Graph.from_dict(json.loads(json.dumps(graph.to_dict())))
+
+    assert loaded.root == graph.root
+    assert loaded.nodes == graph.nodes
+    assert loaded.topological_order() == graph.topological_order()
+    assert loaded.find_edges() == graph.find_edges()
+    assert loaded.find_parameter_names() == graph.find_parameter_names()
+
+
+def test_minimal_graph():
+    (circuit, root) = make_circuit()
+    graph = Graph.discover_from_circuit(circuit, root)
+    minimal = Graph.discover_from_circuit(circuit, root, minimal=True)
+    data = make_data()
+
+    # Both exps and the selector only read externals and the constant,
+    # so are sampled instead
+    assert len(minimal.nodes) < len(graph.nodes)
+    assert minimal.find_parameter_names() == graph.find_parameter_names()
+    sampled = set(minimal.find_edges()) - set(graph.find_edges())
+    assert len(sampled) == 3
+    assert not any(isinstance(graph.nodes[output], EdgeNode) for output in sampled)
+
+    config = minimal.writer_config(
+        target_output=ExternalOutput("x"),
+        sample_on=ExternalOutput("y"),
+        ms_future=0,
+    )
+    assert config.outputs == minimal.find_edges()
+
+    # Feed the sampled outputs what the full graph computes for them
+    full = make_model(graph).create_module(data, precompute=False)
+    expected = full()
+    stored = dict(zip(graph.topological_order(), full.storage))
+    minimal_data = {edge: stored[edge].detach() for edge in minimal.find_edges()}
+
+    out = make_model(minimal).create_module(minimal_data)()
+    assert torch.equal(out.detach(), expected.detach())
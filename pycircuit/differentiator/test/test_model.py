@@ -0,0 +1,118 @@
+from typing import Dict, Tuple
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.circuit_builder.component import (
+    Component,
+    ComponentOutput,
+    ExternalOutput,
+)
+from pycircuit.circuit_builder.signals.select import select
+from pycircuit.circuit_builder.signals.unary_arithmetic import cexp
+from pycircuit.differentiator import operator
+from pycircuit.differentiator.graph import Graph, Model
+from pycircuit.oxidiser.bench.circuits import select_definition
+
+MODULE_OPTIONS = {
+    "plain": dict(precompute=False),
+    "precomputed": dict(),
+    "compiled": dict(compiled=True, precompute=False),
+    "scripted": dict(script=True, precompute=False),
+    "batched": dict(batched=True, precompute=False),
+    "batched_precomputed": dict(batched=True),
+    "compiled_precomputed": dict(compiled=True),
+}
+
+
+def make_circuit() -> Tuple[CircuitBuilder, Component]:
+    circuit = CircuitBuilder(definitions={"select": select_definition()})
+
+    with CircuitContextManager(circuit):
+        x = circuit.get_external("x", "double")
+        y = circuit.get_external("y", "double")
+        p = circuit.make_parameter("p")
+        q = circuit.make_parameter("q")
+        two = circuit.make_constant("double", "2.0")
+
+        # The muls by a parameter and the parameter free exps share a depth
+        a = x * p + cexp(y * two)
+        b = y * q + cexp(x * two)
+        root = select(a, b, x < y) * two
+
+    return (circuit, root)
+
+
+def make_graph() -> Graph:
+    (circuit, root) = make_circuit()
+    return Graph.discover_from_circuit(circuit, root)
+
+
+def make_data() -> Dict[ComponentOutput, torch.Tensor]:
+    generator = torch.Generator().manual_seed(0)
+    return {
+        ExternalOutput("x"): torch.rand(64, generator=generator),
+        ExternalOutput("y"): torch.rand(64, generator=generator),
+    }
+
+
+def make_model(graph: Graph) -> Model:
+    return Model(
+        graph, initial_values={"p": torch.tensor([0.5]), "q": torch.tensor([-1.5])}
+    )
+
+
+def evaluate(
+    graph: Graph, data: Dict[ComponentOutput, torch.Tensor], **options
+) -> Tuple[torch.Tensor, Dict[str, torch.Tensor]]:
+    model = make_model(graph)
+    module = model.create_module(data, **options)
+
+    out = module()
+    out.sum().backward()
+
+    return (
+        out.detach(),
+        {name: param.grad for (name, param) in model.parameters().items()},
+    )
+
+
+def test_modules_agree():
+    graph = make_graph()
+    data = make_data()
+
+    (expected_out, expected_grads) = evaluate(graph, data, **MODULE_OPTIONS["plain"])
+    assert expected_out.shape == (64,)
+    assert all(grad is not None for grad in expected_grads.values())
+
+    for (name, options) in MODULE_OPTIONS.items():
+        (out, grads) = evaluate(graph, data, **options)
+        assert torch.equal(out, expected_out), name
+        assert grads.keys() == expected_grads.keys(), name
+        for (param, grad) in grads.items():
+            assert torch.equal(grad, expected_grads[param]), (name, param)
+
+
+def test_module_can_be_recreated():
+    graph = make_graph()
+    data = make_data()
+    model = make_model(graph)
+
+    projected = model.create_module(data)()
+
+    # Like detect_nan, rebuild the precomputed module over a single row
+    operator.VERBOSE = True
+    try:
+        row = {name: values[3] for (name, values) in data.items()}
+        recreated = model.create_module(row)()
+    finally:
+        operator.VERBOSE = False
+
+    assert torch.allclose(recreated, projected[3])
+
+    # Precomputing over the row must not have frozen the parameters
+    recreated.sum().backward()
+    assert all(param.grad is not None for param in model.parameters_list())
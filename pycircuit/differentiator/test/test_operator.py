@@ -0,0 +1,60 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("pyarrow")
+
+from pycircuit.differentiator.operator import CompiledDagOperator
+from pycircuit.differentiator.test.test_model import make_data, make_graph, make_model
+from pycircuit.differentiator.trainer.train_graph_on import TrainerOptions, train
+
+
+def make_dag():
+    graph = make_graph()
+    model = make_model(graph)
+    dag = graph.traverse_model_into(
+        make_data(), model.parameters(), batched=False, precompute=False
+    )
+    return (model, dag)
+
+
+def test_compiled_source():
+    (_, dag) = make_dag()
+    compiled = CompiledDagOperator(dag)
+
+    # Only storage no operator writes is passed in, and the last is returned
+    args = ", ".join(f"t{idx}: torch.Tensor" for idx in compiled.leaf_indices)
+    assert compiled.source.startswith(f"def dag_forward({args}) -> torch.Tensor:")
+    assert compiled.source.endswith(f"    return t{len(dag.storage) - 1}\n")
+    assert len(compiled.leaves) < len(dag.storage)
+
+
+@pytest.mark.parametrize("script", [False, True])
+def test_compiled_follows_parameters(script: bool):
+    (model, dag) = make_dag()
+    compiled = CompiledDagOperator(dag, script=script)
+    assert isinstance(compiled.compiled, torch.jit.ScriptFunction) == script
+
+    before = compiled()
+    assert torch.equal(before, dag())
+
+    # Parameters are passed by reference, so in place updates are seen
+    with torch.no_grad():
+        for param in model.parameters_list():
+            param.add_(1.0)
+
+    after = compiled()
+    assert not torch.equal(after, before)
+    assert torch.equal(after, dag())
+
+
+def test_torch_compile_needs_torch_2(monkeypatch):
+    monkeypatch.delattr(torch, "compile", raising=False)
+    options = TrainerOptions(
+        graph_file_path="graph.json",
+        writer_config_path="writer_config.json",
+        parquet_path="samples.parquet",
+        torch_compile=True,
+    )
+
+    with pytest.raises(ValueError, match="torch 2.0"):
+        train(options, make_graph(), samples=None, verbose=False)
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pa = pytest.importorskip("pyarrow")
+
+from pycircuit.differentiator.test.test_streaming import (
+    MISSING_ROWS,
+    ROWS,
+    START_TIME,
+    make_writer_config,
+    write_samples,
+)
+from pycircuit.differentiator.trainer.arrow_data import read_samples
+from pycircuit.differentiator.trainer.sample_cache import (
+    cache_key,
+    cached_samples,
+    clean_samples,
+)
+
+
+def test_clean_samples_keeps_times(tmp_path):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    cleaned = clean_samples(read_samples(path), make_writer_config(), 3)
+
+    assert cleaned.schema.field("time").type == pa.int64()
+    times = [START_TIME + idx * 1000 for idx in range(ROWS) if idx not in MISSING_ROWS]
+    assert cleaned.column("time").to_pylist() == times[3:]
+    for name in ["a::out", "b::out", "target", "target_future", "target_returns"]:
+        assert cleaned.schema.field(name).type == pa.float64()
+
+
+def test_cached_samples(tmp_path):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    cache_dir = str(tmp_path / "cache")
+    writer_config = make_writer_config()
+
+    cached = cached_samples(path, writer_config, cache_dir, 3)
+    expected = clean_samples(read_samples(path), writer_config, 3)
+    assert cached.equals(expected.combine_chunks())
+    assert all(column.num_chunks == 1 for column in cached.columns)
+
+    # Reading again maps the same entry
+    (entry,) = os.listdir(cache_dir)
+    written_at = os.stat(os.path.join(cache_dir, entry)).st_mtime_ns
+    assert cached_samples(path, writer_config, cache_dir, 3).equals(cached)
+    assert os.listdir(cache_dir) == [entry]
+    assert os.stat(os.path.join(cache_dir, entry)).st_mtime_ns == written_at
+
+
+def test_cache_invalidated_by_mtime(tmp_path):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    cache_dir = str(tmp_path / "cache")
+    writer_config = make_writer_config()
+
+    key = cache_key(path, writer_config, 3)
+    cached_samples(path, writer_config, cache_dir, 3)
+
+    # Rewritten data of the same size only differs in modification time
+    write_samples(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache_key(path, writer_config, 3) != key
+    cached_samples(path, writer_config, cache_dir, 3)
+    assert len(os.listdir(cache_dir)) == 2
+
+    # As do other skips
+    assert cache_key(path, writer_config, 4) != cache_key(path, writer_config, 3)
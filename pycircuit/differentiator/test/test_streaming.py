@@ -0,0 +1,180 @@
+import itertools
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from pycircuit.circuit_builder.component import GraphOutput
+from pycircuit.differentiator.trainer.arrow_data import SampleTensors, read_samples
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
+from pycircuit.differentiator.trainer.sample_cache import clean_samples
+from pycircuit.differentiator.trainer.streaming import ParquetBatches, prefetched
+
+OUTPUTS = [
+    GraphOutput(parent="a", output_name="out"),
+    GraphOutput(parent="b", output_name="out"),
+]
+
+ROWS = 40
+ROW_GROUP_SIZE = 10
+
+# Rows with a missing value, several in the first row group
+MISSING_ROWS = {1, 3, 4, 8, 12, 25}
+
+# Far enough from the epoch that float64 can't hold every nanosecond
+START_TIME = 1_700_000_000_000_000_001
+
+
+def make_writer_config() -> WriterConfig:
+    return WriterConfig(
+        outputs=OUTPUTS,
+        target_output=OUTPUTS[0],
+        sample_on=OUTPUTS[1],
+        ms_future=100,
+    )
+
+
+def make_samples(rows: int = ROWS) -> pa.Table:
+    "Samples as the writer records them, with nan, null and nanosecond times"
+    generator = np.random.default_rng(0)
+    a = generator.normal(size=rows)
+    b = [None if idx == 12 else float(value) for (idx, value) in enumerate(a * 2)]
+    for idx in MISSING_ROWS - {12}:
+        a[idx] = np.nan
+    target = 100.0 + generator.normal(size=rows)
+
+    return pa.table(
+        {
+            "a::out": a,
+            "b::out": pa.array(b, pa.float64()),
+            "target": target,
+            "target_future": target + generator.normal(size=rows) * 0.1,
+            "time": pa.array(
+                [START_TIME + idx * 1000 for idx in range(rows)], pa.int64()
+            ),
+        }
+    )
+
+
+def write_samples(path: str, rows: int = ROWS) -> str:
+    pq.write_table(make_samples(rows), path, row_group_size=ROW_GROUP_SIZE)
+    assert pq.ParquetFile(path).num_row_groups == rows // ROW_GROUP_SIZE
+    return path
+
+
+def expected_samples(path: str, skip_rows: int) -> SampleTensors:
+    table = clean_samples(read_samples(path), make_writer_config(), skip_rows)
+    return SampleTensors.from_table(table, OUTPUTS)
+
+
+def streamed_samples(
+    data: ParquetBatches, shuffle: bool = False, mean: float = 0.0, std: float = 1.0
+) -> SampleTensors:
+    batches = list(data.batches(np.random.default_rng(0), shuffle, 1.0, mean, std))
+    assert all(len(batch.target) <= 7 for batch in batches)
+    return SampleTensors(
+        inputs={
+            output: torch.cat([batch.inputs[output] for batch in batches])
+            for output in OUTPUTS
+        },
+        target_returns=torch.cat([batch.target for batch in batches]),
+    )
+
+
+# Within the first row group, past it, and past every missing row
+@pytest.mark.parametrize("skip_rows", [0, 3, 12, 30])
+def test_batches_match_clean_samples(tmp_path, skip_rows: int):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    data = ParquetBatches(path, make_writer_config(), batch_size=7, skip_rows=skip_rows)
+
+    expected = expected_samples(path, skip_rows)
+    streamed = streamed_samples(data)
+
+    assert len(streamed) == len(expected)
+    assert torch.equal(streamed.target_returns, expected.target_returns)
+    for output in OUTPUTS:
+        assert torch.equal(streamed.inputs[output], expected.inputs[output])
+
+
+def test_target_moments(tmp_path):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    data = ParquetBatches(path, make_writer_config(), batch_size=7, skip_rows=12)
+
+    returns = expected_samples(path, 12).target_returns
+    (mean, std) = data.target_moments()
+
+    assert mean == pytest.approx(float(returns.mean()))
+    assert std == pytest.approx(float(returns.std()))
+
+    normalized = streamed_samples(data, mean=mean, std=std).target_returns
+    assert torch.allclose(normalized, (returns - mean) / std)
+
+
+def test_shuffled_batches(tmp_path):
+    path = write_samples(str(tmp_path / "samples.parquet"))
+    data = ParquetBatches(path, make_writer_config(), batch_size=7, skip_rows=3)
+
+    expected = expected_samples(path, 3)
+    shuffled = streamed_samples(data, shuffle=True)
+
+    assert not torch.equal(shuffled.target_returns, expected.target_returns)
+
+    # Rows are shuffled whole, so every input stays with its target
+    def rows(samples: SampleTensors):
+        return sorted(
+            zip(
+                samples.target_returns.tolist(),
+                *(samples.inputs[output].tolist() for output in OUTPUTS),
+            )
+        )
+
+    assert rows(shuffled) == rows(expected)
+
+
+def test_prefetched_order():
+    for depth in [0, 1, 3]:
+        assert list(prefetched(iter(range(10)), depth)) == list(range(10))
+
+
+def test_prefetched_raises_producer_errors():
+    def items() -> Iterator[int]:
+        yield 0
+        yield 1
+        raise KeyError("bad row group")
+
+    consumed = []
+    with pytest.raises(KeyError, match="bad row group"):
+        for item in prefetched(items(), 1):
+            consumed.append(item)
+
+    # Everything produced before the error is still consumed
+    assert consumed == [0, 1]
+
+
+def test_prefetched_stops_after_early_exit():
+    produced = []
+
+    def items() -> Iterator[int]:
+        for idx in itertools.count():
+            produced.append(idx)
+            yield idx
+
+    threads = threading.active_count()
+
+    batches = prefetched(items(), 2)
+    assert next(batches) == 0
+    batches.close()
+
+    deadline = time.time() + 5
+    while threading.active_count() > threads and time.time() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() == threads
+
+    # At most the consumed item, a full queue and one waiting to be queued
+    assert len(produced) <= 4
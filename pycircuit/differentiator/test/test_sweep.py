@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pyarrow")
+
+from pycircuit.differentiator.trainer.sweep import SweepSpec, make_runs, results_table
+
+BASE = {
+    "graph_file_path": "graph.json",
+    "writer_config_path": "writer_config.json",
+    "parquet_path": "samples.parquet",
+}
+
+
+def test_make_runs():
+    spec = SweepSpec(
+        base=BASE,
+        grid={"lr": [0.1, 0.01]},
+        log_ranges={"epochs_per_run": (10, 1000)},
+        initial_ranges={"p": (-1, 1)},
+        samples=3,
+    ).validate()
+
+    runs = make_runs(spec)
+    assert [run.run for run in runs] == list(range(6))
+    assert all(run.options["parquet_path"] == "samples.parquet" for run in runs)
+    assert all(isinstance(run.options["epochs_per_run"], int) for run in runs)
+    assert all(-1 <= run.initial_values["p"] <= 1 for run in runs)
+
+
+def test_rejects_varied_inputs():
+    for option in ["graph_file_path", "writer_config_path", "parquet_path"]:
+        with pytest.raises(ValueError):
+            SweepSpec(base=BASE, grid={option: ["a", "b"]}).validate()
+
+    with pytest.raises(ValueError):
+        SweepSpec(base=BASE, ranges={"cache_dir": (0, 1)}).validate()
+
+    # Only base can set the cache
+    SweepSpec(base={**BASE, "cache_dir": "cache"}).validate()
+
+
+def test_rejects_unknown_options():
+    with pytest.raises(ValueError):
+        SweepSpec(base=BASE, grid={"learning_rate": [0.1]}).validate()
+
+
+def test_results_table_keeps_every_column():
+    # The first run failed, so it has none of the metrics of the second
+    rows = [
+        {"run": 0, "option.lr": 0.1, "error": "ValueError()"},
+        {"run": 1, "option.lr": 0.01, "test_mse": 0.5, "param.p": 2.0},
+    ]
+    table = results_table(rows)
+
+    assert table.column_names == ["run", "option.lr", "error", "test_mse", "param.p"]
+    assert table.column("error").to_pylist() == ["ValueError()", None]
+    assert table.column("test_mse").to_pylist() == [None, 0.5]
+    assert table.column("param.p").to_pylist() == [None, 2.0]
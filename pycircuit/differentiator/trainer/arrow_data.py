@@ -0,0 +1,150 @@
+"""
+Builds training tensors directly from Arrow data written by the sample writer.
+
+Files are memory-mapped and tensors share the Arrow buffers where possible,
+so that setting up training doesn't hold several copies of the dataset.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import warnings
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import torch
+
+from pycircuit.circuit_builder.component import ComponentOutput
+from pycircuit.differentiator.graph import output_to_name
+from pycircuit.differentiator.tensor import CircuitTensor
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
+
+TARGET_COLUMN = "target"
+TARGET_FUTURE_COLUMN = "target_future"
+TIME_COLUMN = "time"
+
+# Precomputed by the sample cache, otherwise derived from the targets
+TARGET_RETURNS_COLUMN = "target_returns"
+
+# Arrow IPC files start with this, parquet files with PAR1
+_ARROW_MAGIC = b"ARROW1"
+
+# Pandas stores a non-default index as extra columns
+_PANDAS_INDEX_PREFIX = "__index_level_"
+
+ArrowTable = pa.Table | pa.RecordBatch
+
+
+def sampled_columns(writer_config: WriterConfig) -> List[str]:
+    "The columns the writer records for a config, in order"
+    return [output_to_name(output) for output in writer_config.outputs] + [
+        TARGET_COLUMN,
+        TARGET_FUTURE_COLUMN,
+        TIME_COLUMN,
+    ]
+
+
+def column_tensor(column: pa.Array | pa.ChunkedArray) -> CircuitTensor:
+    """A float64 tensor of a column, sharing the Arrow buffer where possible.
+
+    Columns are only copied when they have several chunks, nulls or another type.
+    The tensor may point at read-only memory and must not be written in place"""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+    if column.type != pa.float64():
+        column = column.cast(pa.float64())
+
+    as_numpy = column.to_numpy(zero_copy_only=False)
+
+    with warnings.catch_warnings():
+        # Arrow buffers are immutable, which torch warns about
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.from_numpy(as_numpy)
+
+
+def drop_missing(table: ArrowTable) -> ArrowTable:
+    "Drops rows with a null or nan in any column, like DataFrame.dropna"
+    keep = None
+    for column in table.columns:
+        valid = pc.is_valid(column)
+        if pa.types.is_floating(column.type):
+            valid = pc.and_(valid, pc.fill_null(pc.invert(pc.is_nan(column)), False))
+        keep = valid if keep is None else pc.and_(keep, valid)
+
+    if keep is None or pc.all(keep).as_py() is not False:
+        return table
+    return table.filter(keep)
+
+
+def target_returns(table: ArrowTable) -> CircuitTensor:
+    if TARGET_RETURNS_COLUMN in table.schema.names:
+        return column_tensor(table.column(TARGET_RETURNS_COLUMN))
+    target = column_tensor(table.column(TARGET_COLUMN))
+    target_future = column_tensor(table.column(TARGET_FUTURE_COLUMN))
+    return (target_future - target) / target
+
+
+def output_tensors(table: ArrowTable, outputs: List[ComponentOutput]):
+    return {
+        output: column_tensor(table.column(output_to_name(output)))
+        for output in outputs
+    }
+
+
+def read_samples(path: str) -> pa.Table:
+    """Memory-maps an Arrow IPC file, or a parquet file, of samples.
+
+    Columns of an IPC file point straight into the mapping. Parquet has to be
+    decoded, and each of its columns has a chunk per row group"""
+    with open(path, "rb") as sample_file:
+        is_ipc = sample_file.read(len(_ARROW_MAGIC)) == _ARROW_MAGIC
+
+    if is_ipc:
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return pq.read_table(path, memory_map=True)
+
+
+def check_sampled_columns(names: List[str], writer_config: WriterConfig) -> List[str]:
+    "Checks that data has exactly the columns a writer config records, and returns them"
+    names = [name for name in names if not name.startswith(_PANDAS_INDEX_PREFIX)]
+    columns = sampled_columns(writer_config)
+    if names != columns:
+        raise ValueError(
+            f"""Input data and writer config recorded different edges.
+Input data: {names}
+Writer: {columns}
+        """
+        )
+    return columns
+
+
+def select_sampled(table: pa.Table, writer_config: WriterConfig) -> pa.Table:
+    return table.select(check_sampled_columns(table.column_names, writer_config))
+
+
+@dataclass
+class SampleTensors:
+    inputs: Dict[ComponentOutput, CircuitTensor]
+    target_returns: CircuitTensor
+
+    @staticmethod
+    def from_table(table: ArrowTable, outputs: List[ComponentOutput]):
+        return SampleTensors(
+            inputs=output_tensors(table, outputs), target_returns=target_returns(table)
+        )
+
+    def __len__(self) -> int:
+        return len(self.target_returns)
+
+    def rows(self, start: int, end: int) -> "SampleTensors":
+        "A view of the rows in [start, end), sharing storage with these tensors"
+        return SampleTensors(
+            inputs={output: data[start:end] for (output, data) in self.inputs.items()},
+            target_returns=self.target_returns[start:end],
+        )
+
+    def split(self, train_frac: float) -> Tuple["SampleTensors", "SampleTensors"]:
+        "Views of the leading train_frac of rows, and of the rest"
+        split_at = int(len(self) * train_frac)
+        return (self.rows(0, split_at), self.rows(split_at, len(self)))
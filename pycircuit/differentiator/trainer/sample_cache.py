@@ -0,0 +1,89 @@
+"""
+Caches cleaned training samples as Arrow IPC files, so that repeated runs
+on the same data memory-map them instead of decoding parquet again.
+
+Entries are keyed by the path, modification time and size of the source,
+the writer config and the cleaning, so a stale entry is never read.
+"""
+
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from pycircuit.differentiator.trainer.arrow_data import (
+    TARGET_COLUMN,
+    TARGET_FUTURE_COLUMN,
+    TARGET_RETURNS_COLUMN,
+    TIME_COLUMN,
+    drop_missing,
+    read_samples,
+    select_sampled,
+)
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
+
+# Bump when the cached columns change
+CACHE_VERSION = 2
+
+
+def cache_key(samples_path: str, writer_config: WriterConfig, skip_rows: int) -> str:
+    stat = os.stat(samples_path)
+    key = {
+        "version": CACHE_VERSION,
+        "path": os.path.abspath(samples_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "writer_config": writer_config.to_dict(),
+        "skip_rows": skip_rows,
+    }
+    encoded = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+def clean_samples(
+    table: pa.Table, writer_config: WriterConfig, skip_rows: int
+) -> pa.Table:
+    """The sampled columns without missing rows or the first skip_rows, along with
+    the target returns. Outputs and targets are cast to float64, while times keep
+    their type since float64 can't hold every nanosecond of a timestamp"""
+    table = drop_missing(select_sampled(table, writer_config)).slice(skip_rows)
+    table = table.cast(
+        pa.schema(
+            [
+                field if field.name == TIME_COLUMN else field.with_type(pa.float64())
+                for field in table.schema
+            ]
+        )
+    )
+    returns = pc.divide(
+        pc.subtract(table.column(TARGET_FUTURE_COLUMN), table.column(TARGET_COLUMN)),
+        table.column(TARGET_COLUMN),
+    )
+    return table.append_column(TARGET_RETURNS_COLUMN, returns)
+
+
+def cached_samples(
+    samples_path: str, writer_config: WriterConfig, cache_dir: str, skip_rows: int
+) -> pa.Table:
+    """Memory-maps the cleaned samples of samples_path, creating them if needed.
+
+    Each column is written as a single chunk, so tensors can share the mapping"""
+    cache_path = os.path.join(
+        cache_dir, f"{cache_key(samples_path, writer_config, skip_rows)}.arrow"
+    )
+
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        table = clean_samples(read_samples(samples_path), writer_config, skip_rows)
+        table = table.combine_chunks()
+
+        # Written aside and renamed, so concurrent runs never see a partial file
+        partial_path = f"{cache_path}.{os.getpid()}.partial"
+        with pa.OSFile(partial_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(partial_path, cache_path)
+
+    return read_samples(cache_path)
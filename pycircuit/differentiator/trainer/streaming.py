@@ -0,0 +1,277 @@
+"""
+Trains a graph on mini-batches streamed from parquet, one row group at a time.
+
+Unlike train_graph_on, the dataset never has to fit in memory. Batches are
+built directly from the Arrow buffers of each row group, optionally shuffled,
+and prepared on a background thread while the previous batch trains.
+"""
+
+from argparse_dataclass import ArgumentParser
+from dataclasses import dataclass
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pyarrow.parquet as pq
+import torch
+from torch.optim import Adam
+
+from pycircuit.circuit_builder.component import ComponentOutput
+from pycircuit.differentiator.graph import Graph, Model
+from pycircuit.differentiator.tensor import CircuitTensor
+from pycircuit.differentiator.trainer.arrow_data import (
+    check_sampled_columns,
+    drop_missing,
+    output_tensors,
+    target_returns,
+)
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
+
+T = TypeVar("T")
+
+# How often a producer blocked on a full queue checks if the consumer stopped
+_PUT_POLL_SECONDS = 0.1
+
+
+@dataclass
+class StreamingOptions:
+    graph_file_path: str
+    writer_config_path: str
+    parquet_path: str
+    batch_size: int = 65536
+    epochs: int = 10
+    lr: float = 0.01
+    scale_by: float = 1
+    shuffle: bool = True
+    prefetch: int = 2
+    seed: int = 0
+    skip_rows: int = 1000
+    normalize_target: bool = True
+    print_params: bool = False
+
+
+@dataclass
+class Batch:
+    inputs: Dict[ComponentOutput, CircuitTensor]
+    target: CircuitTensor
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetched(items: Iterator[T], depth: int) -> Iterator[T]:
+    """Produces items on a background thread, at most depth ahead of the consumer.
+
+    Errors raised while producing are raised again from the consumer. When the
+    consumer stops early, the producer stops too instead of waiting forever"""
+    if depth <= 0:
+        yield from items
+        return
+
+    ready: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                ready.put(item, timeout=_PUT_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+            return
+        put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+
+
+class ParquetBatches:
+    """Streams the batches of a parquet file written for a writer config"""
+
+    def __init__(
+        self,
+        parquet_path: str,
+        writer_config: WriterConfig,
+        batch_size: int,
+        skip_rows: int = 0,
+    ):
+        self._file = pq.ParquetFile(parquet_path, memory_map=True)
+        self._outputs = writer_config.outputs
+        self._columns = check_sampled_columns(
+            self._file.schema_arrow.names, writer_config
+        )
+        self._batch_size = batch_size
+        self._skip_rows = skip_rows
+        self._row_group_skips: Optional[List[int]] = None
+
+    def _clean_row_group(self, idx: int):
+        table = self._file.read_row_group(idx, columns=self._columns)
+        return drop_missing(table)
+
+    def _skips(self) -> List[int]:
+        """Rows to drop from the start of each cleaned row group.
+
+        Like clean_samples, missing rows are dropped before the first skip_rows,
+        so only the row groups holding those have to be read"""
+        if self._row_group_skips is None:
+            skips: List[int] = []
+            start = 0
+            for idx in range(self._file.num_row_groups):
+                skip = max(0, self._skip_rows - start)
+                skips.append(skip)
+                if skip > 0:
+                    start += self._clean_row_group(idx).num_rows
+            self._row_group_skips = skips
+        return self._row_group_skips
+
+    def _read_row_group(self, idx: int):
+        return self._clean_row_group(idx).slice(self._skips()[idx])
+
+    def target_moments(self) -> Tuple[float, float]:
+        """Mean and standard deviation of the target returns of the trained rows.
+
+        Moments of each row group are merged pairwise, which unlike summing
+        squares doesn't cancel away the precision of small returns"""
+        count = 0
+        mean = 0.0
+        squared_deviations = 0.0
+        for idx in range(self._file.num_row_groups):
+            returns = target_returns(self._read_row_group(idx))
+            group_count = len(returns)
+            if group_count == 0:
+                continue
+            group_mean = float(returns.mean())
+            group_squared_deviations = float(((returns - group_mean) ** 2).sum())
+
+            delta = group_mean - mean
+            total = count + group_count
+            mean += delta * group_count / total
+            squared_deviations += (
+                group_squared_deviations + delta**2 * count * group_count / total
+            )
+            count = total
+
+        if count < 2:
+            raise ValueError(f"Need at least two samples, found {count}")
+
+        return (mean, math.sqrt(squared_deviations / (count - 1)))
+
+    def batches(
+        self,
+        rng: np.random.Generator,
+        shuffle: bool,
+        scale_by: float,
+        mean: float,
+        std: float,
+    ) -> Iterator[Batch]:
+        "Batches of the file, with targets scaled and normalized like train_graph_on"
+        row_groups = list(range(self._file.num_row_groups))
+        if shuffle:
+            rng.shuffle(row_groups)
+
+        for idx in row_groups:
+            table = self._read_row_group(idx)
+            if shuffle:
+                table = table.take(rng.permutation(table.num_rows))
+
+            for record_batch in table.to_batches(max_chunksize=self._batch_size):
+                yield Batch(
+                    inputs=output_tensors(record_batch, self._outputs),
+                    target=(target_returns(record_batch) * scale_by - mean) / std,
+                )
+
+
+def train_streaming(args: StreamingOptions, graph: Graph, writer_config: WriterConfig):
+    if graph.find_edges() != writer_config.outputs:
+        raise ValueError(
+            f"""Graph and writer config recorded different edges.
+Graph: {graph.find_edges()}
+Writer: {writer_config.outputs}
+        """
+        )
+
+    data = ParquetBatches(
+        args.parquet_path, writer_config, args.batch_size, skip_rows=args.skip_rows
+    )
+
+    if args.normalize_target:
+        (mean, std) = data.target_moments()
+        print(f"Normalizing target with mean {mean} and std {std}")
+    else:
+        (mean, std) = (0.0, 1.0)
+
+    model = Model(graph)
+    optim = Adam(model.parameters_list(), lr=args.lr)
+    mse_loss = torch.nn.MSELoss()
+    rng = np.random.default_rng(args.seed)
+
+    for epoch in range(args.epochs):
+        start = time.time()
+        total_loss = 0.0
+        samples = 0
+
+        for batch in prefetched(
+            data.batches(rng, args.shuffle, args.scale_by, mean, std), args.prefetch
+        ):
+            module = model.create_module(batch.inputs)
+            projected = module() * args.scale_by
+
+            computed_loss = mse_loss(projected, batch.target)
+
+            optim.zero_grad()
+            computed_loss.backward()
+            optim.step()
+
+            total_loss += float(computed_loss) * len(batch.target)
+            samples += len(batch.target)
+
+        print(
+            f"Epoch {epoch} took {time.time() - start} seconds, "
+            f"MSE loss {total_loss / max(samples, 1)} over {samples} samples"
+        )
+
+        if args.print_params:
+            for (p_name, param) in model.parameters().items():
+                print(f"{p_name}: {float(param)}")
+
+    return model
+
+
+def main():
+    args: StreamingOptions = ArgumentParser(StreamingOptions).parse_args(sys.argv[1:])
+
+    graph = Graph.from_dict(json.load(open(args.graph_file_path)))
+    writer_config = WriterConfig.from_dict(json.load(open(args.writer_config_path)))
+
+    train_streaming(args, graph, writer_config)
+
+
+if __name__ == "__main__":
+    main()
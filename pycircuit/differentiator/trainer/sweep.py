@@ -0,0 +1,263 @@
+"""
+Runs many trainings of one graph over a grid or random search of TrainerOptions
+and initial parameter values, in a pool of processes.
+
+Every worker memory-maps the same cached samples, so the dataset is decoded
+once and shared through the page cache. Metrics and final parameters of each
+run are written to a parquet results table.
+
+The sweep is described by a json file like:
+
+{
+    "base": {"graph_file_path": ..., "writer_config_path": ..., "parquet_path": ...},
+    "grid": {"lr": [0.1, 0.01], "epochs_per_run": [500, 1000]},
+    "log_ranges": {"lr": [0.0001, 0.1]},
+    "initial_ranges": {"my_parameter": [-1, 1]},
+    "samples": 4
+}
+"""
+
+from argparse_dataclass import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import torch
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.differentiator.graph import Graph
+from pycircuit.differentiator.trainer.arrow_data import SampleTensors
+from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
+from pycircuit.differentiator.trainer.sample_cache import cached_samples
+from pycircuit.differentiator.trainer.train_graph_on import (
+    SKIP_ROWS,
+    TrainerOptions,
+    check_edges,
+    train,
+)
+
+# Every worker loads the graph and samples once from the base options,
+# so these can't vary between runs
+BASE_ONLY_OPTIONS = {
+    "graph_file_path",
+    "writer_config_path",
+    "parquet_path",
+    "cache_dir",
+}
+
+
+@dataclass
+class SweepArgs:
+    sweep_path: str
+    results_path: str = "sweep_results.parquet"
+    # Where the shared samples are cached, unless the base options set cache_dir
+    cache_dir: str = ".sample_cache"
+    workers: int = os.cpu_count() or 1
+    threads_per_worker: int = 1
+
+
+@dataclass
+class SweepSpec(DataClassJsonMixin):
+    """A search over trainer options and initial parameter values
+
+    Attributes:
+
+        base: Options shared by every run, including the input paths and cache_dir,
+              which only base can set
+
+        grid: Every combination of these options is trained
+
+        ranges: Options drawn uniformly from [low, high] for each sample
+
+        log_ranges: Options drawn log-uniformly from [low, high] for each sample
+
+        initial_ranges: Initial parameter values drawn uniformly from [low, high].
+                        Other parameters start from the default random values
+
+        samples: Random draws trained for each point of the grid
+    """
+
+    base: Dict[str, Any]
+    grid: Dict[str, List[Any]] = field(default_factory=dict)
+    ranges: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    log_ranges: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    initial_ranges: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    samples: int = 1
+    seed: int = 0
+
+    def validate(self) -> "SweepSpec":
+        known = {option.name for option in fields(TrainerOptions)}
+        for options in [self.base, self.grid, self.ranges, self.log_ranges]:
+            unknown = set(options.keys()) - known
+            if unknown:
+                raise ValueError(f"Sweep sets unknown trainer options {unknown}")
+        for options in [self.grid, self.ranges, self.log_ranges]:
+            varied = set(options.keys()) & BASE_ONLY_OPTIONS
+            if varied:
+                raise ValueError(f"Sweep varies options {varied} only base can set")
+        if self.samples < 1:
+            raise ValueError(f"Sweep needs at least one sample, got {self.samples}")
+        return self
+
+
+@dataclass
+class SweepRun(DataClassJsonMixin):
+    run: int
+    options: Dict[str, Any]
+    initial_values: Dict[str, float]
+
+
+def _drawn_option(name: str, value: float) -> Any:
+    "Rounds draws of integer options, like epochs_per_run"
+    option_types = {option.name: option.type for option in fields(TrainerOptions)}
+    if option_types[name] in (int, "int"):
+        return round(value)
+    return value
+
+
+def make_runs(spec: SweepSpec) -> List[SweepRun]:
+    rng = random.Random(spec.seed)
+    names = list(spec.grid.keys())
+
+    runs = []
+    for point in itertools.product(*(spec.grid[name] for name in names)):
+        for _ in range(spec.samples):
+            options = {**spec.base, **dict(zip(names, point))}
+            for (name, (low, high)) in spec.ranges.items():
+                options[name] = _drawn_option(name, rng.uniform(low, high))
+            for (name, (low, high)) in spec.log_ranges.items():
+                drawn = math.exp(rng.uniform(math.log(low), math.log(high)))
+                options[name] = _drawn_option(name, drawn)
+
+            initial_values = {
+                name: rng.uniform(low, high)
+                for (name, (low, high)) in spec.initial_ranges.items()
+            }
+
+            runs.append(
+                SweepRun(run=len(runs), options=options, initial_values=initial_values)
+            )
+
+    return runs
+
+
+# Loaded once by each worker process
+_GRAPH: Optional[Graph] = None
+_SAMPLES: Optional[SampleTensors] = None
+
+
+def _load_worker(base: TrainerOptions, cache_dir: str, threads: int):
+    global _GRAPH, _SAMPLES
+
+    torch.set_num_threads(threads)
+
+    _GRAPH = Graph.from_dict(json.load(open(base.graph_file_path)))
+    writer_config = WriterConfig.from_dict(json.load(open(base.writer_config_path)))
+    table = cached_samples(base.parquet_path, writer_config, cache_dir, SKIP_ROWS)
+    _SAMPLES = SampleTensors.from_table(table, writer_config.outputs)
+
+
+def _run(run: SweepRun) -> Dict[str, Any]:
+    assert _GRAPH is not None and _SAMPLES is not None
+
+    row: Dict[str, Any] = {"run": run.run}
+    row.update({f"option.{name}": value for (name, value) in run.options.items()})
+    row.update(
+        {f"initial.{name}": value for (name, value) in run.initial_values.items()}
+    )
+
+    try:
+        result = train(
+            TrainerOptions(**run.options),
+            _GRAPH,
+            _SAMPLES,
+            initial_values={
+                name: torch.tensor([value])
+                for (name, value) in run.initial_values.items()
+            },
+            verbose=False,
+        )
+    except Exception as e:
+        row["error"] = repr(e)
+        return row
+
+    row.update(
+        {
+            "train_mse": result.train_mse,
+            "test_mse": result.test_mse,
+            "train_r2": result.train_r2,
+            "test_r2": result.test_r2,
+            "seconds": result.seconds,
+        }
+    )
+    row.update({f"param.{name}": value for (name, value) in result.parameters.items()})
+    return row
+
+
+def results_table(rows: List[Dict[str, Any]]) -> pa.Table:
+    """One row per run. Failed runs have no metrics or parameters, so columns
+    are the union of every row's keys and are null where a row lacks them"""
+    columns = list(dict.fromkeys(key for row in rows for key in row.keys()))
+    return pa.Table.from_pydict(
+        {column: [row.get(column) for row in rows] for column in columns}
+    )
+
+
+def run_sweep(args: SweepArgs, spec: SweepSpec) -> pa.Table:
+    base = TrainerOptions(**spec.base)
+    graph = Graph.from_dict(json.load(open(base.graph_file_path)))
+    writer_config = WriterConfig.from_dict(json.load(open(base.writer_config_path)))
+    check_edges(graph, writer_config)
+
+    unknown = set(spec.initial_ranges.keys()) - set(graph.find_parameter_names())
+    if unknown:
+        raise ValueError(f"Sweep sets initial values of unknown parameters {unknown}")
+
+    # Create the cache up front, so workers only ever map it
+    cache_dir = base.cache_dir if base.cache_dir is not None else args.cache_dir
+    cached_samples(base.parquet_path, writer_config, cache_dir, SKIP_ROWS)
+
+    runs = make_runs(spec)
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        # Forking after arrow and torch have started their thread pools can deadlock
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_load_worker,
+        initargs=(base, cache_dir, args.threads_per_worker),
+    ) as pool:
+        futures = [pool.submit(_run, run) for run in runs]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print(
+                f"Finished run {row['run']} ({len(rows)}/{len(runs)}): "
+                f"{row.get('error', row.get('test_mse'))}"
+            )
+
+    rows.sort(key=lambda row: row["run"])
+    return results_table(rows)
+
+
+def main():
+    args: SweepArgs = ArgumentParser(SweepArgs).parse_args(sys.argv[1:])
+
+    with open(args.sweep_path) as sweep_file:
+        spec = SweepSpec.from_dict(json.load(sweep_file)).validate()
+
+    results = run_sweep(args, spec)
+    pq.write_table(results, args.results_path)
+    print(f"Wrote {results.num_rows} runs to {args.results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from argparse_dataclass import ArgumentParser
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from dataclasses_json import DataClassJsonMixin
 import json
 import sys
+from typing import Dict, Optional
 
-import pandas as pd
 import torch
 import torchmetrics.functional
 from torch.optim import SGD, Adam
@@ -11,11 +12,14 @@ from torch.optim import SGD, Adam
 import time
 
 from pycircuit.differentiator.trainer.data_writer_config import WriterConfig
-from pycircuit.differentiator.graph import Graph, output_to_name, Model
+from pycircuit.differentiator.graph import Graph, Model
+from pycircuit.differentiator.tensor import CircuitTensor
+from pycircuit.differentiator.trainer.arrow_data import SampleTensors, read_samples
+from pycircuit.differentiator.trainer.sample_cache import cached_samples, clean_samples
 
-import sys
 
-sys.setrecursionlimit(5000)
+# Hacks since book fair is garbage around early day
+SKIP_ROWS = 1000
 
 
 @dataclass
@@ -30,19 +34,37 @@ class TrainerOptions:
     epochs_per_run: int = 1000
     print_params: bool = False
     torch_compile: bool = False
+    compiled_dag: bool = False
+    script_dag: bool = False
+    batched_dag: bool = False
     train_frac: float = 0.8
     normalize_target: bool = True
+    cache_dir: Optional[str] = None
 
 
-def main():
-    args = ArgumentParser(TrainerOptions).parse_args(sys.argv[1:])
+def load_samples(args: TrainerOptions, writer_config: WriterConfig) -> SampleTensors:
+    if args.cache_dir is not None:
+        table = cached_samples(
+            args.parquet_path, writer_config, args.cache_dir, SKIP_ROWS
+        )
+    else:
+        table = clean_samples(read_samples(args.parquet_path), writer_config, SKIP_ROWS)
+    return SampleTensors.from_table(table, writer_config.outputs)
 
-    # Hacks since book fair is garbage around early day
-    in_data = pd.DataFrame(pd.read_parquet(args.parquet_path).dropna()[1000:])
 
-    graph = Graph.from_dict(json.load(open(args.graph_file_path)))
-    writer_config = WriterConfig.from_dict(json.load(open(args.writer_config_path)))
+@dataclass
+class TrainResult(DataClassJsonMixin):
+    "Metrics of the final model of a training run, along with its parameters"
 
+    train_mse: float
+    test_mse: float
+    train_r2: float
+    test_r2: float
+    seconds: float
+    parameters: Dict[str, float] = field(default_factory=dict)
+
+
+def check_edges(graph: Graph, writer_config: WriterConfig):
     if graph.find_edges() != writer_config.outputs:
         raise ValueError(
             f"""Graph and writer config recorded different edges.
@@ -51,58 +73,36 @@ Writer: {writer_config.outputs}
         """
         )
 
-    named_outputs = [output_to_name(output) for output in writer_config.outputs] + [
-        "target",
-        "target_future",
-        "time",
-    ]
 
-    if named_outputs != list(in_data.columns):
+def train(
+    args: TrainerOptions,
+    graph: Graph,
+    samples: SampleTensors,
+    initial_values: Dict[str, CircuitTensor] = {},
+    verbose: bool = True,
+) -> TrainResult:
+    # requirements.txt pins torch 1.13, which predates torch.compile
+    if args.torch_compile and not hasattr(torch, "compile"):
         raise ValueError(
-            f"""Input data and writer config recorded different edges.
-Input data: {list(in_data.columns)}
-Writer: {named_outputs}
-        """
+            f"torch_compile needs torch 2.0 or later, found {torch.__version__}"
         )
 
-    split_at = int(len(in_data) * args.train_frac)
-    train_data = in_data.iloc[:split_at]
-    test_data = in_data.drop(train_data.index)
-    train_target_returns = (
-        train_data["target_future"] - train_data["target"]
-    ) / train_data["target"]
-    test_target_returns = (
-        test_data["target_future"] - test_data["target"]
-    ) / test_data["target"]
-
-    in_data = None
-
-    train_inputs = {
-        output: torch.tensor(
-            train_data[output_to_name(output)].astype("float64").to_numpy()
-        )
-        for output in writer_config.outputs
-    }
+    run_start = time.time()
 
-    test_inputs = {
-        output: torch.tensor(
-            test_data[output_to_name(output)].astype("float64").to_numpy()
-        )
-        for output in writer_config.outputs
-    }
+    (train_data, test_data) = samples.split(args.train_frac)
 
-    train_target = torch.tensor(
-        train_target_returns.astype("float64").to_numpy() * args.scale_by
-    )
-    test_target = torch.tensor(
-        test_target_returns.astype("float64").to_numpy() * args.scale_by
-    )
+    train_inputs = train_data.inputs
+    test_inputs = test_data.inputs
+
+    train_target = train_data.target_returns * args.scale_by
+    test_target = test_data.target_returns * args.scale_by
 
     if args.normalize_target:
-        train_mean = train_target_returns.mean()
-        train_std = train_target_returns.std()
+        train_mean = float(train_data.target_returns.mean())
+        train_std = float(train_data.target_returns.std())
 
-        print(f"Normalizing target with mean {train_mean} and std {train_std}")
+        if verbose:
+            print(f"Normalizing target with mean {train_mean} and std {train_std}")
     else:
         train_mean = 0.0
         train_std = 1.0
@@ -110,7 +110,7 @@ Writer: {named_outputs}
     train_target = (train_target - train_mean) / train_std
     test_target = (test_target - train_mean) / train_std
 
-    model = Model(graph)
+    model = Model(graph, initial_values)
 
     optim = Adam(
         model.parameters_list(),
@@ -118,8 +118,22 @@ Writer: {named_outputs}
     )
     mse_loss = torch.nn.MSELoss()
 
-    module = model.create_module(train_inputs)
-    test_module = model.create_module(test_inputs)
+    module = model.create_module(
+        train_inputs,
+        compiled=args.compiled_dag,
+        script=args.script_dag,
+        batched=args.batched_dag,
+    )
+    test_module = model.create_module(
+        test_inputs,
+        compiled=args.compiled_dag,
+        script=args.script_dag,
+        batched=args.batched_dag,
+    )
+
+    if args.torch_compile:
+        module = torch.compile(module)
+        test_module = torch.compile(test_module)
 
     def detect_nan(projected, loss):
         if torch.isnan(loss) or torch.any(torch.isnan(projected)):
@@ -144,25 +158,35 @@ Writer: {named_outputs}
             raise ValueError("Nan encountered")
 
     @torch.no_grad()
-    def report(projected, loss):
+    def report(projected, loss) -> TrainResult:
 
         test_projected = test_module() * args.scale_by
 
-        print("Train MSE loss: ", float(mse_loss(projected, train_target)))
-        print("Test MSE loss: ", float(mse_loss(test_projected, test_target)))
-        print(
-            "Train r^2: ",
-            float(torchmetrics.functional.r2_score(projected, train_target)),
-        )
-        print(
-            "Test r^2: ",
-            float(torchmetrics.functional.r2_score(test_projected, test_target)),
+        result = TrainResult(
+            train_mse=float(mse_loss(projected, train_target)),
+            test_mse=float(mse_loss(test_projected, test_target)),
+            train_r2=float(torchmetrics.functional.r2_score(projected, train_target)),
+            test_r2=float(
+                torchmetrics.functional.r2_score(test_projected, test_target)
+            ),
+            seconds=time.time() - run_start,
+            parameters={
+                p_name: float(param) for (p_name, param) in model.parameters().items()
+            },
         )
 
-        if args.print_params:
+        if verbose:
+            print("Train MSE loss: ", result.train_mse)
+            print("Test MSE loss: ", result.test_mse)
+            print("Train r^2: ", result.train_r2)
+            print("Test r^2: ", result.test_r2)
+
+        if verbose and args.print_params:
             for (p_name, param) in model.parameters().items():
                 print(f"{p_name}: {float(param)}, {float(param.grad)}")
 
+        return result
+
     timings = []
     for idx in range(0, args.lr_shrinkings):
         for idx in range(0, args.epochs_per_run):
@@ -184,7 +208,7 @@ Writer: {named_outputs}
             computed_loss.backward()
             optim.step()
 
-            if idx % 100 == 1 or idx == 0:
+            if verbose and (idx % 100 == 1 or idx == 0):
                 with torch.no_grad():
                     print(
                         f"Epoch took {sum(timings)} total and "
@@ -198,7 +222,18 @@ Writer: {named_outputs}
         for param_goup in optim.param_groups:
             param_goup["lr"] /= args.lr_shrink_by
 
-    report(projected, computed_loss)
+    return report(projected, computed_loss)
+
+
+def main():
+    args = ArgumentParser(TrainerOptions).parse_args(sys.argv[1:])
+
+    graph = Graph.from_dict(json.load(open(args.graph_file_path)))
+    writer_config = WriterConfig.from_dict(json.load(open(args.writer_config_path)))
+
+    check_edges(graph, writer_config)
+
+    train(args, graph, load_samples(args, writer_config))
 
 
 def index(tensor: torch.Tensor, value, ith_match: int = 0) -> torch.Tensor:
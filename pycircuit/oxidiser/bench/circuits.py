@@ -0,0 +1,206 @@
+"""
+Circuits used to benchmark the compiler and the code it generates.
+
+These mirror the examples from the readme and the signal library, and each
+comes with the call groups its externals are written through. Externals are only
+read by a source component, a book or a stored value, since external variables
+are WIP and emission starts below those
+"""
+
+from typing import Callable, Dict, List
+
+from pycircuit.circuit_builder.circuit import CallGroup, CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.circuit_builder.definition import (
+    BasicInput,
+    CallSpec,
+    Definition,
+    OutputSpec,
+)
+from pycircuit.circuit_builder.signals.book.static_book_fair import (
+    make_static_book_fair,
+)
+from pycircuit.circuit_builder.signals.regressions.mlp import Layer, mlp
+from pycircuit.circuit_builder.signals.symmetric.multi_symmetric_move import (
+    multi_symmetric_move,
+)
+from pycircuit.common.frozen import FrozenDict
+
+BOOK_DEFINITION = "book"
+SELECT_DEFINITION = "select"
+VALUE_DEFINITION = "value"
+BOOK_OUTPUTS = ["bid_prices", "bid_sizes", "ask_prices", "ask_sizes"]
+
+BOOK_MODULE = "::pycircuit_rs::book"
+
+# The depth messages of data_loader map onto this call group
+DEPTH_GROUP = "depth"
+DEPTH_TYPE = f"{BOOK_MODULE}::DepthUpdate"
+
+
+def book_definition() -> Definition:
+    "Aggregates depth updates into the levels of a book"
+    return Definition(
+        inputs=FrozenDict({"depth": BasicInput()}),
+        output_specs=FrozenDict(
+            {
+                output: OutputSpec(ephemeral=False, type_path="Levels")
+                for output in BOOK_OUTPUTS
+            }
+        ),
+        class_name="BookAggregator",
+        module=BOOK_MODULE,
+        generic_callset=CallSpec(
+            written_set=frozenset({"depth"}),
+            callback="on_depth",
+            outputs=frozenset(BOOK_OUTPUTS),
+        ),
+    ).validate()
+
+
+def select_definition() -> Definition:
+    "Selects a if select_a is true, otherwise b, as used by signals.select"
+    return Definition(
+        inputs=FrozenDict(
+            {"a": BasicInput(), "b": BasicInput(), "select_a": BasicInput()}
+        ),
+        output_specs=FrozenDict(
+            {"out": OutputSpec(ephemeral=True, type_path="Output")}
+        ),
+        class_name="Select",
+        module="::pycircuit_rs::core_components::select",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a", "b", "select_a"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+        generics_order=FrozenDict(a=0, b=1),
+        differentiable_operator_name="select",
+    ).validate()
+
+
+def value_definition() -> Definition:
+    "Stores the latest value of an input, so later calls of other groups can read it"
+    return Definition(
+        inputs=FrozenDict({"a": BasicInput()}),
+        output_specs=FrozenDict(
+            {"out": OutputSpec(ephemeral=False, type_path="Output")}
+        ),
+        class_name="Value",
+        module="::pycircuit_rs::core_components::value",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+        generics_order=FrozenDict(a=0),
+    ).validate()
+
+
+def _add_group(circuit: CircuitBuilder, name: str, **fields: str):
+    struct_name = f"{name.capitalize()}Message"
+    circuit.add_call_struct_from(struct_name, **fields)
+    circuit.add_call_group(
+        name,
+        CallGroup(
+            struct=struct_name,
+            external_field_mapping={field: field for field in fields.keys()},
+        ),
+    )
+
+
+def _read_external(circuit: CircuitBuilder, name: str, type: str):
+    if VALUE_DEFINITION not in circuit.definitions:
+        circuit.add_definition(VALUE_DEFINITION, value_definition())
+    return circuit.make_component(
+        VALUE_DEFINITION,
+        name=f"{name}_value",
+        inputs={"a": circuit.get_external(name, type)},
+    )
+
+
+def add_two_numbers() -> CircuitBuilder:
+    circuit = CircuitBuilder(definitions={})
+    with CircuitContextManager(circuit):
+        a = _read_external(circuit, "a", "f64")
+        b = _read_external(circuit, "b", "f64")
+        a + b
+        _add_group(circuit, "ab", a="f64", b="f64")
+    return circuit
+
+
+def wide_trigger_add() -> CircuitBuilder:
+    circuit = CircuitBuilder(definitions={})
+    with CircuitContextManager(circuit):
+        a = _read_external(circuit, "a", "f64")
+        b = _read_external(circuit, "b", "f64")
+        c = _read_external(circuit, "c", "f64")
+        (a + b) + c
+        _add_group(circuit, "ab", a="f64", b="f64")
+        _add_group(circuit, "c", c="f64")
+    return circuit
+
+
+def _make_book(circuit: CircuitBuilder):
+    circuit.add_definition(BOOK_DEFINITION, book_definition())
+    depth = circuit.get_external(DEPTH_GROUP, DEPTH_TYPE)
+    _add_group(circuit, DEPTH_GROUP, depth=DEPTH_TYPE)
+    return circuit.make_component(BOOK_DEFINITION, name="book", inputs={"depth": depth})
+
+
+def static_book_fair(levels: int = 5) -> CircuitBuilder:
+    circuit = CircuitBuilder(definitions={})
+    with CircuitContextManager(circuit):
+        book = _make_book(circuit)
+        mid = (book.output("bid_prices")[0] + book.output("ask_prices")[0]) / (
+            circuit.make_constant("double", "2.0")
+        )
+        make_static_book_fair(book, mid, levels, "fair")
+    return circuit
+
+
+def symmetric_move(signals: int = 4) -> CircuitBuilder:
+    circuit = CircuitBuilder(definitions={SELECT_DEFINITION: select_definition()})
+    with CircuitContextManager(circuit):
+        vals = [
+            _read_external(circuit, f"signal_{idx}", "f64") for idx in range(signals)
+        ]
+        _add_group(
+            circuit, "signals", **{f"signal_{idx}": "f64" for idx in range(signals)}
+        )
+        coefficients = [
+            [
+                circuit.make_parameter(f"coeff_{row}_{column}")
+                for column in range(signals)
+            ]
+            for row in range(signals)
+        ]
+        multi_symmetric_move(vals, coefficients)
+    return circuit
+
+
+def mlp_circuit(inputs: int = 8, hidden: List[int] = [16, 16]) -> CircuitBuilder:
+    circuit = CircuitBuilder(definitions={})
+    with CircuitContextManager(circuit):
+        vals = [
+            _read_external(circuit, f"feature_{idx}", "f64") for idx in range(inputs)
+        ]
+        _add_group(
+            circuit, "features", **{f"feature_{idx}": "f64" for idx in range(inputs)}
+        )
+        widths = [inputs] + hidden + [1]
+        layers = [
+            Layer.parameter_layer(rows, columns, prefix=f"layer_{idx}")
+            for (idx, (columns, rows)) in enumerate(zip(widths, widths[1:]))
+        ]
+        mlp(vals, layers)
+    return circuit
+
+
+BENCH_CIRCUITS: Dict[str, Callable[[], CircuitBuilder]] = {
+    "add_two_numbers": add_two_numbers,
+    "wide_trigger_add": wide_trigger_add,
+    "static_book_fair": static_book_fair,
+    "multi_symmetric_move": symmetric_move,
+    "mlp": mlp_circuit,
+}
@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+import json
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from argparse_dataclass import ArgumentParser
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import (
+    ComponentOutput,
+    ExternalOutput,
+    GraphOutput,
+)
+from pycircuit.oxidiser.bench.circuits import BENCH_CIRCUITS
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.find_ephemeral_components import (
+    all_nonephemeral_outputs,
+    find_all_subgraphs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+
+T = TypeVar("T")
+
+
+@dataclass
+class BenchArgs:
+    circuits: str = ",".join(BENCH_CIRCUITS.keys())
+    repeats: int = 5
+    json_path: Optional[str] = None
+
+
+@dataclass
+class CircuitBench(DataClassJsonMixin):
+    """Best time in seconds of every compiler stage for a single circuit
+
+    Attributes:
+
+        stages: Seconds taken by each stage. Call groups are emitted
+                as stages named emit_<group>
+    """
+
+    circuit: str
+    components: int
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+def best_of(repeats: int, stage: Callable[[], T]) -> Tuple[T, float]:
+    assert repeats > 0
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = stage()
+        best = min(best, time.perf_counter() - start)
+    return (result, best)
+
+
+def call_group_sources(circuit: CircuitData, group: str) -> Set[ComponentOutput]:
+    """Outputs of the components reading the externals of a call group.
+
+    Emission starts from these, since external variables are WIP"""
+    externals = {
+        ExternalOutput(external_name=external)
+        for external in circuit.call_groups[group].inputs
+    }
+    return {
+        GraphOutput(parent=component.name, output_name=output)
+        for component in circuit.components.values()
+        if any(
+            i_output in externals
+            for i in component.triggering_inputs()
+            for i_output in i.outputs()
+        )
+        for output in component.definition.outputs()
+    }
+
+
+def emit_call_group(circuit: CircuitData, meta: CircuitMetadata, group: str) -> str:
+    called = find_all_children_of_from_outputs(
+        circuit, call_group_sources(circuit, group)
+    )
+    return generate_code_from_tree(assemble_trigger(meta, called))
+
+
+def bench_circuit(name: str, repeats: int) -> CircuitBench:
+    (circuit, build_time) = best_of(repeats, BENCH_CIRCUITS[name])
+    bench = CircuitBench(circuit=name, components=len(circuit.components))
+    bench.stages["build"] = build_time
+
+    (_, bench.stages["validate"]) = best_of(repeats, circuit.validate)
+    (_, bench.stages["find_all_subgraphs"]) = best_of(
+        repeats, lambda: find_all_subgraphs(circuit)
+    )
+    (non_ephemeral, bench.stages["all_nonephemeral_outputs"]) = best_of(
+        repeats, lambda: all_nonephemeral_outputs(circuit)
+    )
+
+    for group in circuit.call_groups.keys():
+        stage = f"emit_{group}"
+        # Fresh metadata every time, so cached type names aren't reused
+        (_, bench.stages[stage]) = best_of(
+            repeats,
+            lambda: emit_call_group(
+                circuit,
+                CircuitMetadata(circuit=circuit, non_ephemeral_outputs=non_ephemeral),
+                group,
+            ),
+        )
+
+    return bench
+
+
+def format_benches(benches: List[CircuitBench]) -> str:
+    lines = []
+    for bench in benches:
+        lines.append(f"{bench.circuit} ({bench.components} components)")
+        for (stage, seconds) in bench.stages.items():
+            lines.append(f"    {stage:<32} {seconds * 1000:>10.3f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    args: BenchArgs = ArgumentParser(BenchArgs).parse_args(sys.argv[1:])
+
+    benches = [
+        bench_circuit(name, args.repeats) for name in args.circuits.split(",") if name
+    ]
+
+    print(format_benches(benches))
+
+    if args.json_path is not None:
+        with open(args.json_path, "w") as json_file:
+            json.dump([bench.to_dict() for bench in benches], json_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Times every stage of the compiler over synthetic circuits of growing size.
+
+Each stage gets a scaling exponent, the slope of its time against the number
+of components on a log-log scale. A linear stage is close to 1 and a quadratic
+one close to 2, so passing max_exponent fails the run on quadratic regressions
+"""
+
+from dataclasses import dataclass, field
+import json
+import math
+import sys
+from typing import Dict, List, Optional
+
+from argparse_dataclass import ArgumentParser
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.oxidiser.bench.codegen_bench import best_of
+from pycircuit.oxidiser.bench.generators import GENERATORS
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.find_ephemeral_components import (
+    all_nonephemeral_outputs,
+    find_all_subgraphs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+
+STAGES = [
+    "make_component",
+    "validate",
+    "to_dict",
+    "from_dict",
+    "find_all_subgraphs",
+    "all_nonephemeral_outputs",
+    "emit",
+]
+
+
+@dataclass
+class ScalingArgs:
+    generators: str = ",".join(GENERATORS.keys())
+    sizes: str = "1000,10000,50000,200000"
+    repeats: int = 1
+    seed: int = 0
+    max_exponent: Optional[float] = None
+    json_path: Optional[str] = None
+
+
+@dataclass
+class ScalingPoint(DataClassJsonMixin):
+    "Best time in seconds of every compiler stage for one generated circuit"
+
+    generator: str
+    components: int
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+def bench_point(generator: str, components: int, repeats: int, seed: int):
+    (synthetic, build_time) = best_of(
+        repeats, lambda: GENERATORS[generator](components, seed)
+    )
+    circuit = synthetic.circuit
+    point = ScalingPoint(generator=generator, components=len(circuit.components))
+    point.stages["make_component"] = build_time
+
+    (_, point.stages["validate"]) = best_of(repeats, circuit.validate)
+    (as_dict, point.stages["to_dict"]) = best_of(repeats, circuit.to_dict)
+    (_, point.stages["from_dict"]) = best_of(
+        repeats, lambda: CircuitData.from_dict(as_dict)
+    )
+    (_, point.stages["find_all_subgraphs"]) = best_of(
+        repeats, lambda: find_all_subgraphs(circuit)
+    )
+    (non_ephemeral, point.stages["all_nonephemeral_outputs"]) = best_of(
+        repeats, lambda: all_nonephemeral_outputs(circuit)
+    )
+
+    def emit() -> str:
+        called = find_all_children_of_from_outputs(circuit, synthetic.sources)
+        meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=non_ephemeral)
+        return generate_code_from_tree(assemble_trigger(meta, called))
+
+    (_, point.stages["emit"]) = best_of(repeats, emit)
+
+    return point
+
+
+def scaling_exponent(points: List[ScalingPoint], stage: str) -> float:
+    "Least squares slope of log time against log components"
+    xs = [math.log(point.components) for point in points]
+    ys = [math.log(max(point.stages[stage], 1e-9)) for point in points]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    spread = sum((x - x_mean) ** 2 for x in xs)
+    if spread == 0:
+        return 0.0
+    return sum((x - x_mean) * (y - y_mean) for (x, y) in zip(xs, ys)) / spread
+
+
+def scaling_exponents(points: List[ScalingPoint]) -> Dict[str, Dict[str, float]]:
+    "The exponent of every stage, for every generator with more than one size"
+    by_generator: Dict[str, List[ScalingPoint]] = {}
+    for point in points:
+        by_generator.setdefault(point.generator, []).append(point)
+
+    return {
+        generator: {stage: scaling_exponent(gen_points, stage) for stage in STAGES}
+        for (generator, gen_points) in by_generator.items()
+        if len(gen_points) > 1
+    }
+
+
+def format_scaling(
+    points: List[ScalingPoint], exponents: Dict[str, Dict[str, float]]
+) -> str:
+    lines = []
+    for point in points:
+        lines.append(f"{point.generator} ({point.components} components)")
+        for (stage, seconds) in point.stages.items():
+            lines.append(f"    {stage:<32} {seconds * 1000:>12.3f} ms")
+    for (generator, stages) in exponents.items():
+        lines.append(f"{generator} scaling exponents")
+        for (stage, exponent) in stages.items():
+            lines.append(f"    {stage:<32} {exponent:>12.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    args: ScalingArgs = ArgumentParser(ScalingArgs).parse_args(sys.argv[1:])
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    points = [
+        bench_point(generator, size, args.repeats, args.seed)
+        for generator in args.generators.split(",")
+        if generator
+        for size in sizes
+    ]
+    exponents = scaling_exponents(points)
+
+    print(format_scaling(points, exponents))
+
+    if args.json_path is not None:
+        with open(args.json_path, "w") as json_file:
+            json.dump(
+                {
+                    "points": [point.to_dict() for point in points],
+                    "exponents": exponents,
+                },
+                json_file,
+                indent=4,
+            )
+
+    if args.max_exponent is not None:
+        too_slow = [
+            f"{generator}.{stage}: {exponent:.2f}"
+            for (generator, stages) in exponents.items()
+            for (stage, exponent) in stages.items()
+            if exponent > args.max_exponent
+        ]
+        if too_slow:
+            print(f"Stages scaling worse than {args.max_exponent}: {too_slow}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
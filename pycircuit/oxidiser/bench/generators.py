@@ -0,0 +1,289 @@
+"""
+Random circuits for measuring how the compiler scales with circuit size.
+
+Every generator takes the number of components to make and a seed, and returns
+the circuit along with the outputs its emitted call tree starts from. Components
+reading externals are left out of the emitted tree, since external variables are WIP
+"""
+
+from dataclasses import dataclass
+import random
+from typing import Callable, Dict, List, Set
+
+from frozenlist import FrozenList
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder, OutputArray
+from pycircuit.circuit_builder.component import ComponentOutput
+from pycircuit.circuit_builder.definition import (
+    ArrayInput,
+    BasicInput,
+    CallsetGroup,
+    CallSpec,
+    Definition,
+    OutputSpec,
+)
+from pycircuit.common.frozen import FrozenDict
+from pycircuit.oxidiser.bench.circuits import _add_group
+
+PASS_DEFINITION = "pass"
+PAIR_DEFINITION = "pair"
+SUM_DEFINITION = "sum"
+CALLSETS_DEFINITION = "callsets"
+
+CALLSETS_INPUTS = ["a", "b", "c", "d"]
+
+
+def pass_definition() -> Definition:
+    "Takes a single input and writes a single ephemeral output"
+    return Definition(
+        inputs=FrozenDict({"a": BasicInput()}),
+        output_specs=FrozenDict({"out": OutputSpec(ephemeral=True, type_path="f64")}),
+        class_name="Pass",
+        module="bench",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+    ).validate()
+
+
+def pair_definition() -> Definition:
+    "Takes two inputs and writes a single ephemeral output"
+    return Definition(
+        inputs=FrozenDict({"a": BasicInput(), "b": BasicInput()}),
+        output_specs=FrozenDict({"out": OutputSpec(ephemeral=True, type_path="f64")}),
+        class_name="Pair",
+        module="bench",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a", "b"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+    ).validate()
+
+
+def sum_definition() -> Definition:
+    "Reduces an array of inputs into a single ephemeral output"
+    return Definition(
+        inputs=FrozenDict({"values": ArrayInput(fields=frozenset())}),
+        output_specs=FrozenDict({"out": OutputSpec(ephemeral=True, type_path="f64")}),
+        class_name="Sum",
+        module="bench",
+        generic_callset=CallSpec(
+            written_set=frozenset({"values"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+    ).validate()
+
+
+def callsets_definition() -> Definition:
+    """Named callsets with a callset group for every combination of them,
+    like test_common.basic_definition"""
+
+    def grouped(*callsets: str) -> CallsetGroup:
+        names = FrozenList(callsets)
+        names.freeze()
+        return CallsetGroup(callsets=names)
+
+    return Definition(
+        inputs=FrozenDict({name: BasicInput() for name in CALLSETS_INPUTS}),
+        output_specs=FrozenDict(
+            {
+                "a": OutputSpec(ephemeral=True, type_path="f64"),
+                "b": OutputSpec(ephemeral=False, type_path="f64"),
+                "c": OutputSpec(ephemeral=True, type_path="f64", always_valid=True),
+            }
+        ),
+        class_name="Callsets",
+        module="bench",
+        generic_callset=CallSpec(
+            written_set=frozenset({"d"}),
+            callback="call",
+            outputs=frozenset({"b"}),
+        ),
+        callsets=frozenset(
+            {
+                CallSpec(
+                    written_set=frozenset({"a"}),
+                    callback="call_a",
+                    outputs=frozenset({"a"}),
+                    name="A",
+                ),
+                CallSpec(
+                    written_set=frozenset({"b"}),
+                    observes=frozenset({"a"}),
+                    callback="call_b",
+                    outputs=frozenset({"b"}),
+                    name="B",
+                ),
+                CallSpec(
+                    written_set=frozenset({"c", "d"}),
+                    callback="call_cd",
+                    outputs=frozenset({"b", "c"}),
+                    name="CD",
+                ),
+            }
+        ),
+        callset_groups=frozenset(
+            {
+                grouped("A", "B"),
+                grouped("A", "CD"),
+                grouped("B", "CD"),
+                grouped("A", "B", "CD"),
+            }
+        ),
+    ).validate()
+
+
+@dataclass
+class SyntheticCircuit:
+    circuit: CircuitBuilder
+    sources: Set[ComponentOutput]
+
+
+def _new_circuit() -> CircuitBuilder:
+    return CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            PAIR_DEFINITION: pair_definition(),
+            SUM_DEFINITION: sum_definition(),
+            CALLSETS_DEFINITION: callsets_definition(),
+        }
+    )
+
+
+def _make_sources(circuit: CircuitBuilder, groups: int, width: int) -> List:
+    """Makes width components per call group, reading the external of that group.
+
+    Components are force inserted everywhere since identical ones would be merged"""
+    sources = []
+    for group in range(groups):
+        external = circuit.get_external(f"x_{group}", "f64")
+        _add_group(circuit, f"group_{group}", **{f"x_{group}": "f64"})
+        sources += [
+            circuit.make_component(
+                PASS_DEFINITION,
+                name=f"source_{group}_{idx}",
+                inputs={"a": external},
+                force_insert=True,
+            )
+            for idx in range(width)
+        ]
+    return sources
+
+
+def _synthetic(circuit: CircuitBuilder, sources: List) -> SyntheticCircuit:
+    return SyntheticCircuit(
+        circuit=circuit, sources={source.output() for source in sources}
+    )
+
+
+def deep_chain(components: int, seed: int = 0) -> SyntheticCircuit:
+    "A single chain, where each link also reads a random earlier link"
+    rng = random.Random(seed)
+    circuit = _new_circuit()
+    chain = _make_sources(circuit, groups=1, width=1)
+    sources = list(chain)
+
+    for idx in range(components - 1):
+        chain.append(
+            circuit.make_component(
+                PAIR_DEFINITION,
+                name=f"link_{idx}",
+                inputs={"a": chain[-1], "b": rng.choice(chain)},
+                force_insert=True,
+            )
+        )
+
+    return _synthetic(circuit, sources)
+
+
+def wide_fanout(components: int, seed: int = 0) -> SyntheticCircuit:
+    "A handful of roots, each read by a random share of every other component"
+    rng = random.Random(seed)
+    circuit = _new_circuit()
+    roots = _make_sources(circuit, groups=1, width=min(components, 8))
+
+    for idx in range(components - len(roots)):
+        circuit.make_component(
+            PASS_DEFINITION,
+            name=f"leaf_{idx}",
+            inputs={"a": rng.choice(roots)},
+            force_insert=True,
+        )
+
+    return _synthetic(circuit, roots)
+
+
+def many_call_groups(components: int, seed: int = 0) -> SyntheticCircuit:
+    "A random dag with a call group for every 16 components"
+    rng = random.Random(seed)
+    circuit = _new_circuit()
+    groups = max(1, components // 16)
+    sources = _make_sources(circuit, groups=groups, width=1)
+    made = list(sources)
+
+    for idx in range(components - len(sources)):
+        made.append(
+            circuit.make_component(
+                PAIR_DEFINITION,
+                name=f"node_{idx}",
+                inputs={"a": rng.choice(made), "b": rng.choice(made)},
+                force_insert=True,
+            )
+        )
+
+    return _synthetic(circuit, sources)
+
+
+def array_heavy(components: int, seed: int = 0, width: int = 16) -> SyntheticCircuit:
+    "Sums over arrays of distinct random earlier outputs"
+    rng = random.Random(seed)
+    circuit = _new_circuit()
+    sources = _make_sources(circuit, groups=1, width=min(components, width))
+    made = list(sources)
+
+    for idx in range(components - len(sources)):
+        elements = [{"values": element} for element in rng.sample(made, width)]
+        made.append(
+            circuit.make_component(
+                SUM_DEFINITION,
+                name=f"sum_{idx}",
+                inputs={"values": OutputArray(elements)},
+                force_insert=True,
+            )
+        )
+
+    return _synthetic(circuit, sources)
+
+
+def callset_heavy(components: int, seed: int = 0) -> SyntheticCircuit:
+    """Components with many callsets, reading random earlier outputs.
+
+    Each call group triggers a different mix of callsets, and so callset groups"""
+    rng = random.Random(seed)
+    circuit = _new_circuit()
+    sources = _make_sources(circuit, groups=min(components, 4), width=1)
+    outputs = [source.output() for source in sources]
+
+    for idx in range(components - len(sources)):
+        component = circuit.make_component(
+            CALLSETS_DEFINITION,
+            name=f"callsets_{idx}",
+            inputs={name: rng.choice(outputs) for name in CALLSETS_INPUTS},
+            force_insert=True,
+        )
+        outputs += [component.output(name) for name in ["a", "b", "c"]]
+
+    return _synthetic(circuit, sources)
+
+
+GENERATORS: Dict[str, Callable[[int, int], SyntheticCircuit]] = {
+    "deep_chain": deep_chain,
+    "wide_fanout": wide_fanout,
+    "many_call_groups": many_call_groups,
+    "array_heavy": array_heavy,
+    "callset_heavy": callset_heavy,
+}
@@ -0,0 +1,32 @@
+from pycircuit.oxidiser.bench.circuits import BENCH_CIRCUITS
+from pycircuit.oxidiser.bench.codegen_bench import bench_circuit
+
+
+def test_bench_circuits_build():
+    for (name, make_circuit) in BENCH_CIRCUITS.items():
+        circuit = make_circuit()
+        circuit.validate()
+        assert circuit.call_groups, f"Circuit {name} has no call groups"
+
+
+def test_bench_circuit():
+    bench = bench_circuit("wide_trigger_add", repeats=1)
+
+    # A stored value per external, and the two adds
+    assert bench.components == 5
+    for stage in [
+        "build",
+        "validate",
+        "find_all_subgraphs",
+        "all_nonephemeral_outputs",
+    ]:
+        assert stage in bench.stages
+
+    assert {"emit_ab", "emit_c"} <= set(bench.stages)
+
+
+def test_every_call_group_emits():
+    for name in BENCH_CIRCUITS.keys():
+        bench = bench_circuit(name, repeats=1)
+        for group in BENCH_CIRCUITS[name]().call_groups.keys():
+            assert f"emit_{group}" in bench.stages, f"Circuit {name} missed {group}"
@@ -0,0 +1,53 @@
+import pytest
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.oxidiser.bench.compiler_bench import (
+    STAGES,
+    ScalingPoint,
+    bench_point,
+    scaling_exponent,
+    scaling_exponents,
+)
+from pycircuit.oxidiser.bench.generators import GENERATORS
+
+
+@pytest.mark.parametrize("generator", GENERATORS.keys())
+def test_generators_make_components(generator):
+    synthetic = GENERATORS[generator](50, 0)
+    circuit = synthetic.circuit
+
+    assert len(circuit.components) == 50
+    assert synthetic.sources
+    circuit.validate()
+
+    round_tripped = CircuitData.from_dict(circuit.to_dict())
+    assert round_tripped.components == circuit.components
+
+
+def test_generators_are_seeded():
+    first = GENERATORS["many_call_groups"](50, 1).circuit
+    second = GENERATORS["many_call_groups"](50, 1).circuit
+    assert first.components == second.components
+
+
+def test_bench_point():
+    point = bench_point("callset_heavy", 30, repeats=1, seed=0)
+
+    assert point.components == 30
+    assert list(point.stages.keys()) == STAGES
+
+
+def test_scaling_exponent():
+    points = [
+        ScalingPoint(
+            generator="g",
+            components=size,
+            stages={"linear": size * 1e-6, "quadratic": size**2 * 1e-9},
+        )
+        for size in [1000, 10000, 100000]
+    ]
+
+    assert scaling_exponent(points, "linear") == pytest.approx(1.0)
+    assert scaling_exponent(points, "quadratic") == pytest.approx(2.0)
+    # A single size gives no curve to fit
+    assert scaling_exponents(points[:1]) == {}
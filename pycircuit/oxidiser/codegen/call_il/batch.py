@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+from pycircuit.oxidiser.graph.packing import PackedElement
+from pycircuit.oxidiser.graph.variable import (
+    AlwaysValid,
+    GraphValid,
+    GraphVariable,
+    PerCallVar,
+)
+
+_BATCH_INPUT_HEADER = "__batch_input_"
+_BATCH_OUTPUT_HEADER = "__batch_output_"
+
+BATCH_VALID_RETURN_NAME = "__batch_valid"
+
+
+def _packed_element(variable: GraphVariable) -> Optional[PackedElement]:
+    if isinstance(variable.var, PerCallVar):
+        return variable.var.packed
+    return None
+
+
+def _packed_binding(element: PackedElement) -> str:
+    return f"{element.array}_{element.index}"
+
+
+def _optional_ref(variable: GraphVariable) -> str:
+    ref = f"Some(& {variable.var.var_path()})"
+    if isinstance(variable.valid, AlwaysValid):
+        return ref
+    return f"if {variable.valid.valid_path()} {{ {ref} }} else {{ None }}"
+
+
+@dataclass(frozen=True, eq=True)
+class BatchInputLeaf(CodeLeaf):
+    input: "BatchInput"
+
+    def generate_code(self) -> str:
+        elements = [
+            f"    {_optional_ref(variable)}," for variable in self.input.variables
+        ]
+        elements_str = "\n".join(elements)
+        return f"""\
+let {self.input.local_path()}: [Option<&_>; {len(self.input.variables)}] = [
+{elements_str}
+];\
+"""
+
+
+@dataclass(frozen=True, eq=True)
+class BatchInput(CodeTree):
+    """A single input of every component in the batch, as an array"""
+
+    variables: List[GraphVariable]
+    input_name: str
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return [*self.variables, BatchInputLeaf(self)]
+
+    def local_path(self) -> str:
+        return _BATCH_INPUT_HEADER + self.input_name
+
+
+@dataclass(frozen=True, eq=True)
+class BatchOutputLeaf(CodeLeaf):
+    output: "BatchOutput"
+
+    def generate_code(self) -> str:
+        elements = []
+        for variable in self.output.variables:
+            packed = _packed_element(variable)
+            if packed is not None:
+                elements.append(_packed_binding(packed))
+            else:
+                elements.append(f"&mut {variable.var.var_path()}")
+        return f"let {self.output.local_path()} = [{', '.join(elements)}];"
+
+
+@dataclass(frozen=True, eq=True)
+class BatchOutput(CodeTree):
+    """A single output of every component in the batch, as an array"""
+
+    variables: List[GraphVariable]
+    output_name: str
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return [*self.variables, BatchOutputLeaf(self)]
+
+    def local_path(self) -> str:
+        return _BATCH_OUTPUT_HEADER + self.output_name
+
+
+@dataclass(frozen=True, eq=True)
+class PackedOutputBorrows(CodeLeaf):
+    """Borrows every element of a packed array the batch writes at once.
+
+    Indexing borrows the whole array, so elements are borrowed by destructuring it"""
+
+    outputs: List[BatchOutput]
+
+    def generate_code(self) -> str:
+        bound: Dict[str, Set[int]] = {}
+        lengths: Dict[str, int] = {}
+        for output in self.outputs:
+            for variable in output.variables:
+                packed = _packed_element(variable)
+                if packed is not None:
+                    bound.setdefault(packed.array, set()).add(packed.index)
+                    lengths[packed.array] = packed.length
+
+        lines = []
+        for (array, indices) in sorted(bound.items()):
+            pattern = ", ".join(
+                (
+                    _packed_binding(PackedElement(array, index, lengths[array]))
+                    if index in indices
+                    else "_"
+                )
+                for index in range(lengths[array])
+            )
+            lines.append(f"let [{pattern}] = &mut {array};")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, eq=True)
+class BatchDispatch(CodeLeaf):
+    type_path: str
+    call_name: str
+    component_paths: List[str]
+
+    inputs: List[BatchInput]
+    outputs: List[BatchOutput]
+
+    valid_struct_name: Optional[str]
+
+    def generate_code(self) -> str:
+        components = ", ".join(f"&mut {path}" for path in self.component_paths)
+        call_args = [f"[{components}]"]
+        call_args += [input.local_path() for input in self.inputs]
+        call_args += [output.local_path() for output in self.outputs]
+        call_args_str = ", ".join(call_args)
+
+        valid_ty = self.valid_struct_name or "()"
+        return_ty = f"[{valid_ty}; {len(self.component_paths)}]"
+
+        return f"""\
+let {BATCH_VALID_RETURN_NAME}: {return_ty} = {self.type_path}::{self.call_name}({call_args_str});\
+"""
+
+
+@dataclass(frozen=True, eq=True)
+class BatchValidSet(CodeLeaf):
+    outputs: List[BatchOutput]
+
+    def generate_code(self) -> str:
+        valid_lines = []
+        for output in self.outputs:
+            for (idx, variable) in enumerate(output.variables):
+                valid: GraphValid = variable.valid
+                match valid:
+                    case AlwaysValid():
+                        continue
+                    case valid_var:
+                        path = valid_var.valid_path()
+                        valid_lines.append(
+                            f"{path} = {BATCH_VALID_RETURN_NAME}[{idx}].{output.output_name};"
+                        )
+
+        return "\n".join(valid_lines)
+
+
+@dataclass(frozen=True, eq=True)
+class BatchCall(CodeTree):
+    """One call for a batch of independent components sharing a concrete type"""
+
+    dispatch: BatchDispatch
+
+    def get_tree_children(self) -> List[TreeNode]:
+        children: List[TreeNode] = [
+            *self.dispatch.inputs,
+            PackedOutputBorrows(self.dispatch.outputs),
+            *self.dispatch.outputs,
+        ]
+        children.append(self.dispatch)
+        if self.dispatch.outputs:
+            children.append(BatchValidSet(self.dispatch.outputs))
+        return children
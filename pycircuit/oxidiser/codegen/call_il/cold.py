@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from typing import List
+
+from pycircuit.oxidiser.codegen.tree.line_literal import LineLiteral
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeTree, TreeNode
+
+COLD_CALL_PATH = "::pycircuit_rs::cold::cold_call"
+
+
+@dataclass(frozen=True, eq=True)
+class ColdCalls(CodeTree):
+    """A run of calls which is rarely triggered.
+
+    The calls are wrapped in a closure passed to a #[cold] #[inline(never)] function,
+    so they get outlined from the hot path while still borrowing the local variables.
+    Global init leaves inside the calls are still hoisted outside of the closure"""
+
+    calls: List[TreeNode]
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return (
+            [LineLiteral(f"{COLD_CALL_PATH}(|| {{")] + self.calls + [LineLiteral("});")]
+        )
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import ExternalOutput
+from pycircuit.oxidiser.codegen.tree.line_literal import LineLiteral
+from pycircuit.oxidiser.codegen.tree.tree_node import (
+    CodeLeaf,
+    CodeTree,
+    TreeNode,
+    find_global_inits,
+)
+from pycircuit.oxidiser.graph.variable import StoredValid, StoredVar
+
+EVENTS_NAME = "events"
+EVENT_NAME = "event"
+
+_EVENT_LOCAL = "__event"
+_LAST_LOCAL = "__last"
+_REST_LOCAL = "__rest"
+_LOAD_HEADER = "load_"
+_BATCH_SUFFIX = "_batch"
+
+
+def load_function_name(group_name: str) -> str:
+    return f"{_LOAD_HEADER}{group_name}"
+
+
+def batch_entry_name(group_name: str) -> str:
+    return f"{group_name}{_BATCH_SUFFIX}"
+
+
+def loaded_externals(circuit: CircuitData) -> List[str]:
+    "Every external a call group loads from its struct, and so has a stored field"
+    return sorted(
+        {
+            external_name
+            for group in circuit.call_groups.values()
+            for external_name in group.external_field_mapping.values()
+        }
+    )
+
+
+def external_field(external_name: str) -> StoredVar:
+    return StoredVar(output=ExternalOutput(external_name=external_name))
+
+
+def external_valid_field(external_name: str) -> StoredValid:
+    return StoredValid(output=ExternalOutput(external_name=external_name))
+
+
+@dataclass(frozen=True, eq=True)
+class LoadExternals(CodeLeaf):
+    """Copies the fields of a call struct into the stored externals they map to"""
+
+    # Pairs of struct field and external name
+    field_mapping: Tuple[Tuple[str, str], ...]
+
+    def generate_code(self) -> str:
+        lines = []
+        for (struct_field, external_name) in self.field_mapping:
+            field = external_field(external_name)
+            valid = external_valid_field(external_name)
+            lines.append(f"{field.var_path()} = {EVENT_NAME}.{struct_field}.clone();")
+            lines.append(f"{valid.valid_path()} = true;")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, eq=True)
+class LoadEvent(CodeLeaf):
+    """Writes the fields of a call struct into the externals of its call group"""
+
+    group_name: str
+    event: str
+
+    def generate_code(self) -> str:
+        return f"self.{load_function_name(self.group_name)}({self.event});"
+
+
+@dataclass(frozen=True, eq=True)
+class ResetVariables(CodeLeaf):
+    """Restores every per-call variable and validity flag of a tree to its
+    initial value, so nothing one event computes leaks into the next"""
+
+    tree: TreeNode
+
+    def generate_code(self) -> str:
+        resets = [leaf.generate_reset_code() for leaf in find_global_inits(self.tree)]
+        return "\n".join(reset for reset in resets if reset is not None)
+
+
+@dataclass(frozen=True, eq=True)
+class EventBatchEntry(CodeTree):
+    """Runs the call tree of a call group for every event of a slice, in order.
+
+    Every event but the last runs the leading calls, which leave out calls whose
+    results would be overwritten before being observed. The last event runs
+    every call. Both share hoisted variables, which are reset for every event"""
+
+    group_name: str
+    struct_name: str
+    field_mapping: Tuple[Tuple[str, str], ...]
+    leading: TreeNode
+    last: TreeNode
+
+    def params(self) -> str:
+        return f"{EVENTS_NAME}: &[{self.struct_name}]"
+
+    def load_params(self) -> str:
+        return f"{EVENT_NAME}: &{self.struct_name}"
+
+    def loader(self) -> LoadExternals:
+        return LoadExternals(field_mapping=self.field_mapping)
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return [
+            LineLiteral(
+                f"let Some(({_LAST_LOCAL}, {_REST_LOCAL})) = {EVENTS_NAME}.split_last() else {{\n"
+                "    return;\n"
+                "};"
+            ),
+            LineLiteral(f"for {_EVENT_LOCAL} in {_REST_LOCAL} {{"),
+            LoadEvent(group_name=self.group_name, event=_EVENT_LOCAL),
+            ResetVariables(self.leading),
+            self.leading,
+            LineLiteral("}"),
+            LoadEvent(group_name=self.group_name, event=_LAST_LOCAL),
+            ResetVariables(self.last),
+            self.last,
+        ]
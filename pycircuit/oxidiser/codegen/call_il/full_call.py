@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List, Optional
 from pycircuit.oxidiser.codegen.call_il.dispatch import CallDispatch
+from pycircuit.oxidiser.codegen.call_il.instrument import InstrumentedDispatch
 
 from pycircuit.oxidiser.codegen.call_il.input import CallInputSet
 from pycircuit.oxidiser.codegen.call_il.output import CallOutputSet
@@ -10,7 +11,7 @@ from pycircuit.oxidiser.codegen.tree.tree_node import CodeTree, TreeNode
 @dataclass(frozen=True, eq=True)
 class FullCall(CodeTree):
 
-    dispatch: CallDispatch
+    dispatch: CallDispatch | InstrumentedDispatch
 
     inputs: Optional[CallInputSet]
     outputs: Optional[CallOutputSet]
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import List
+
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+from pycircuit.oxidiser.graph.variable import AlwaysValid, GraphVariable
+
+
+@dataclass(frozen=True, eq=True)
+class FusedCallLeaf(CodeLeaf):
+    call: "FusedCall"
+
+    def generate_code(self) -> str:
+        output = self.call.output
+        valid_lines = [f"{output.var.var_path()} = {self.call.expression};"]
+        invalid_lines = []
+
+        match output.valid:
+            case AlwaysValid():
+                pass
+            case valid_var:
+                valid_lines.append(f"{valid_var.valid_path()} = true;")
+                invalid_lines.append(f"{valid_var.valid_path()} = false;")
+
+        checks = [
+            leaf.valid.valid_path()
+            for leaf in self.call.leaves
+            if not isinstance(leaf.valid, AlwaysValid)
+        ]
+
+        if not checks:
+            return "\n".join(valid_lines)
+
+        lines = [f"if {' && '.join(checks)} {{", *valid_lines]
+        if invalid_lines:
+            lines += ["} else {", *invalid_lines]
+        lines.append("}")
+
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, eq=True)
+class FusedCall(CodeTree):
+    """A chain of arithmetic components computed inline with a single validity check"""
+
+    leaves: List[GraphVariable]
+    output: GraphVariable
+    expression: str
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return [*self.leaves, self.output, FusedCallLeaf(self)]
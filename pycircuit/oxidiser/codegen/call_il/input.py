@@ -1,8 +1,10 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
+from pycircuit.oxidiser.codegen.call_il.soa import SoaInput
 from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+from pycircuit.oxidiser.graph.cold import BranchHint
 
-from pycircuit.oxidiser.graph.variable import GraphVariable
+from pycircuit.oxidiser.graph.variable import AlwaysValid, GraphVariable
 
 _RAW_INPUT_HEADER = "__raw_input_"
 
@@ -13,10 +15,17 @@ INPUT_STRUCT_NAME: str = "__inputs"
 class SingleInputLeaf(CodeLeaf):
     input: "SingleInput"
 
-    # TODO support always valid inputs
     def generate_code(self) -> str:
+        if isinstance(self.input.variable.valid, AlwaysValid):
+            return f"""\
+let {self.input.local_path()}: Option<&_> = Some(& {self.input.variable.var.var_path()});\
+"""
+
+        condition = self.input.variable.valid.valid_path()
+        if self.input.valid_hint is not None:
+            condition = self.input.valid_hint.wrap(condition)
         return f"""\
-let {self.input.local_path()}: Option<&_> = if {self.input.variable.valid.valid_path()} {{
+let {self.input.local_path()}: Option<&_> = if {condition} {{
     Some(& {self.input.variable.var.var_path()})
 }} else {{
     None
@@ -29,6 +38,9 @@ class SingleInput(CodeTree):
     variable: GraphVariable
     input_name: str
 
+    # Branch layout hint for the validity check, usually from replay statistics
+    valid_hint: Optional[BranchHint] = None
+
     def get_tree_children(self) -> List[TreeNode]:
         return [
             self.variable,
@@ -58,7 +70,7 @@ let {INPUT_STRUCT_NAME} = {self.input_set.input_struct_name} {{
 
 @dataclass(frozen=True, eq=True)
 class CallInputSet(CodeTree):
-    inputs: List[SingleInput]
+    inputs: List[SingleInput | SoaInput]
     input_struct_name: str
 
     def get_tree_children(self) -> List[TreeNode]:
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import Component
+from pycircuit.circuit_builder.definition import CallSpec
+from pycircuit.oxidiser.codegen.call_il.dispatch import CallDispatch
+from pycircuit.oxidiser.codegen.tree.line_literal import LineLiteral
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeTree, TreeNode
+from pycircuit.oxidiser.graph.callset import callset_key
+
+INSTRUMENT_MODULE = "::pycircuit_rs::instrument"
+
+# HACK MOVE THIS VAR, same as the one in variable
+_OUTPUT_NAME = "outputs"
+INSTRUMENTATION_FIELD = "instrumentation"
+
+_CALL_START_NAME = "__call_start"
+
+
+@dataclass(frozen=True, eq=True)
+class InstrumentationSlot(DataClassJsonMixin):
+    slot: int
+    component: str
+    callset: str
+    call: str
+
+
+@dataclass(frozen=True, eq=True)
+class InstrumentedDispatch(CodeTree):
+    """Counts, and optionally times, a single dispatch into its slot"""
+
+    dispatch: CallDispatch
+    slot: InstrumentationSlot
+    timed: bool
+
+    def get_tree_children(self) -> List[TreeNode]:
+        stats_path = f"self.{_OUTPUT_NAME}.{INSTRUMENTATION_FIELD}"
+        if self.timed:
+            return [
+                LineLiteral(f"let {_CALL_START_NAME} = {INSTRUMENT_MODULE}::now();"),
+                self.dispatch,
+                LineLiteral(
+                    f"{stats_path}.record({self.slot.slot}, {_CALL_START_NAME});"
+                ),
+            ]
+        else:
+            return [
+                self.dispatch,
+                LineLiteral(f"{stats_path}.count({self.slot.slot});"),
+            ]
+
+
+@dataclass
+class InstrumentationMetadata(DataClassJsonMixin):
+    """Maps the counter slots of the generated code back to the circuit"""
+
+    timed: bool
+    slots: List[InstrumentationSlot]
+
+
+@dataclass
+class InstrumentationOptions(DataClassJsonMixin):
+    """Which calls to instrument in generated call trees
+
+    Attributes:
+
+        components: Names of components to instrument, or None for all of them
+
+        definitions: Names of definitions whose components should be instrumented,
+                     or None for all of them. A call is instrumented if it matches both
+
+        timed: Whether to record elapsed cycles as well as call counts
+    """
+
+    components: Optional[FrozenSet[str]] = None
+    definitions: Optional[FrozenSet[str]] = None
+    timed: bool = True
+
+
+class Instrumentation:
+    """Allocates counter slots to instrumented calls across all of a circuit's trees"""
+
+    def __init__(self, circuit: CircuitData, options: InstrumentationOptions):
+        self._options = options
+        self._definition_names = {
+            definition: name for (name, definition) in circuit.definitions.items()
+        }
+        self._slots: Dict[tuple[str, str, str], InstrumentationSlot] = {}
+
+    def is_instrumented(self, component: Component) -> bool:
+        components = self._options.components
+        definitions = self._options.definitions
+
+        if components is not None and component.name not in components:
+            return False
+
+        if definitions is not None:
+            return self._definition_names.get(component.definition) in definitions
+
+        return True
+
+    def slot_for(
+        self, component: Component, callset: CallSpec, call: str
+    ) -> Optional[InstrumentationSlot]:
+        if not self.is_instrumented(component):
+            return None
+
+        key = (component.name, callset_key(callset), call)
+        if key not in self._slots:
+            self._slots[key] = InstrumentationSlot(
+                slot=len(self._slots),
+                component=component.name,
+                callset=callset_key(callset),
+                call=call,
+            )
+        return self._slots[key]
+
+    def instrument(
+        self, dispatch: CallDispatch, component: Component, callset: CallSpec
+    ) -> CallDispatch | InstrumentedDispatch:
+        slot = self.slot_for(component, callset, dispatch.call_name)
+        if slot is None:
+            return dispatch
+        return InstrumentedDispatch(
+            dispatch=dispatch, slot=slot, timed=self._options.timed
+        )
+
+    def stats_type(self) -> str:
+        return f"{INSTRUMENT_MODULE}::CallStats<{len(self._slots)}>"
+
+    def metadata(self) -> InstrumentationMetadata:
+        return InstrumentationMetadata(
+            timed=self._options.timed, slots=list(self._slots.values())
+        )
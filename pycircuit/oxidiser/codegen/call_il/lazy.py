@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import List
+
+from pycircuit.oxidiser.codegen.tree.line_literal import LineLiteral
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+
+# HACK MOVE THIS VAR, same as the one in variable
+_OUTPUT_NAME = "outputs"
+
+_DIRTY_SUFFIX = "_dirty"
+_DIRTY_LOCAL = "__dirty"
+_REFRESH_HEADER = "refresh_"
+
+
+def dirty_field_name(component_name: str) -> str:
+    return f"{component_name}{_DIRTY_SUFFIX}"
+
+
+def dirty_path(component_name: str) -> str:
+    return f"self.{_OUTPUT_NAME}.{dirty_field_name(component_name)}"
+
+
+def refresh_function_name(component_name: str) -> str:
+    return f"{_REFRESH_HEADER}{component_name}"
+
+
+@dataclass(frozen=True, eq=True)
+class MarkDirty(CodeLeaf):
+    """Takes the place of a call to a lazy component"""
+
+    component_name: str
+    bit: int
+
+    def generate_code(self) -> str:
+        return f"{dirty_path(self.component_name)} |= 1 << {self.bit};"
+
+
+@dataclass(frozen=True, eq=True)
+class RefreshLazy(CodeLeaf):
+    """Recomputes a lazy component before its outputs are read"""
+
+    component_name: str
+
+    def generate_code(self) -> str:
+        return f"self.{refresh_function_name(self.component_name)}();"
+
+
+@dataclass(frozen=True, eq=True)
+class DirtyCalls(CodeTree):
+    """The calls of a single deferred callset, made if its bit is dirty"""
+
+    bit: int
+    calls: List[TreeNode]
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return (
+            [LineLiteral(f"if {_DIRTY_LOCAL} & (1 << {self.bit}) != 0 {{")]
+            + self.calls
+            + [LineLiteral("}")]
+        )
+
+
+@dataclass(frozen=True, eq=True)
+class LazyRefresh(CodeTree):
+    """Body of the function recomputing a lazy component.
+
+    The dirty mask is cleared before anything is called, and lazy parents
+    are refreshed before the deferred callsets are called in order"""
+
+    component_name: str
+    parents: List[RefreshLazy]
+    dirty_calls: List[DirtyCalls]
+
+    def get_tree_children(self) -> List[TreeNode]:
+        path = dirty_path(self.component_name)
+        return [
+            LineLiteral(f"let {_DIRTY_LOCAL} = {path};"),
+            LineLiteral(f"if {_DIRTY_LOCAL} == 0 {{\n    return;\n}}"),
+            LineLiteral(f"{path} = 0;"),
+            *self.parents,
+            *self.dirty_calls,
+        ]
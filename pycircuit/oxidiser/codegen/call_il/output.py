@@ -99,7 +99,7 @@ class OutputValidSet(CodeLeaf):
                 case valid_var:
                     path = valid_var.valid_path()
                     valid_lines.append(
-                        f"{path} = {OUTPUT_VALID_RETURN_NAME}.{output.output_name}"
+                        f"{path} = {OUTPUT_VALID_RETURN_NAME}.{output.output_name};"
                     )
 
         return "\n".join(valid_lines)
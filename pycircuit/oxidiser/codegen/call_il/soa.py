@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+from pycircuit.oxidiser.graph.packing import PackedElement
+from pycircuit.oxidiser.graph.variable import GraphVariable, PerCallVar
+
+SOA_MODULE = "::pycircuit_rs::soa"
+
+_RAW_INPUT_HEADER = "__raw_input_"
+_MASK_WORD_BITS = 64
+
+
+def _mask_words(length: int) -> int:
+    return max(1, (length + _MASK_WORD_BITS - 1) // _MASK_WORD_BITS)
+
+
+@dataclass(frozen=True, eq=True)
+class SoaFieldLeaf(CodeLeaf):
+    field: "SoaField"
+
+    def generate_code(self) -> str:
+        variables = self.field.variables
+        words = _mask_words(len(variables))
+        local = self.field.local_path()
+
+        lines = []
+        values = self.field.packed_array()
+        if values is None:
+            gathered = ", ".join(
+                f"{variable.var.var_path()}.clone()" for variable in variables
+            )
+            lines.append(f"let {local}_values = [{gathered}];")
+            values = f"{local}_values"
+
+        word_exprs = []
+        for word in range(words):
+            bits = [
+                f"(({variable.valid.valid_path()} as u64) << {idx % _MASK_WORD_BITS})"
+                for (idx, variable) in enumerate(variables)
+                if idx // _MASK_WORD_BITS == word
+            ]
+            word_exprs.append(" | ".join(bits) or "0")
+        words_str = ",\n".join(f"    {word}" for word in word_exprs)
+
+        lines.append(f"""\
+let {local}_valid = {SOA_MODULE}::ValidMask::<{words}>::from_words([
+{words_str}
+]);
+let {local} = {SOA_MODULE}::SoaArray::new(&{values}, &{local}_valid);\
+""")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, eq=True)
+class SoaField(CodeTree):
+    """One field of every element of an array input, packed into a contiguous array.
+
+    Elements written straight into a packed array are passed as is, see graph.packing.
+    Otherwise, like for stored outputs, each element is cloned into a local array"""
+
+    variables: List[GraphVariable]
+    input_name: str
+    field_name: str
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return [*self.variables, SoaFieldLeaf(self)]
+
+    def packed_array(self) -> Optional[str]:
+        "The array holding exactly the elements of the field in order, if any"
+        packed = [
+            variable.var.packed if isinstance(variable.var, PerCallVar) else None
+            for variable in self.variables
+        ]
+        if not packed or packed[0] is None:
+            return None
+        array = packed[0].array
+        in_order = [
+            PackedElement(array=array, index=index, length=len(packed))
+            for index in range(len(packed))
+        ]
+        return array if packed == in_order else None
+
+    def local_path(self) -> str:
+        # Array inputs without named fields have a single field named after the input
+        if self.field_name == self.input_name:
+            return _RAW_INPUT_HEADER + self.input_name
+        return f"{_RAW_INPUT_HEADER}{self.input_name}_{self.field_name}"
+
+
+@dataclass(frozen=True, eq=True)
+class SoaInputLeaf(CodeLeaf):
+    input: "SoaInput"
+
+    def generate_code(self) -> str:
+        fields = ", ".join(field.local_path() for field in self.input.fields)
+        return f"let {self.input.local_path()} = ({fields});"
+
+
+@dataclass(frozen=True, eq=True)
+class SoaInput(CodeTree):
+    """An array input passed as struct-of-arrays.
+
+    An input with a single field is passed as that field's SoaArray,
+    and one with several as a tuple of SoaArrays sorted by field name"""
+
+    fields: List[SoaField]
+    input_name: str
+
+    def get_tree_children(self) -> List[TreeNode]:
+        children: List[TreeNode] = list(self.fields)
+        if len(self.fields) > 1:
+            children.append(SoaInputLeaf(self))
+        return children
+
+    def local_path(self) -> str:
+        if len(self.fields) == 1:
+            return self.fields[0].local_path()
+        return _RAW_INPUT_HEADER + self.input_name
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.oxidiser.codegen.tree.line_literal import LineLiteral
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeLeaf, CodeTree, TreeNode
+
+# HACK MOVE THIS VAR, same as the one in variable
+_OUTPUT_NAME = "outputs"
+
+_PENDING_SUFFIX = "_pending"
+_EVENTS_SUFFIX = "_events"
+_PENDING_LOCAL_HEADER = "__pending_"
+_FLUSH_HEADER = "flush_"
+
+
+def pending_field_name(component_name: str) -> str:
+    return f"{component_name}{_PENDING_SUFFIX}"
+
+
+def events_field_name(throttle_name: str) -> str:
+    return f"{throttle_name}{_EVENTS_SUFFIX}"
+
+
+def flush_function_name(throttle_name: str) -> str:
+    return f"{_FLUSH_HEADER}{throttle_name}"
+
+
+def flush_intervals(circuit: CircuitData) -> Dict[str, int]:
+    """Maps the flush function of every timed throttle to its interval in microseconds,
+    for the host to schedule on its timer queue"""
+    return {
+        flush_function_name(name): throttle.interval_us
+        for (name, throttle) in circuit.throttles.items()
+        if throttle.interval_us is not None
+    }
+
+
+def _pending_path(component_name: str) -> str:
+    return f"self.{_OUTPUT_NAME}.{pending_field_name(component_name)}"
+
+
+def _pending_local(component_name: str) -> str:
+    return f"{_PENDING_LOCAL_HEADER}{component_name}"
+
+
+@dataclass(frozen=True, eq=True)
+class MarkPending(CodeLeaf):
+    """Takes the place of a call to a throttled root"""
+
+    component_name: str
+    bit: int
+
+    def generate_code(self) -> str:
+        return f"{_pending_path(self.component_name)} |= 1 << {self.bit};"
+
+
+@dataclass(frozen=True, eq=True)
+class CountEvent(CodeLeaf):
+    """Counts a trigger of a throttle flushed every few events, flushing when due"""
+
+    throttle_name: str
+    every_events: int
+
+    def generate_code(self) -> str:
+        path = f"self.{_OUTPUT_NAME}.{events_field_name(self.throttle_name)}"
+        return f"""\
+{path} += 1;
+if {path} >= {self.every_events} {{
+    {path} = 0;
+    self.{flush_function_name(self.throttle_name)}();
+}}\
+"""
+
+
+@dataclass(frozen=True, eq=True)
+class PendingCalls(CodeTree):
+    """The calls of a single pending callset of a root, made if its bit is set"""
+
+    component_name: str
+    bit: int
+    calls: List[TreeNode]
+
+    def get_tree_children(self) -> List[TreeNode]:
+        local = _pending_local(self.component_name)
+        return (
+            [LineLiteral(f"if {local} & (1 << {self.bit}) != 0 {{")]
+            + self.calls
+            + [LineLiteral("}")]
+        )
+
+
+@dataclass(frozen=True, eq=True)
+class ThrottleFlush(CodeTree):
+    """Body of the function flushing a throttle.
+
+    Returns early if nothing is pending. Otherwise every pending mask is cleared,
+    the pending callsets of each root are called, and then the subgraph below them"""
+
+    root_names: List[str]
+    pending_calls: List[PendingCalls]
+    children: TreeNode
+
+    def get_tree_children(self) -> List[TreeNode]:
+        loads = [
+            LineLiteral(f"let {_pending_local(name)} = {_pending_path(name)};")
+            for name in self.root_names
+        ]
+        none_pending = " && ".join(
+            f"{_pending_local(name)} == 0" for name in self.root_names
+        )
+        clears = [
+            LineLiteral(f"{_pending_path(name)} = 0;") for name in self.root_names
+        ]
+        return [
+            *loads,
+            LineLiteral(f"if {none_pending} {{\n    return;\n}}"),
+            *clears,
+            *self.pending_calls,
+            self.children,
+        ]
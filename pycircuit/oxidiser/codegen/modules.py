@@ -0,0 +1,194 @@
+from dataclasses import dataclass, field
+import os
+from typing import Dict, List, Optional, Tuple
+
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.oxidiser.codegen.call_il.event_batch import (
+    EventBatchEntry,
+    batch_entry_name,
+    load_function_name,
+)
+from pycircuit.oxidiser.codegen.call_il.instrument import Instrumentation
+from pycircuit.oxidiser.codegen.struct_il.outputs_struct import generate_outputs_struct
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import TYPES_MODULE
+from pycircuit.oxidiser.codegen.tree.tree_node import TreeNode, generate_code_from_tree
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+
+CIRCUIT_STRUCT = "Circuit"
+OUTPUTS_MODULE = "_outputs"
+
+_TREE_MODULE_HEADER = "_tree_"
+_TYPES_CHUNK_HEADER = "_types_"
+_BATCH_MODULE_HEADER = "_batch_"
+
+
+@dataclass
+class ModuleOptions(DataClassJsonMixin):
+    """How generated code is split into modules
+
+    Attributes:
+
+        max_module_lines: Most lines a single module may have, or None for no limit.
+                          Type aliases are split into as many modules as needed
+                          to stay under it. Every call tree is a single function
+                          in its own module, and can't be split since every call
+                          in it shares the variables initialized at its top.
+                          So for trees this is a budget per tree, and trees
+                          over it are an error rather than being split
+    """
+
+    max_module_lines: Optional[int] = None
+
+
+@dataclass
+class GeneratedModules:
+    """Generated code split into modules which rustc can compile in parallel.
+
+    Every call tree gets its own module, so changing a single event path only
+    changes a single module. Shared type aliases and the outputs struct
+    are in modules of their own"""
+
+    modules: Dict[str, str] = field(default_factory=dict)
+
+    def root_module(self) -> str:
+        """Declares every module, to be included from the circuit's own module"""
+        lines = [f"mod {name};" for name in self.modules.keys()]
+        lines.append(f"use {OUTPUTS_MODULE}::*;")
+        return "\n".join(lines)
+
+    def write_to(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for (name, code) in self.modules.items():
+            with open(os.path.join(directory, f"{name}.rs"), "w") as module_file:
+                module_file.write(code + "\n")
+        with open(os.path.join(directory, "mod.rs"), "w") as root_file:
+            root_file.write(self.root_module() + "\n")
+
+
+def _line_count(code: str) -> int:
+    return len(code.splitlines())
+
+
+def _indent(code: str, indent: str) -> str:
+    return "\n".join(f"{indent}{line}" if line else line for line in code.split("\n"))
+
+
+def generate_tree_function(name: str, tree: TreeNode, params: str = "") -> str:
+    body = _indent(generate_code_from_tree(tree), "    ")
+    self_params = ", ".join(["&mut self"] + ([params] if params else []))
+    return f"""\
+pub fn {name}({self_params}) {{
+{body}
+}}\
+"""
+
+
+def generate_impl_module(functions: List[str]) -> str:
+    "A module adding functions to the circuit"
+    body = _indent("\n\n".join(functions), "    ")
+    return f"""\
+use super::*;
+
+impl super::{CIRCUIT_STRUCT} {{
+{body}
+}}\
+"""
+
+
+def generate_tree_module(name: str, tree: TreeNode, params: str = "") -> str:
+    return generate_impl_module([generate_tree_function(name, tree, params)])
+
+
+def _chunk_lines(lines: List[str], max_lines: Optional[int]) -> List[List[str]]:
+    if max_lines is None or len(lines) <= max_lines:
+        return [lines]
+    return [lines[idx : idx + max_lines] for idx in range(0, len(lines), max_lines)]
+
+
+def generate_types_modules(
+    circuit_meta: CircuitMetadata, max_lines: Optional[int]
+) -> Dict[str, str]:
+    typedefs = circuit_meta.type_aliases.generate_typedefs()
+    header = ["use super::*;", ""]
+
+    # Leave room for the header in every chunk
+    chunk_size = None if max_lines is None else max(1, max_lines - len(header))
+    chunks = _chunk_lines(typedefs, chunk_size)
+
+    if len(chunks) == 1:
+        return {TYPES_MODULE: "\n".join(header + chunks[0])}
+
+    modules = {
+        f"{_TYPES_CHUNK_HEADER}{idx}": "\n".join(header + chunk)
+        for (idx, chunk) in enumerate(chunks)
+    }
+
+    # Aliases are referred to through the types module, which re-exports every chunk
+    modules[TYPES_MODULE] = "\n".join(
+        f"pub use super::{name}::*;" for name in modules.keys()
+    )
+
+    return modules
+
+
+def generate_modules(
+    circuit_meta: CircuitMetadata,
+    trees: Dict[str, TreeNode],
+    options: Optional[ModuleOptions] = None,
+    event_batches: Optional[List[EventBatchEntry]] = None,
+    instrumentation: Optional[Instrumentation] = None,
+) -> GeneratedModules:
+    """Splits the code generated for a circuit into modules.
+
+    Trees are the assembled call trees keyed by call group or timer name,
+    each of which becomes a method on the circuit with the same name.
+    Event batches become a method named after their call group with a batch suffix.
+    Instrumentation is whatever the trees were assembled with, and adds its call
+    stats to the outputs struct"""
+
+    if options is None:
+        options = ModuleOptions()
+    if event_batches is None:
+        event_batches = []
+
+    modules = generate_types_modules(circuit_meta, options.max_module_lines)
+
+    modules[OUTPUTS_MODULE] = "use super::*;\n\n" + generate_outputs_struct(
+        circuit_meta, instrumentation
+    )
+
+    # Module name, name of its main function and code of every function module
+    function_modules: List[Tuple[str, str, str]] = [
+        (f"{_TREE_MODULE_HEADER}{name}", name, generate_tree_module(name, tree))
+        for (name, tree) in trees.items()
+    ] + [
+        (
+            f"{_BATCH_MODULE_HEADER}{entry.group_name}",
+            batch_entry_name(entry.group_name),
+            generate_impl_module(
+                [
+                    generate_tree_function(
+                        load_function_name(entry.group_name),
+                        entry.loader(),
+                        entry.load_params(),
+                    ),
+                    generate_tree_function(
+                        batch_entry_name(entry.group_name), entry, entry.params()
+                    ),
+                ]
+            ),
+        )
+        for entry in event_batches
+    ]
+
+    max_lines = options.max_module_lines
+    for (module_name, name, code) in function_modules:
+        if max_lines is not None and _line_count(code) > max_lines:
+            raise ValueError(
+                f"Call tree {name} has {_line_count(code)} lines, over the budget of "
+                f"{max_lines} lines per module. Trees can't be split across modules"
+            )
+        modules[module_name] = code
+
+    return GeneratedModules(modules=modules)
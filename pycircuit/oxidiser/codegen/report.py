@@ -0,0 +1,259 @@
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Set
+import warnings
+
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.oxidiser.codegen.call_il.batch import (
+    BatchCall,
+    BatchDispatch,
+    BatchInputLeaf,
+)
+from pycircuit.oxidiser.codegen.call_il.dispatch import CallDispatch
+from pycircuit.oxidiser.codegen.call_il.full_call import FullCall
+from pycircuit.oxidiser.codegen.call_il.input import SingleInputLeaf
+from pycircuit.oxidiser.codegen.call_il.instrument import InstrumentedDispatch
+from pycircuit.oxidiser.codegen.struct_il.typedefs.struct_typedef import (
+    ComponentTypedefLeaf,
+)
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_aliases import TypeAliases
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import TypeKey
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import get_component_path
+from pycircuit.oxidiser.codegen.tree.tree_node import (
+    CodeTree,
+    GlobalInitLeaf,
+    TreeNode,
+    generate_body_from_tree,
+    generate_code_from_tree,
+)
+
+
+@dataclass
+class TreeReport(DataClassJsonMixin):
+    """What a single generated call tree (a call group or timer) emits
+
+    Attributes:
+
+        lines: Lines of generated code, including hoisted variable initialization
+
+        optional_inputs: Number of Option<&_> inputs built for calls
+
+        global_inits: Number of distinct variables initialized at the top of the tree
+    """
+
+    lines: int
+    optional_inputs: int
+    global_inits: int
+
+
+@dataclass
+class DefinitionReport(DataClassJsonMixin):
+    """What the components of a single definition cost in type definitions
+
+    Attributes:
+
+        components: Number of components of the definition
+
+        distinct_types: Number of distinct monomorphized types the aliases resolve to
+
+        typedef_lines: Lines of the shared type aliases for those types
+
+        call_lines: Lines of the calls into its components across every call tree,
+                    including building their inputs and outputs but not the
+                    variables initialized at the top of each tree. Fused arithmetic
+                    is inlined rather than called, so isn't counted
+    """
+
+    components: int
+    distinct_types: int
+    typedef_lines: int = 0
+    call_lines: int = 0
+
+
+@dataclass
+class EmissionBudget(DataClassJsonMixin):
+    """Limits on generated code. Unset limits aren't checked
+
+    Attributes:
+
+        max_tree_lines: Most lines a single call tree may emit
+
+        max_total_lines: Most lines all call trees may emit together
+
+        max_distinct_types: Most distinct monomorphized component types
+
+        max_optional_inputs: Most Option<&_> inputs a single call tree may build
+
+        max_global_inits: Most variables a single call tree may initialize
+
+        fail: Whether exceeding the budget raises, instead of warning
+    """
+
+    max_tree_lines: Optional[int] = None
+    max_total_lines: Optional[int] = None
+    max_distinct_types: Optional[int] = None
+    max_optional_inputs: Optional[int] = None
+    max_global_inits: Optional[int] = None
+    fail: bool = False
+
+
+@dataclass
+class EmissionReport(DataClassJsonMixin):
+    """Size of the code generated for a circuit, to keep compile times in check"""
+
+    trees: Dict[str, TreeReport] = field(default_factory=dict)
+    definitions: Dict[str, DefinitionReport] = field(default_factory=dict)
+
+    def total_lines(self) -> int:
+        return sum(tree.lines for tree in self.trees.values())
+
+    def distinct_types(self) -> int:
+        return sum(
+            definition.distinct_types for definition in self.definitions.values()
+        )
+
+    def typedef_lines(self) -> int:
+        return sum(definition.typedef_lines for definition in self.definitions.values())
+
+    def violations(self, budget: EmissionBudget) -> List[str]:
+        def over(value: int, limit: Optional[int]) -> bool:
+            return limit is not None and value > limit
+
+        violations = []
+
+        for (name, tree) in self.trees.items():
+            if over(tree.lines, budget.max_tree_lines):
+                violations.append(
+                    f"Tree {name} emits {tree.lines} lines, over the budget of {budget.max_tree_lines}"
+                )
+            if over(tree.optional_inputs, budget.max_optional_inputs):
+                violations.append(
+                    f"Tree {name} builds {tree.optional_inputs} optional inputs, over the budget of {budget.max_optional_inputs}"
+                )
+            if over(tree.global_inits, budget.max_global_inits):
+                violations.append(
+                    f"Tree {name} initializes {tree.global_inits} variables, over the budget of {budget.max_global_inits}"
+                )
+
+        if over(self.total_lines(), budget.max_total_lines):
+            violations.append(
+                f"Trees emit {self.total_lines()} lines, over the budget of {budget.max_total_lines}"
+            )
+
+        if over(self.distinct_types(), budget.max_distinct_types):
+            violations.append(
+                f"Circuit has {self.distinct_types()} distinct component types, over the budget of {budget.max_distinct_types}"
+            )
+
+        return violations
+
+    def enforce(self, budget: EmissionBudget):
+        violations = self.violations(budget)
+        if not violations:
+            return
+
+        message = "Generated code is over budget:\n" + "\n".join(violations)
+        if budget.fail:
+            raise ValueError(message)
+        else:
+            warnings.warn(message)
+
+
+def report_tree(tree: TreeNode) -> TreeReport:
+    optional_inputs = 0
+    global_inits: Set[Hashable] = set()
+
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        match node:
+            case SingleInputLeaf():
+                optional_inputs += 1
+            case BatchInputLeaf(input=batch_input):
+                optional_inputs += len(batch_input.variables)
+            case GlobalInitLeaf():
+                global_inits.add(node.key())
+        if isinstance(node, CodeTree):
+            stack += node.get_tree_children()
+
+    return TreeReport(
+        lines=len(generate_code_from_tree(tree).splitlines()),
+        optional_inputs=optional_inputs,
+        global_inits=len(global_inits),
+    )
+
+
+def _report_call_lines(
+    circuit: CircuitData, trees: Dict[str, TreeNode]
+) -> Dict[str, int]:
+    "Lines of the calls into each component, keyed by component name"
+    components = {
+        get_component_path(component): component.name
+        for component in circuit.components.values()
+    }
+
+    call_lines: Dict[str, int] = {}
+    stack = list(trees.values())
+    while stack:
+        node = stack.pop()
+        match node:
+            case FullCall(
+                dispatch=CallDispatch(path=path)
+                | InstrumentedDispatch(dispatch=CallDispatch(path=path))
+            ) | BatchCall(dispatch=BatchDispatch(component_paths=[path, *_])):
+                # A batch is of a single type, so all of it goes to its first component
+                name = components[path]
+                lines = len(generate_body_from_tree(node).splitlines())
+                call_lines[name] = call_lines.get(name, 0) + lines
+            case CodeTree():
+                stack += node.get_tree_children()
+
+    return call_lines
+
+
+def report_definitions(
+    circuit: CircuitData,
+    trees: Dict[str, TreeNode],
+    aliases: TypeAliases | None = None,
+) -> Dict[str, DefinitionReport]:
+    aliases = aliases or TypeAliases(circuit)
+    definition_names = {
+        definition: name for (name, definition) in circuit.definitions.items()
+    }
+    call_lines = _report_call_lines(circuit, trees)
+
+    reports: Dict[str, DefinitionReport] = {}
+    types: Dict[str, Set[TypeKey]] = {}
+
+    for component in circuit.components.values():
+        name = definition_names[component.definition]
+        report = reports.setdefault(
+            name, DefinitionReport(components=0, distinct_types=0)
+        )
+        report.components += 1
+        report.call_lines += call_lines.get(component.name, 0)
+
+        # Components of the same type share a single alias
+        key = aliases.type_key(component)
+        if key not in types.setdefault(name, set()):
+            types[name].add(key)
+            report.distinct_types += 1
+            typedef = ComponentTypedefLeaf(aliases, component).generate_code()
+            report.typedef_lines += len(typedef.splitlines())
+
+    return {name: reports[name] for name in sorted(reports.keys())}
+
+
+def build_emission_report(
+    circuit: CircuitData,
+    trees: Dict[str, TreeNode],
+    aliases: TypeAliases | None = None,
+) -> EmissionReport:
+    """Reports on the generated code for a circuit.
+
+    Trees are the assembled call trees keyed by call group or timer name"""
+    return EmissionReport(
+        trees={name: report_tree(tree) for (name, tree) in trees.items()},
+        definitions=report_definitions(circuit, trees, aliases),
+    )
@@ -0,0 +1,82 @@
+from typing import List, Optional
+
+from pycircuit.circuit_builder.component import GraphOutput
+from pycircuit.oxidiser.codegen.call_il.event_batch import (
+    external_field,
+    external_valid_field,
+    loaded_externals,
+)
+from pycircuit.oxidiser.codegen.call_il.instrument import (
+    INSTRUMENTATION_FIELD,
+    Instrumentation,
+)
+from pycircuit.oxidiser.codegen.call_il.lazy import dirty_field_name
+from pycircuit.oxidiser.codegen.call_il.throttle import (
+    events_field_name,
+    pending_field_name,
+)
+from pycircuit.oxidiser.graph.annotate_components import output_to_var
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.graph.lazy import find_lazy_components
+from pycircuit.oxidiser.graph.variable import StoredValid, StoredVar
+
+OUTPUTS_STRUCT = "Outputs"
+
+
+def generate_outputs_struct(
+    circuit_meta: CircuitMetadata, instrumentation: Optional[Instrumentation] = None
+) -> str:
+    """The struct holding every output stored across calls, along with its validity,
+    the externals loaded from call structs and the dirty and pending masks
+    of lazy and throttled components.
+
+    With instrumentation it also holds the call stats, so it must be generated
+    after every tree has been assembled and allocated its slots"""
+
+    stored_outputs = sorted(
+        (
+            output
+            for output in circuit_meta.non_ephemeral_outputs
+            if isinstance(output, GraphOutput)
+        ),
+        key=lambda output: (output.parent, output.output_name),
+    )
+
+    fields: List[str] = []
+    for output in stored_outputs:
+        variable = output_to_var(circuit_meta, output)
+        match variable.var:
+            case StoredVar() as stored:
+                var_type = circuit_meta.type_aliases.type_for_output(output)
+                fields.append(f"    pub {stored.field_name()}: {var_type},")
+        match variable.valid:
+            case StoredValid() as stored_valid:
+                fields.append(f"    pub {stored_valid.field_name()}: bool,")
+
+    for name in loaded_externals(circuit_meta.circuit):
+        external_type = circuit_meta.circuit.external_inputs[name].type
+        fields.append(f"    pub {external_field(name).field_name()}: {external_type},")
+        fields.append(f"    pub {external_valid_field(name).field_name()}: bool,")
+
+    for name in find_lazy_components(circuit_meta.circuit):
+        fields.append(f"    pub {dirty_field_name(name)}: u32,")
+
+    for (name, throttle) in circuit_meta.circuit.throttles.items():
+        for component_name in throttle.components:
+            fields.append(f"    pub {pending_field_name(component_name)}: u32,")
+        if throttle.every_events is not None:
+            fields.append(f"    pub {events_field_name(name)}: u32,")
+
+    if instrumentation is not None:
+        fields.append(
+            f"    pub {INSTRUMENTATION_FIELD}: {instrumentation.stats_type()},"
+        )
+
+    fields_str = "\n".join(fields)
+
+    return f"""\
+#[derive(Default)]
+pub struct {OUTPUTS_STRUCT} {{
+{fields_str}
+}}\
+"""
@@ -0,0 +1,103 @@
+from typing import Dict, List
+
+from pycircuit.circuit_builder.circuit import CircuitData, Component
+from pycircuit.circuit_builder.component import (
+    ComponentOutput,
+    ExternalOutput,
+    GraphOutput,
+)
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import (
+    EXPORT_TAIL,
+    TYPES_MODULE,
+    TypeKey,
+    TypeSuffix,
+    get_component_type_key,
+    output_name_to_export_trait,
+)
+
+
+class TypeAliases:
+    """Canonical type aliases for the components of a circuit.
+
+    Components which are the same class with the same generic argument types share
+    a single alias, and every type name is only resolved once"""
+
+    def __init__(self, circuit: CircuitData):
+        self._circuit = circuit
+        self._type_keys: Dict[str, TypeKey] = {}
+        self._alias_names: Dict[TypeKey, str] = {}
+        self._struct_types: Dict[TypeKey, str] = {}
+        self._output_types: Dict[ComponentOutput, str] = {}
+        self._class_counts: Dict[str, int] = {}
+
+    def type_key(self, component: Component) -> TypeKey:
+        return get_component_type_key(self._circuit, component, self._type_keys)
+
+    def alias_name(self, component: Component) -> str:
+        key = self.type_key(component)
+        if key not in self._alias_names:
+            self._name_aliases()
+        return self._alias_names[key]
+
+    def _name_aliases(self):
+        # Numbered in circuit order so names don't depend on what was looked up first
+        for component in self._circuit.components.values():
+            key = self.type_key(component)
+            if key not in self._alias_names:
+                class_name = component.definition.class_name
+                count = self._class_counts.get(class_name, 0)
+                self._class_counts[class_name] = count + 1
+                self._alias_names[key] = f"{class_name}{TypeSuffix}{count}"
+
+    def alias_for(self, component: Component) -> str:
+        return f"{TYPES_MODULE}::{self.alias_name(component)}"
+
+    def struct_type(self, component: Component) -> str:
+        key = self.type_key(component)
+        if key not in self._struct_types:
+            definition = component.definition
+            root_path = f"{definition.module}::{definition.class_name}"
+            gen_order = definition.generics_order
+            class_order = definition.class_generics
+
+            # Types of the generic inputs come first, then the class generics
+            sorted_generic_inputs = sorted(gen_order.keys(), key=lambda a: gen_order[a])
+            sorted_class_generics = sorted(
+                class_order.keys(), key=lambda a: class_order[a]
+            )
+            generics = [
+                self.type_for_output(component.inputs[input].outputs()[0])
+                for input in sorted_generic_inputs
+            ] + [component.class_generics[name] for name in sorted_class_generics]
+
+            if generics:
+                root_path = f"{root_path}::<{', '.join(generics)}>"
+
+            self._struct_types[key] = root_path
+        return self._struct_types[key]
+
+    def type_for_output(self, output: ComponentOutput) -> str:
+        if output not in self._output_types:
+            match output:
+                case ExternalOutput(external_name):
+                    the_type = self._circuit.external_inputs[external_name].type
+                case GraphOutput(parent, output_name):
+                    component = self._circuit.components[parent]
+                    module_path = component.definition.module
+                    class_name = component.definition.class_name
+                    export_trait = f"{module_path}::{class_name}{EXPORT_TAIL}"
+                    output_type = output_name_to_export_trait(output_name)
+                    the_type = f"<{self.alias_for(component)} as {export_trait}>::{output_type}"
+            self._output_types[output] = the_type
+        return self._output_types[output]
+
+    def generate_typedefs(self) -> List[str]:
+        """One alias per distinct instantiation, in circuit order"""
+        seen = set()
+        typedefs = []
+        for component in self._circuit.components.values():
+            name = self.alias_name(component)
+            if name not in seen:
+                seen.add(name)
+                typedefs.append(f"pub type {name} = {self.struct_type(component)};")
+        return typedefs
@@ -1,3 +1,5 @@
+from typing import Dict, Hashable, List, Optional
+
 from pycircuit.circuit_builder.circuit import CircuitData, Component
 from pycircuit.circuit_builder.component import (
     ComponentIndex,
@@ -15,41 +17,109 @@ from camel_converter import to_pascal
 
 TYPES_MODULE = "_types"
 INPUTS_MODULE = "_inputs"
-COMPONENT_TYPE = "_ComponentType"
 EXPORT_TAIL = "OutputExport"
 
 
 TypeSuffix = "Type"
 ValidSuffix = "Valid"
-
-
-def get_alias_for(component: Component) -> str:
-    return f"{TYPES_MODULE}::{component.name}::{COMPONENT_TYPE}"
+InputSuffix = "Input"
+OutputSuffix = "Output"
+OutputValidSuffix = "OutputValid"
 
 
 def output_name_to_export_trait(name: str):
     return to_pascal(name)
 
 
-def get_output_alias(component: Component, output: str):
-    component_path = get_alias_for(component)
-    output_type = output_name_to_export_trait(output)
+def get_component_valid_name(component: Component):
+    return f"{component.name}{ValidSuffix}"
+
+
+def get_input_struct_name(component: Component, call: str) -> str:
+    return f"{INPUTS_MODULE}::{component.name}::{to_pascal(call)}{InputSuffix}"
+
+
+def get_output_struct_name(component: Component, call: str) -> str:
+    return f"{INPUTS_MODULE}::{component.name}::{to_pascal(call)}{OutputSuffix}"
+
+
+def get_output_valid_struct_name(component: Component, call: str) -> str:
     module_path = component.definition.module
-    export_trait = f"{module_path}::{component.name}{EXPORT_TAIL}"
-    return f"<{component_path} as {export_trait}>::{output_type}"
+    class_name = component.definition.class_name
+    return f"{module_path}::{class_name}{to_pascal(call)}{OutputValidSuffix}"
 
 
-def get_type_for_output(circuit: CircuitData, output: ComponentOutput) -> str:
-    match output:
-        case ExternalOutput(type):
-            return circuit.external_inputs[type].type
-        case GraphOutput(parent, output_name):
-            return get_output_alias(circuit.components[parent], output_name)
+TypeKey = Hashable
 
 
-def get_component_type_name(component: Component):
-    return f"{component.name}{TypeSuffix}"
+def _generic_outputs(component: Component) -> List[ComponentOutput]:
+    gen_order = component.definition.generics_order
+    sorted_generic_inputs = sorted(gen_order.keys(), key=lambda a: gen_order[a])
+    return [component.inputs[input].outputs()[0] for input in sorted_generic_inputs]
 
 
-def get_component_valid_name(component: Component):
-    return f"{component.name}{ValidSuffix}"
+def get_component_type_key(
+    circuit: CircuitData,
+    component: Component,
+    cache: Optional[Dict[str, TypeKey]] = None,
+) -> TypeKey:
+    """Structural identity of the concrete type of a component.
+
+    Components with equal keys are instantiations of the same class with the
+    same generic types, even though their type aliases are distinct.
+    This walks up the generic inputs with an explicit stack since chains can be deep"""
+
+    cache = {} if cache is None else cache
+
+    stack = [component]
+    while stack:
+        current = stack[-1]
+        if current.name in cache:
+            stack.pop()
+            continue
+
+        generic_outputs = _generic_outputs(current)
+
+        missing = [
+            circuit.components[output.parent]
+            for output in generic_outputs
+            if isinstance(output, GraphOutput) and output.parent not in cache
+        ]
+        if missing:
+            stack += missing
+            continue
+
+        generic_keys = tuple(
+            _output_type_key_from(circuit, output, cache) for output in generic_outputs
+        )
+        cache[current.name] = (
+            current.definition.module,
+            current.definition.class_name,
+            generic_keys,
+            tuple(sorted(current.class_generics.items())),
+        )
+        stack.pop()
+
+    return cache[component.name]
+
+
+def _output_type_key_from(
+    circuit: CircuitData, output: ComponentOutput, cache: Dict[str, TypeKey]
+) -> TypeKey:
+    match output:
+        case ExternalOutput(external_name):
+            return ("external", circuit.external_inputs[external_name].type)
+        case GraphOutput(parent, output_name):
+            return (cache[parent], output_name)
+    raise TypeError("Bad output type")
+
+
+def get_type_key_for_output(
+    circuit: CircuitData,
+    output: ComponentOutput,
+    cache: Optional[Dict[str, TypeKey]] = None,
+) -> TypeKey:
+    cache = {} if cache is None else cache
+    if isinstance(output, GraphOutput):
+        get_component_type_key(circuit, circuit.components[output.parent], cache)
+    return _output_type_key_from(circuit, output, cache)
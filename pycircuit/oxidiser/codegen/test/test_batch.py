@@ -0,0 +1,157 @@
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.batching import CalledBatch, batch_siblings
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, pass_definition
+
+UNBATCHED_DEFINITION = "unbatched"
+
+
+def make_fanout(siblings: int):
+    circuit = CircuitBuilder(
+        definitions={PASS_DEFINITION: pass_definition(batch_callback="call_batch")}
+    )
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    for idx in range(siblings):
+        circuit.make_component(
+            PASS_DEFINITION,
+            name=f"sibling_{idx}",
+            inputs={"a": root},
+            force_insert=True,
+        )
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    return circuit, called
+
+
+def test_siblings_batched():
+    (circuit, called) = make_fanout(3)
+    units = batch_siblings(circuit, called)
+
+    match units:
+        case [CalledBatch(called_components=batched)]:
+            assert [c.component.name for c in batched] == [
+                "sibling_0",
+                "sibling_1",
+                "sibling_2",
+            ]
+        case _:
+            assert False, f"Expected a single batch, got {units}"
+
+
+def test_batched_trigger():
+    (circuit, called) = make_fanout(2)
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+
+    unbatched = generate_code_from_tree(assemble_trigger(meta, called))
+    batched = generate_code_from_tree(assemble_trigger(meta, called, batch=True))
+
+    assert "__batch_valid" not in unbatched
+    assert batched.count("::call_batch(") == 1
+    assert "[&mut self.components.sibling_0, &mut self.components.sibling_1]" in batched
+    assert "__batch_valid[1].out;" in batched
+
+
+def test_single_not_batched():
+    (circuit, called) = make_fanout(1)
+    assert not any(
+        isinstance(unit, CalledBatch) for unit in batch_siblings(circuit, called)
+    )
+
+
+def test_siblings_share_slots():
+    (circuit, called) = make_fanout(3)
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+
+    code = generate_code_from_tree(assemble_trigger(meta, called, reuse_slots=True))
+
+    # The sibling outputs are never read, so their lifetimes don't overlap
+    assert code.count("let mut __raw_slot_") == 1
+    assert code.count("let __raw_output_out = &mut __raw_slot_0;") == 3
+    assert "__raw_var_sibling_0_out_valid = __output_valid.out;" in code
+
+
+def unit_names(units) -> list:
+    return [
+        (
+            [called.component.name for called in unit.called_components]
+            if isinstance(unit, CalledBatch)
+            else unit.component.name
+        )
+        for unit in units
+    ]
+
+
+def in_order(called, names):
+    by_name = {called.component.name: called for called in called}
+    return [by_name[name] for name in names]
+
+
+def make_replayed_fanout():
+    "Batchable siblings of two roots, and a chain of unbatched components"
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(batch_callback="call_batch"),
+            UNBATCHED_DEFINITION: pass_definition(),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    roots = [
+        circuit.make_component(definition, name=name, inputs={"a": x})
+        for (definition, name) in [
+            (PASS_DEFINITION, "root"),
+            (UNBATCHED_DEFINITION, "other"),
+        ]
+    ]
+    for (idx, root) in enumerate(roots):
+        circuit.make_component(
+            PASS_DEFINITION,
+            name=f"sibling_{idx}",
+            inputs={"a": root},
+            force_insert=True,
+        )
+    chained = circuit.make_component(
+        UNBATCHED_DEFINITION, name="chained_0", inputs={"a": roots[0]}
+    )
+    circuit.make_component(
+        UNBATCHED_DEFINITION, name="chained_1", inputs={"a": chained}
+    )
+    called = find_all_children_of_from_outputs(circuit, {x.output()})
+    return circuit, called
+
+
+def test_batching_keeps_call_order():
+    (circuit, called) = make_replayed_fanout()
+
+    # Like a replay profile would, call the chain before the shallower siblings
+    order = ["root", "other", "chained_0", "chained_1", "sibling_0", "sibling_1"]
+    units = batch_siblings(circuit, in_order(called, order))
+
+    assert unit_names(units) == [
+        "root",
+        "other",
+        "chained_0",
+        "chained_1",
+        ["sibling_0", "sibling_1"],
+    ]
+
+
+def test_batch_waits_for_parents():
+    (circuit, called) = make_replayed_fanout()
+
+    # sibling_1 can't be called with sibling_0, before its parent
+    order = ["root", "sibling_0", "other", "sibling_1", "chained_0", "chained_1"]
+    units = batch_siblings(circuit, in_order(called, order))
+
+    assert unit_names(units) == [
+        "root",
+        "sibling_0",
+        "other",
+        "sibling_1",
+        "chained_0",
+        "chained_1",
+    ]
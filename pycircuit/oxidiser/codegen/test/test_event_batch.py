@@ -0,0 +1,115 @@
+from pycircuit.circuit_builder.circuit import CallGroup, CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.oxidiser.codegen.modules import generate_modules
+from pycircuit.oxidiser.codegen.struct_il.outputs_struct import generate_outputs_struct
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_event_batch
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.graph.overwritten import find_overwritten_calls
+from pycircuit.oxidiser.test.test_common import (
+    PASS_DEFINITION,
+    defaulted_pass_definition,
+    pass_definition,
+)
+
+DEFAULTED_DEFINITION = "defaulted"
+
+
+def make_event_circuit():
+    circuit = CircuitBuilder(definitions={PASS_DEFINITION: pass_definition()})
+    x = circuit.get_external("x", "f64")
+    p0 = circuit.make_component(PASS_DEFINITION, name="p0", inputs={"a": x})
+
+    with CircuitContextManager(circuit):
+        read = p0 + p0
+        unread = p0 * p0
+
+    circuit.make_component(
+        PASS_DEFINITION, name="consumer", inputs={"a": read}, force_insert=True
+    )
+
+    circuit.add_call_struct_from("Tick", x="f64")
+    circuit.add_call_group(
+        "tick", CallGroup(struct="Tick", external_field_mapping={"x": "x"})
+    )
+
+    # External variables are WIP, so start from what the external triggers
+    called = find_all_children_of_from_outputs(circuit, {p0.output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    return meta, called, read, unread
+
+
+def test_overwritten_calls():
+    meta, called, read, unread = make_event_circuit()
+
+    # The sum is read by the consumer on every event, the product only afterwards
+    assert find_overwritten_calls(meta.circuit, called) == {unread.name}
+
+
+def test_event_batch_entry():
+    meta, called, read, unread = make_event_circuit()
+
+    entry = assemble_event_batch(meta, "tick", called)
+    code = generate_code_from_tree(entry)
+
+    (leading, last) = code.split("self.load_tick(__last);")
+    assert "for __event in __rest {\nself.load_tick(__event);" in leading
+    assert f"self.components.{read.name}" in leading
+    assert f"self.components.{unread.name}" not in leading
+    assert f"self.components.{unread.name}" in last
+
+    # Variables are hoisted out of the loop once
+    assert code.count("let mut __raw_var_consumer_out:") == 1
+    assert code.index("let mut __raw_var_consumer_out:") < code.index("for __event")
+
+    modules = generate_modules(meta, {}, event_batches=[entry])
+    batch_module = modules.modules["_batch_tick"]
+    assert "pub fn tick_batch(&mut self, events: &[Tick]) {" in batch_module
+
+    # The loader copies every mapped field into the stored externals
+    assert "pub fn load_tick(&mut self, event: &Tick) {" in batch_module
+    assert "self.outputs.external_x = event.x.clone();" in batch_module
+    assert "self.outputs.external_x_valid = true;" in batch_module
+
+    outputs = generate_outputs_struct(meta)
+    assert "pub external_x: f64," in outputs
+    assert "pub external_x_valid: bool," in outputs
+
+
+def test_event_batch_resets_variables():
+    """An output which assumes its default when a call doesn't write it
+    must not keep what the call wrote for the previous event"""
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            DEFAULTED_DEFINITION: defaulted_pass_definition("Out::new()"),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    p0 = circuit.make_component(PASS_DEFINITION, name="p0", inputs={"a": x})
+    maybe = circuit.make_component(DEFAULTED_DEFINITION, name="maybe", inputs={"a": p0})
+    circuit.make_component(PASS_DEFINITION, name="consumer", inputs={"a": maybe})
+
+    circuit.add_call_struct_from("Tick", x="f64")
+    circuit.add_call_group(
+        "tick", CallGroup(struct="Tick", external_field_mapping={"x": "x"})
+    )
+
+    called = find_all_children_of_from_outputs(circuit, {p0.output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    code = generate_code_from_tree(assemble_event_batch(meta, "tick", called))
+
+    (hoisted, loop) = code.split("for __event in __rest {")
+    (leading, last) = loop.split("self.load_tick(__last);")
+
+    assert "let mut __raw_var_maybe_out: <" in hoisted
+    for body in [leading, last]:
+        # Reset after loading the event, before anything is called
+        reset = body.index("__raw_var_maybe_out = Out::new();")
+        assert reset < body.index("self.components.maybe")
+        assert body.index("__raw_var_consumer_out_valid = false;") < body.index(
+            "self.components.consumer"
+        )
@@ -0,0 +1,58 @@
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.fusion import find_fused_chains
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, pass_definition
+
+
+def make_arithmetic(stored_intermediate: bool = False):
+    circuit = CircuitBuilder(definitions={PASS_DEFINITION: pass_definition()})
+    x = circuit.get_external("x", "f64")
+    p0 = circuit.make_component(PASS_DEFINITION, name="p0", inputs={"a": x})
+    p1 = circuit.make_component(
+        PASS_DEFINITION, name="p1", inputs={"a": x}, force_insert=True
+    )
+
+    with CircuitContextManager(circuit):
+        summed = p0 + p1
+        if stored_intermediate:
+            summed.force_stored()
+        root = -(summed * p0)
+
+    called = find_all_children_of_from_outputs(circuit, {p0.output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    return meta, called, summed, root
+
+
+def test_chain_fused():
+    meta, called, summed, root = make_arithmetic()
+
+    plan = find_fused_chains(meta, called)
+    assert list(plan.chains.keys()) == [root.name]
+    assert summed.name in plan.absorbed
+
+    code = generate_code_from_tree(assemble_trigger(meta, called, fuse=True))
+    assert (
+        f"__raw_var_{root.name}_out = "
+        "(-((__raw_var_p0_out + __raw_var_p1_out) * __raw_var_p0_out));"
+    ) in code
+    assert code.count("if __raw_var_p0_out_valid && __raw_var_p1_out_valid {") == 1
+    assert ".call(" not in code.split(f"__raw_var_{root.name}_out = ")[1]
+    assert summed.name not in code
+
+
+def test_stored_output_not_fused():
+    meta, called, summed, root = make_arithmetic(stored_intermediate=True)
+
+    plan = find_fused_chains(meta, called)
+    assert summed.name not in plan.absorbed
+    assert len(plan.chains[root.name].members) == 2
+
+    code = generate_code_from_tree(assemble_trigger(meta, called, fuse=True))
+    assert f"self.components.{summed.name}.call(" in code
+    assert f"{summed.name}_out * __raw_var_p0_out))" in code
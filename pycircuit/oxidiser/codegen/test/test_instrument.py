@@ -0,0 +1,62 @@
+import json
+
+from pycircuit.oxidiser.codegen.call_il.instrument import (
+    Instrumentation,
+    InstrumentationOptions,
+)
+from pycircuit.oxidiser.codegen.struct_il.outputs_struct import generate_outputs_struct
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import make_chain
+
+
+def generate(instrumentation=None, components=None):
+    circuit, chain = make_chain(3)
+    called = find_all_children_of_from_outputs(circuit, {chain[0].output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    if components is not None:
+        instrumentation = Instrumentation(
+            circuit, InstrumentationOptions(components=frozenset(components))
+        )
+    return (
+        generate_code_from_tree(
+            assemble_trigger(meta, called, instrumentation=instrumentation)
+        ),
+        instrumentation,
+    )
+
+
+def test_off_is_unchanged():
+    plain, _ = generate()
+    nothing_selected, _ = generate(components=[])
+    assert "instrumentation" not in plain
+    assert plain == nothing_selected
+
+
+def test_instrumented_slots():
+    code, instrumentation = generate(components=["chain_2"])
+
+    assert "self.outputs.instrumentation.record(0, __call_start);" in code
+    assert code.count("::pycircuit_rs::instrument::now()") == 1
+
+    metadata = json.loads(instrumentation.metadata().to_json())
+    assert metadata["slots"] == [
+        {"slot": 0, "component": "chain_2", "callset": "call", "call": "call"}
+    ]
+    assert instrumentation.stats_type() == "::pycircuit_rs::instrument::CallStats<1>"
+
+
+def test_stats_in_outputs_struct():
+    _, instrumentation = generate(components=["chain_1", "chain_2"])
+    circuit, _ = make_chain(3)
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+
+    assert "instrumentation" not in generate_outputs_struct(meta)
+    assert (
+        "    pub instrumentation: ::pycircuit_rs::instrument::CallStats<2>,"
+        in generate_outputs_struct(meta, instrumentation)
+    )
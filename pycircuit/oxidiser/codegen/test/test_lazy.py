@@ -0,0 +1,144 @@
+import os
+import subprocess
+import sys
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.oxidiser.codegen.struct_il.outputs_struct import generate_outputs_struct
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import (
+    assemble_lazy_refreshes,
+    assemble_trigger,
+)
+from pycircuit.oxidiser.graph.ephemeral import find_nonephemeral_outputs
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.graph.callset import callset_key
+from pycircuit.oxidiser.graph.lazy import deferred_callsets
+from pycircuit.oxidiser.test.test_common import (
+    OUT_A,
+    OUT_B,
+    OUT_C,
+    PASS_DEFINITION,
+    basic_definition,
+    pass_definition,
+)
+
+BASIC_DEFINITION = "basic"
+
+
+def make_lazy_chain():
+    circuit = CircuitBuilder(definitions={PASS_DEFINITION: pass_definition()})
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    lazy = circuit.make_component(
+        PASS_DEFINITION, name="lazy", inputs={"a": root}, force_insert=True
+    )
+    lazy.mark_lazy()
+    circuit.make_component(
+        PASS_DEFINITION, name="consumer", inputs={"a": lazy}, force_insert=True
+    )
+
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=find_nonephemeral_outputs(called)
+    )
+    return meta, called
+
+
+def test_lazy_marked_dirty():
+    meta, called = make_lazy_chain()
+
+    code = generate_code_from_tree(assemble_trigger(meta, called))
+
+    assert "self.components.lazy" not in code
+    assert "self.outputs.lazy_dirty |= 1 << 0;" in code
+
+    # The consumer reads the lazy output in the same tree, so refreshes it first
+    refresh = code.index("self.refresh_lazy();")
+    assert code.index("self.outputs.lazy_dirty |= 1 << 0;") < refresh
+    assert refresh < code.index("self.components.consumer")
+
+
+def test_lazy_refresh():
+    meta, _ = make_lazy_chain()
+
+    refreshes = assemble_lazy_refreshes(meta)
+    assert list(refreshes.keys()) == ["refresh_lazy"]
+
+    code = generate_code_from_tree(refreshes["refresh_lazy"])
+    assert "self.outputs.lazy_dirty = 0;" in code
+    assert "if __dirty & (1 << 0) != 0 {" in code
+    assert "self.components.lazy" in code
+    assert "Some(& self.outputs.root_out)" in code
+
+    assert "pub lazy_dirty: u32," in generate_outputs_struct(meta)
+
+
+def make_lazy_callsets():
+    "A lazy component with several callsets, reading from a source per input"
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            BASIC_DEFINITION: basic_definition(),
+        }
+    )
+    sources = {
+        name: circuit.make_component(
+            PASS_DEFINITION,
+            name=f"source_{name}",
+            inputs={"a": circuit.get_external(name, "f64")},
+        )
+        for name in ["a", "b", "c", "d", "e"]
+    }
+    lazy = circuit.make_component(BASIC_DEFINITION, name="lazy", inputs=sources)
+    for output in [OUT_A, OUT_B, OUT_C]:
+        lazy.mark_lazy(output)
+
+    called = find_all_children_of_from_outputs(circuit, {sources["a"].output()})
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=find_nonephemeral_outputs(called)
+    )
+    return meta, called
+
+
+def lazy_callsets_code() -> str:
+    meta, called = make_lazy_callsets()
+    trigger = generate_code_from_tree(assemble_trigger(meta, called))
+    refresh = generate_code_from_tree(assemble_lazy_refreshes(meta)["refresh_lazy"])
+    return trigger + "\n" + refresh
+
+
+def code_with_hash_seed(function: str, seed: int) -> str:
+    "Generates code in a fresh interpreter, where sets iterate in another order"
+    module = function.rsplit(".", 1)[0]
+    # The directory holding the pycircuit package
+    root = __file__
+    for _ in range(len(__name__.split("."))):
+        root = os.path.dirname(root)
+    return subprocess.run(
+        [sys.executable, "-c", f"import {module}; print({function}())"],
+        env={**os.environ, "PYTHONHASHSEED": str(seed), "PYTHONPATH": root},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_deferred_callset_order():
+    meta, _ = make_lazy_callsets()
+
+    callsets = deferred_callsets(meta.circuit.components["lazy"])
+    assert [callset_key(callset) for callset in callsets] == [
+        "AB",
+        "BC",
+        "CD",
+        "call_e2",
+        "call",
+    ]
+
+
+def test_lazy_deterministic():
+    function = f"{__name__}.lazy_callsets_code"
+    assert code_with_hash_seed(function, 1) == code_with_hash_seed(function, 2)
@@ -0,0 +1,59 @@
+import pytest
+
+from pycircuit.oxidiser.codegen.modules import ModuleOptions, generate_modules
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.find_ephemeral_components import (
+    all_nonephemeral_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import make_chain
+
+
+def make_trees(length: int):
+    circuit, chain = make_chain(length)
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=all_nonephemeral_outputs(circuit)
+    )
+    trees = {
+        f"from_{component.name}": assemble_trigger(
+            meta, find_all_children_of_from_outputs(circuit, {component.output()})
+        )
+        for component in chain[:-1]
+    }
+    return meta, trees
+
+
+def test_module_per_tree():
+    meta, trees = make_trees(3)
+    generated = generate_modules(meta, trees)
+
+    assert set(generated.modules.keys()) == {
+        "_types",
+        "_outputs",
+        "_tree_from_chain_0",
+        "_tree_from_chain_1",
+    }
+    assert "pub fn from_chain_1(&mut self) {" in generated.modules["_tree_from_chain_1"]
+    assert "mod _tree_from_chain_0;" in generated.root_module()
+
+
+def test_types_split_under_budget():
+    meta, _ = make_trees(8)
+
+    generated = generate_modules(meta, {}, ModuleOptions(max_module_lines=5))
+
+    chunks = [name for name in generated.modules.keys() if name.startswith("_types_")]
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert len(generated.modules[chunk].splitlines()) <= 5
+        assert f"pub use super::{chunk}::*;" in generated.modules["_types"]
+
+
+def test_tree_over_budget():
+    meta, trees = make_trees(8)
+
+    with pytest.raises(ValueError):
+        generate_modules(meta, trees, ModuleOptions(max_module_lines=5))
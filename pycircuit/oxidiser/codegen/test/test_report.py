@@ -0,0 +1,50 @@
+import pytest
+
+from pycircuit.oxidiser.codegen.report import EmissionBudget, build_emission_report
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, make_chain
+
+
+def make_report():
+    circuit, chain = make_chain(4)
+    called = find_all_children_of_from_outputs(circuit, {chain[0].output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    tree = assemble_trigger(meta, called)
+    return build_emission_report(circuit, {"chain": tree})
+
+
+def test_report_counts():
+    report = make_report()
+
+    tree = report.trees["chain"]
+    # chain_1 through chain_3 each take chain_(n-1) as an optional input
+    assert tree.optional_inputs == 3
+    # A value and validity flag per output read or written, including chain_0
+    assert tree.global_inits == 8
+
+    definition = report.definitions[PASS_DEFINITION]
+    assert definition.components == 4
+    # chain_0 takes an external while the rest take the output of another pass
+    assert definition.distinct_types == 4
+    # An alias line per distinct type
+    assert definition.typedef_lines == 4
+    # Every line below the initialized variables is a call into a pass
+    assert definition.call_lines == tree.lines - tree.global_inits
+
+
+def test_budget():
+    report = make_report()
+    lines = report.trees["chain"].lines
+
+    assert report.violations(EmissionBudget(max_tree_lines=lines)) == []
+    assert len(report.violations(EmissionBudget(max_tree_lines=lines - 1))) == 1
+
+    with pytest.warns(UserWarning):
+        report.enforce(EmissionBudget(max_optional_inputs=2))
+
+    with pytest.raises(ValueError):
+        report.enforce(EmissionBudget(max_distinct_types=1, fail=True))
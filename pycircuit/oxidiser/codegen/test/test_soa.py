@@ -0,0 +1,135 @@
+from typing import List, Optional, Tuple
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder, OutputArray
+from pycircuit.circuit_builder.definition import (
+    ArrayInput,
+    CallSpec,
+    Definition,
+    OutputSpec,
+)
+from pycircuit.common.frozen import FrozenDict
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    CalledComponent,
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, pass_definition
+
+SUM_DEFINITION = "sum"
+
+
+def sum_definition() -> Definition:
+    return Definition(
+        inputs=FrozenDict({"values": ArrayInput(fields=frozenset())}),
+        output_specs=FrozenDict({"out": OutputSpec(ephemeral=True, type_path="f64")}),
+        class_name="SumComponent",
+        module="test",
+        generic_callset=CallSpec(
+            written_set=frozenset({"values"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+    ).validate()
+
+
+def make_summed(
+    elements: int = 3, batch_callback: Optional[str] = None, sums: int = 1
+) -> Tuple[CircuitBuilder, List[CalledComponent]]:
+    "Elements all computed from one root, summed by each sum component"
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(batch_callback=batch_callback),
+            SUM_DEFINITION: sum_definition(),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    element_components = [
+        circuit.make_component(
+            PASS_DEFINITION,
+            name=f"element_{idx}",
+            inputs={"a": root},
+            force_insert=True,
+        )
+        for idx in range(elements)
+    ]
+    for idx in range(sums):
+        circuit.make_component(
+            SUM_DEFINITION,
+            name="summed" if idx == 0 else f"summed_{idx}",
+            inputs={
+                "values": OutputArray(
+                    [{"values": element} for element in element_components]
+                )
+            },
+            force_insert=True,
+        )
+
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    return (circuit, called)
+
+
+def test_array_input_as_soa():
+    (circuit, called) = make_summed()
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    code = generate_code_from_tree(assemble_trigger(meta, called))
+
+    assert (
+        "let __raw_input_values_values = [__raw_var_element_0_out.clone(), "
+        "__raw_var_element_1_out.clone(), __raw_var_element_2_out.clone()];"
+    ) in code
+    assert "((__raw_var_element_2_out_valid as u64) << 2)" in code
+    assert (
+        "let __raw_input_values = ::pycircuit_rs::soa::SoaArray::new("
+        "&__raw_input_values_values, &__raw_input_values_valid);"
+    ) in code
+    assert "values: __raw_input_values\n" in code
+
+
+def test_packed_array_input():
+    (circuit, called) = make_summed()
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    code = generate_code_from_tree(
+        assemble_trigger(meta, called, pack_arrays=True, reuse_slots=True)
+    )
+
+    # Elements are written in place, and the array is passed without a copy
+    assert code.count("let mut __raw_packed_summed_values: [") == 1
+    assert "; 3] = ::core::array::from_fn(|_| Default::default());" in code
+    assert "let __raw_output_out = &mut __raw_packed_summed_values[2];" in code
+    assert ".clone()" not in code
+    assert (
+        "let __raw_input_values = ::pycircuit_rs::soa::SoaArray::new("
+        "&__raw_packed_summed_values, &__raw_input_values_valid);"
+    ) in code
+    assert "((__raw_var_element_2_out_valid as u64) << 2)" in code
+
+
+def test_batched_packed_array_input():
+    (circuit, called) = make_summed(batch_callback="call_batch")
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    code = generate_code_from_tree(
+        assemble_trigger(meta, called, pack_arrays=True, batch=True)
+    )
+
+    # The batch borrows its elements at once, since indexing borrows the whole array
+    assert (
+        "let [__raw_packed_summed_values_0, __raw_packed_summed_values_1, "
+        "__raw_packed_summed_values_2] = &mut __raw_packed_summed_values;"
+    ) in code
+    assert (
+        "let __batch_output_out = [__raw_packed_summed_values_0, "
+        "__raw_packed_summed_values_1, __raw_packed_summed_values_2];"
+    ) in code
+
+
+def test_shared_elements_not_packed():
+    (circuit, called) = make_summed(sums=2)
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    code = generate_code_from_tree(assemble_trigger(meta, called, pack_arrays=True))
+
+    # An output can only live in one array, so both sums gather their elements
+    assert "__raw_packed_" not in code
+    assert code.count("__raw_var_element_0_out.clone()") == 2
@@ -0,0 +1,124 @@
+import pytest
+
+from pycircuit.circuit_builder.circuit import CircuitBuilder, Throttle
+from pycircuit.oxidiser.codegen.call_il.throttle import flush_intervals
+from pycircuit.oxidiser.codegen.struct_il.outputs_struct import generate_outputs_struct
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import (
+    assemble_throttle_flushes,
+    assemble_trigger,
+)
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.find_ephemeral_components import (
+    all_nonephemeral_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.codegen.test.test_lazy import (
+    BASIC_DEFINITION,
+    code_with_hash_seed,
+)
+from pycircuit.oxidiser.test.test_common import (
+    PASS_DEFINITION,
+    basic_definition,
+    pass_definition,
+)
+
+
+def make_throttled_chain(throttle: Throttle):
+    circuit = CircuitBuilder(definitions={PASS_DEFINITION: pass_definition()})
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    slow = circuit.make_component(
+        PASS_DEFINITION, name="slow", inputs={"a": root}, force_insert=True
+    )
+    circuit.make_component(
+        PASS_DEFINITION, name="consumer", inputs={"a": slow}, force_insert=True
+    )
+    circuit.add_throttle("slow_path", throttle)
+
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=all_nonephemeral_outputs(circuit)
+    )
+    return meta, called
+
+
+def test_throttled_trigger():
+    meta, called = make_throttled_chain(Throttle(components=["slow"], every_events=4))
+
+    code = generate_code_from_tree(assemble_trigger(meta, called))
+
+    # Neither the root nor what it alone triggers are called
+    assert "self.components.slow" not in code
+    assert "self.components.consumer" not in code
+    assert "self.outputs.slow_pending |= 1 << 0;" in code
+    assert "if self.outputs.slow_path_events >= 4 {" in code
+    assert "self.flush_slow_path();" in code
+
+    struct = generate_outputs_struct(meta)
+    assert "pub slow_pending: u32," in struct
+    assert "pub slow_path_events: u32," in struct
+
+
+def test_throttle_flush():
+    meta, _ = make_throttled_chain(Throttle(components=["slow"], interval_us=500))
+
+    flushes = assemble_throttle_flushes(meta)
+    assert list(flushes.keys()) == ["flush_slow_path"]
+    assert flush_intervals(meta.circuit) == {"flush_slow_path": 500}
+
+    code = generate_code_from_tree(flushes["flush_slow_path"])
+    assert "if __pending_slow == 0 {" in code
+    assert "self.outputs.slow_pending = 0;" in code
+    assert code.index("self.components.slow") < code.index("self.components.consumer")
+
+    # The root reads its input at flush time, so it has to be stored
+    assert "Some(& self.outputs.root_out)" in code
+
+
+def test_bad_throttle():
+    with pytest.raises(ValueError):
+        make_throttled_chain(
+            Throttle(components=["slow"], interval_us=500, every_events=4)
+        )
+    with pytest.raises(ValueError):
+        make_throttled_chain(Throttle(components=["missing"], every_events=4))
+
+
+def throttled_callsets_code() -> str:
+    "Code for a throttled component with several callsets"
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            BASIC_DEFINITION: basic_definition(),
+        }
+    )
+    sources = {
+        name: circuit.make_component(
+            PASS_DEFINITION,
+            name=f"source_{name}",
+            inputs={"a": circuit.get_external(name, "f64")},
+        )
+        for name in ["a", "b", "c", "d", "e"]
+    }
+    circuit.make_component(BASIC_DEFINITION, name="slow", inputs=sources)
+    circuit.add_throttle("slow_path", Throttle(components=["slow"], every_events=4))
+
+    called = find_all_children_of_from_outputs(circuit, {sources["a"].output()})
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=all_nonephemeral_outputs(circuit)
+    )
+
+    trigger = generate_code_from_tree(assemble_trigger(meta, called))
+    flush = generate_code_from_tree(assemble_throttle_flushes(meta)["flush_slow_path"])
+    return trigger + "\n" + flush
+
+
+def test_throttle_deterministic():
+    code = throttled_callsets_code()
+    assert "self.outputs.slow_pending |= 1 << 4;" in code
+
+    function = f"{__name__}.throttled_callsets_code"
+    assert code_with_hash_seed(function, 1) == code_with_hash_seed(function, 2)
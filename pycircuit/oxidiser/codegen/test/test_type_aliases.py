@@ -0,0 +1,30 @@
+from pycircuit.oxidiser.codegen.struct_il.typedefs.struct_typedef import (
+    generate_component_typedefs,
+)
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_aliases import TypeAliases
+from pycircuit.oxidiser.codegen.test.test_batch import make_fanout
+from pycircuit.oxidiser.test.test_common import make_chain
+
+
+def test_shared_instantiations_deduplicated():
+    circuit, _ = make_fanout(3)
+
+    assert generate_component_typedefs(circuit).split("\n") == [
+        "pub type PassComponentType0 = test::PassComponent::<f64>;",
+        "pub type PassComponentType1 = test::PassComponent::<"
+        "<_types::PassComponentType0 as test::PassComponentOutputExport>::Out>;",
+    ]
+
+    aliases = TypeAliases(circuit)
+    sibling_aliases = {
+        aliases.alias_for(circuit.components[f"sibling_{idx}"]) for idx in range(3)
+    }
+    assert sibling_aliases == {"_types::PassComponentType1"}
+
+
+def test_distinct_instantiations_kept():
+    circuit, chain = make_chain(3)
+
+    aliases = TypeAliases(circuit)
+    assert len(aliases.generate_typedefs()) == 3
+    assert len({aliases.alias_for(component) for component in chain}) == 3
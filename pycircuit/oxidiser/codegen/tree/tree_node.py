@@ -1,4 +1,4 @@
-from typing import Hashable, List, Set
+from typing import Hashable, List, Optional, Set
 from abc import ABC, abstractmethod
 
 
@@ -14,6 +14,11 @@ class GlobalInitLeaf(ABC):
     def generate_global_init_code(self) -> str:
         ...
 
+    def generate_reset_code(self) -> Optional[str]:
+        """Restores the variable to its initial value, when it's reused across
+        iterations of a loop. None if it never changes from it"""
+        return None
+
     def key(self) -> Hashable:
         try:
             self.__hash__()
@@ -36,12 +41,13 @@ class _GlobalInitTracker:
 
     # mypy wants this to have a pointless typing annotation?
     def __init__(self: "_GlobalInitTracker"):
-        self.seen_globals: Set[GlobalInitLeaf] = set()
+        self.seen_globals: Set[Hashable] = set()
         self.ordered_globals: List[GlobalInitLeaf] = []
 
     def maybe_add_global(self, leaf: GlobalInitLeaf):
-        if leaf not in self.seen_globals:
-            self.seen_globals.add(leaf)
+        key = leaf.key()
+        if key not in self.seen_globals:
+            self.seen_globals.add(key)
             self.ordered_globals.append(leaf)
 
 
@@ -50,7 +56,9 @@ def _generate_lines_from_node(
 ) -> List[str]:
     match node:
         case CodeLeaf():
-            return [node.generate_code()]
+            # Leaves like stored variables exist only to be referenced, and emit nothing
+            code = node.generate_code()
+            return [code] if code else []
         case CodeTree():
             return [
                 l
@@ -62,6 +70,19 @@ def _generate_lines_from_node(
             return []
 
 
+def find_global_inits(root: TreeNode) -> List[GlobalInitLeaf]:
+    "The distinct variables a tree initializes, in the order they're initialized"
+    global_init = _GlobalInitTracker()
+    _generate_lines_from_node(root, global_init)
+    return global_init.ordered_globals
+
+
+def generate_body_from_tree(root: TreeNode) -> str:
+    """The code of a tree without its global initialization,
+    as it appears when part of a larger tree"""
+    return "\n".join(_generate_lines_from_node(root, _GlobalInitTracker()))
+
+
 def generate_code_from_tree(root: TreeNode) -> str:
     global_init = _GlobalInitTracker()
     lines = _generate_lines_from_node(root, global_init)
@@ -0,0 +1,691 @@
+import dataclasses
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pycircuit.circuit_builder.component import (
+    ArrayComponentInput,
+    Component,
+    GraphOutput,
+    InputBatch,
+    SingleComponentInput,
+)
+from pycircuit.circuit_builder.definition import ArrayInput, CallSpec
+from pycircuit.oxidiser.codegen.call_il.batch import (
+    BatchCall,
+    BatchDispatch,
+    BatchInput,
+    BatchOutput,
+)
+from pycircuit.oxidiser.codegen.call_il.cold import ColdCalls
+from pycircuit.oxidiser.codegen.call_il.dispatch import CallDispatch
+from pycircuit.oxidiser.codegen.call_il.full_call import FullCall
+from pycircuit.oxidiser.codegen.call_il.event_batch import EventBatchEntry
+from pycircuit.oxidiser.codegen.call_il.fused import FusedCall
+from pycircuit.oxidiser.codegen.call_il.instrument import Instrumentation
+from pycircuit.oxidiser.codegen.call_il.lazy import (
+    DirtyCalls,
+    LazyRefresh,
+    MarkDirty,
+    RefreshLazy,
+    refresh_function_name,
+)
+from pycircuit.oxidiser.codegen.call_il.input import CallInputSet, SingleInput
+from pycircuit.oxidiser.codegen.call_il.output import CallOutputSet, OutputRef
+from pycircuit.oxidiser.codegen.call_il.soa import SoaField, SoaInput
+from pycircuit.oxidiser.codegen.call_il.throttle import (
+    CountEvent,
+    MarkPending,
+    PendingCalls,
+    ThrottleFlush,
+    flush_function_name,
+)
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import (
+    get_input_struct_name,
+    get_output_struct_name,
+    get_output_valid_struct_name,
+)
+from pycircuit.oxidiser.codegen.tree.tree_node import CodeTree, TreeNode
+from pycircuit.oxidiser.graph.annotate_components import (
+    is_default_by_default,
+    output_to_var,
+    per_call_var_signature,
+)
+from pycircuit.oxidiser.graph.batching import CalledBatch, CalledUnit, batch_siblings
+from pycircuit.oxidiser.graph.cold import (
+    ColdProfile,
+    find_cold_components,
+    is_callset_cold,
+)
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+from pycircuit.oxidiser.graph.fusion import (
+    FusedChain,
+    FusionPlan,
+    find_fused_chains,
+    render_expression,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.graph.lazy import (
+    find_lazy_components,
+    is_lazy_component,
+    deferred_callsets,
+    lazy_parents,
+)
+from pycircuit.oxidiser.graph.liveness import CallStep, assign_slots, find_live_ranges
+from pycircuit.oxidiser.graph.overwritten import find_overwritten_calls
+from pycircuit.oxidiser.graph.packing import find_packed_elements
+from pycircuit.oxidiser.graph.profile import ReplayProfile
+from pycircuit.oxidiser.graph.throttle import (
+    find_flush_children,
+    split_throttled,
+    throttled_roots,
+)
+
+# HACK MOVE THIS VAR, same as the outputs one
+_COMPONENTS_NAME = "components"
+
+
+@dataclass(frozen=True, eq=True)
+class CallTree(CodeTree):
+    calls: List[TreeNode]
+
+    def get_tree_children(self) -> List[TreeNode]:
+        return self.calls
+
+
+def get_component_path(component: Component) -> str:
+    return f"self.{_COMPONENTS_NAME}.{component.name}"
+
+
+def assemble_array_input(
+    circuit_meta: CircuitMetadata,
+    component: Component,
+    input_name: str,
+    batches: List[InputBatch],
+) -> SoaInput:
+    match component.definition.inputs[input_name]:
+        case ArrayInput(fields=_) as array_spec:
+            field_names = sorted(array_spec.get_fields_or(input_name))
+        case _:
+            raise ValueError(
+                f"Component {component.name} has an array for non-array input {input_name}"
+            )
+
+    fields = [
+        SoaField(
+            variables=[
+                output_to_var(circuit_meta, batch.inputs[field_name])
+                for batch in batches
+            ],
+            input_name=input_name,
+            field_name=field_name,
+        )
+        for field_name in field_names
+    ]
+
+    return SoaInput(fields=fields, input_name=input_name)
+
+
+def assemble_call_inputs(
+    circuit_meta: CircuitMetadata,
+    component: Component,
+    callset: CallSpec,
+    call: str,
+    replay_profile: Optional[ReplayProfile] = None,
+) -> Optional[CallInputSet]:
+    inputs = []
+    for input_name in sorted(callset.inputs()):
+        # Optional inputs which weren't passed are left for the input struct to default
+        if input_name not in component.inputs:
+            continue
+
+        match component.inputs[input_name]:
+            case SingleComponentInput(input=output):
+                valid_hint = (
+                    replay_profile.valid_hint(output, circuit_meta.circuit.components)
+                    if replay_profile is not None
+                    else None
+                )
+                inputs.append(
+                    SingleInput(
+                        variable=output_to_var(circuit_meta, output),
+                        input_name=input_name,
+                        valid_hint=valid_hint,
+                    )
+                )
+            case ArrayComponentInput(inputs=batches):
+                inputs.append(
+                    assemble_array_input(circuit_meta, component, input_name, batches)
+                )
+
+    if not inputs:
+        return None
+
+    return CallInputSet(
+        inputs=inputs, input_struct_name=get_input_struct_name(component, call)
+    )
+
+
+def assemble_call_outputs(
+    circuit_meta: CircuitMetadata, component: Component, callset: CallSpec, call: str
+) -> Optional[CallOutputSet]:
+    if not callset.outputs:
+        return None
+
+    outputs = [
+        OutputRef(
+            variable=output_to_var(circuit_meta, component.output(output)),
+            output_name=output,
+        )
+        for output in sorted(callset.outputs)
+    ]
+
+    return CallOutputSet(
+        outputs=outputs, output_struct_name=get_output_struct_name(component, call)
+    )
+
+
+def assemble_full_calls(
+    circuit_meta: CircuitMetadata,
+    component: Component,
+    callset: CallSpec,
+    replay_profile: Optional[ReplayProfile] = None,
+    instrumentation: Optional[Instrumentation] = None,
+) -> List[FullCall]:
+    full_calls = []
+    for call in callset.calls() or []:
+        inputs = assemble_call_inputs(
+            circuit_meta, component, callset, call, replay_profile
+        )
+        outputs = assemble_call_outputs(circuit_meta, component, callset, call)
+
+        dispatch = CallDispatch(
+            path=get_component_path(component),
+            call_name=call,
+            takes_inputs=inputs is not None,
+            takes_outputs=outputs is not None,
+            takes_metadata=bool(callset.metadata),
+            valid_struct_name=(
+                get_output_valid_struct_name(component, call)
+                if outputs is not None
+                else None
+            ),
+        )
+
+        full_calls.append(
+            FullCall(
+                dispatch=(
+                    instrumentation.instrument(dispatch, component, callset)
+                    if instrumentation is not None
+                    else dispatch
+                ),
+                inputs=inputs,
+                outputs=outputs,
+            )
+        )
+
+    return full_calls
+
+
+def assemble_batch_call(
+    circuit_meta: CircuitMetadata,
+    batch: CalledBatch,
+) -> BatchCall:
+    callset = batch.callset
+    components = [called.component for called in batch.called_components]
+    first = components[0]
+
+    assert callset.batch_callback is not None
+
+    inputs = []
+    for input_name in sorted(callset.inputs()):
+        if input_name not in first.inputs:
+            continue
+        variables = []
+        for component in components:
+            match component.inputs[input_name]:
+                case SingleComponentInput(input=output):
+                    variables.append(output_to_var(circuit_meta, output))
+                case _:
+                    raise ValueError(
+                        f"Batched component {component.name} had array input"
+                    )
+        inputs.append(BatchInput(variables=variables, input_name=input_name))
+
+    outputs = [
+        BatchOutput(
+            variables=[
+                output_to_var(circuit_meta, component.output(output))
+                for component in components
+            ],
+            output_name=output,
+        )
+        for output in sorted(callset.outputs)
+    ]
+
+    call = (callset.calls() or [callset.batch_callback])[0]
+
+    dispatch = BatchDispatch(
+        type_path=circuit_meta.type_aliases.alias_for(first),
+        call_name=callset.batch_callback,
+        component_paths=[get_component_path(component) for component in components],
+        inputs=inputs,
+        outputs=outputs,
+        valid_struct_name=(
+            get_output_valid_struct_name(first, call) if outputs else None
+        ),
+    )
+
+    return BatchCall(dispatch=dispatch)
+
+
+def assemble_fused_call(circuit_meta: CircuitMetadata, chain: FusedChain) -> FusedCall:
+    leaves = chain.leaves()
+    leaf_variables = [output_to_var(circuit_meta, leaf) for leaf in leaves]
+    paths = {
+        leaf: variable.var.var_path()
+        for (leaf, variable) in zip(leaves, leaf_variables)
+    }
+
+    return FusedCall(
+        leaves=leaf_variables,
+        output=output_to_var(circuit_meta, chain.root.output()),
+        expression=render_expression(chain.expression, paths),
+    )
+
+
+def unit_step(unit: CalledUnit, fusion: FusionPlan) -> CallStep:
+    match unit:
+        case CalledBatch(called_components=members):
+            step = CallStep()
+            for member in members:
+                member_step = unit_step(member, fusion)
+                step.reads |= member_step.reads
+                step.writes |= member_step.writes
+            return step
+        case CalledComponent(component=component) if component.name in fusion.chains:
+            return CallStep(
+                reads=set(fusion.chains[component.name].leaves()),
+                writes={component.output()},
+            )
+        case CalledComponent(component=component, callsets=callsets):
+            return CallStep(
+                reads={
+                    output
+                    for input in component.inputs.values()
+                    for output in input.outputs()
+                },
+                writes={
+                    component.output(output)
+                    for callset in callsets
+                    for output in callset.outputs
+                },
+            )
+    raise TypeError("Bad call unit")
+
+
+def with_shared_slots(
+    circuit_meta: CircuitMetadata, units: List[CalledUnit], fusion: FusionPlan
+) -> CircuitMetadata:
+    """Assigns per-call variables of a tree to shared slots by liveness"""
+    steps = [unit_step(unit, fusion) for unit in units]
+
+    # A slot is constructed once per tree, so an output assuming its default when
+    # a call doesn't write it would read what the slot last held instead
+    candidates = {
+        output
+        for step in steps
+        for output in step.writes
+        if isinstance(output, GraphOutput)
+        and output not in circuit_meta.non_ephemeral_outputs
+        and not is_default_by_default(output, circuit_meta.circuit)
+        and output not in circuit_meta.packed_elements
+    }
+
+    ranges = find_live_ranges(steps, candidates)
+    slot_classes = {
+        output: per_call_var_signature(circuit_meta, output) for output in ranges
+    }
+
+    # Computed up front so the per-tree copy shares the cached analysis
+    circuit_meta.inferred_valid_outputs
+
+    return dataclasses.replace(
+        circuit_meta, per_call_slots=assign_slots(ranges, slot_classes)
+    )
+
+
+def with_packed_arrays(
+    circuit_meta: CircuitMetadata, called_components: List[CalledComponent]
+) -> CircuitMetadata:
+    """Assigns per-call elements of array inputs in a tree to packed arrays"""
+    components = [called.component for called in called_components]
+    signatures = {
+        output: per_call_var_signature(circuit_meta, output)
+        for component in components
+        for component_input in component.inputs.values()
+        if isinstance(component_input, ArrayComponentInput)
+        for output in component_input.outputs()
+        if isinstance(output, GraphOutput)
+        and output not in circuit_meta.non_ephemeral_outputs
+    }
+
+    return dataclasses.replace(
+        circuit_meta, packed_elements=find_packed_elements(components, signatures)
+    )
+
+
+def assemble_mark_dirty(
+    component: Component, callsets: List[CallSpec]
+) -> List[MarkDirty]:
+    deferred = deferred_callsets(component)
+    return [
+        MarkDirty(component_name=component.name, bit=deferred.index(callset))
+        for callset in callsets
+    ]
+
+
+def assemble_refreshes(
+    circuit_meta: CircuitMetadata, unit: CalledUnit, fusion: FusionPlan
+) -> List[RefreshLazy]:
+    reads = unit_step(unit, fusion).reads
+    return [
+        RefreshLazy(component_name=name)
+        for name in lazy_parents(circuit_meta.circuit, reads)
+    ]
+
+
+def assemble_lazy_refresh(
+    circuit_meta: CircuitMetadata, component: Component
+) -> LazyRefresh:
+    parents = lazy_parents(
+        circuit_meta.circuit,
+        {output for input in component.inputs.values() for output in input.outputs()},
+    )
+
+    dirty_calls = [
+        DirtyCalls(
+            bit=bit,
+            calls=list(assemble_full_calls(circuit_meta, component, callset)),
+        )
+        for (bit, callset) in enumerate(deferred_callsets(component))
+    ]
+
+    return LazyRefresh(
+        component_name=component.name,
+        parents=[RefreshLazy(component_name=name) for name in parents],
+        dirty_calls=dirty_calls,
+    )
+
+
+def assemble_lazy_refreshes(circuit_meta: CircuitMetadata) -> Dict[str, TreeNode]:
+    """Assembles the function recomputing each lazy component, keyed by its name.
+
+    These are generated alongside the call trees. Anything reading the outputs
+    of a lazy component from outside of the circuit must call its refresh first"""
+    circuit = circuit_meta.circuit
+    return {
+        refresh_function_name(name): assemble_lazy_refresh(
+            circuit_meta, circuit.components[name]
+        )
+        for name in find_lazy_components(circuit)
+    }
+
+
+def assemble_pending(
+    circuit_meta: CircuitMetadata, pending: List[CalledComponent]
+) -> Tuple[List[TreeNode], List[TreeNode]]:
+    """Marks for the throttled roots of a tree, and the event counts made after
+    the rest of the tree for throttles flushed every few events"""
+    circuit = circuit_meta.circuit
+    roots = throttled_roots(circuit)
+
+    marks: List[TreeNode] = []
+    throttle_names: List[str] = []
+    for called in pending:
+        deferred = deferred_callsets(called.component)
+        marks += [
+            MarkPending(
+                component_name=called.component.name, bit=deferred.index(callset)
+            )
+            for callset in called.callsets
+        ]
+        throttle_name = roots[called.component.name]
+        if throttle_name not in throttle_names:
+            throttle_names.append(throttle_name)
+
+    counts: List[TreeNode] = []
+    for throttle_name in throttle_names:
+        every_events = circuit.throttles[throttle_name].every_events
+        if every_events is not None:
+            counts.append(
+                CountEvent(throttle_name=throttle_name, every_events=every_events)
+            )
+
+    return (marks, counts)
+
+
+def assemble_throttle_flushes(circuit_meta: CircuitMetadata) -> Dict[str, TreeNode]:
+    """Assembles the function flushing each throttle, keyed by its name.
+
+    These are generated alongside the call trees. Timed throttles are flushed by
+    the host scheduling them, see call_il.throttle.flush_intervals, and throttles
+    counting events flush themselves from the triggering trees"""
+    circuit = circuit_meta.circuit
+
+    flushes: Dict[str, TreeNode] = {}
+    for (name, throttle) in circuit.throttles.items():
+        pending_calls = [
+            PendingCalls(
+                component_name=root_name,
+                bit=bit,
+                calls=list(
+                    assemble_full_calls(
+                        circuit_meta, circuit.components[root_name], callset
+                    )
+                ),
+            )
+            for root_name in throttle.components
+            for (bit, callset) in enumerate(
+                deferred_callsets(circuit.components[root_name])
+            )
+        ]
+
+        flushes[flush_function_name(name)] = ThrottleFlush(
+            root_names=list(throttle.components),
+            pending_calls=pending_calls,
+            children=assemble_trigger(
+                circuit_meta, find_flush_children(circuit, throttle)
+            ),
+        )
+
+    return flushes
+
+
+def assemble_trigger(
+    circuit_meta: CircuitMetadata,
+    called_components: List[CalledComponent],
+    cold_profile: Optional[ColdProfile] = None,
+    replay_profile: Optional[ReplayProfile] = None,
+    instrumentation: Optional[Instrumentation] = None,
+    batch: bool = False,
+    fuse: bool = False,
+    reuse_slots: bool = False,
+    pack_arrays: bool = False,
+) -> CallTree:
+    """Assembles the call tree for a single subgraph.
+
+    Calls are emitted in the order of the called components. Consecutive cold calls
+    are grouped together and outlined from the hot path.
+
+    With replay statistics, calls are reordered to put frequently triggered calls first,
+    rarely triggered calls are marked cold and validity checks get branch hints.
+
+    With instrumentation, dispatches are wrapped in counters and timers. Pass the same
+    instrumentation to every tree of a circuit so slots are allocated uniquely.
+
+    With batching, independent components of the same type and depth with a batch
+    callback are called together, where the first of them was. Batches aren't
+    instrumented.
+
+    With fusion, chains of arithmetic components are computed inline as a single
+    expression in place of their last component. Fused chains aren't instrumented.
+
+    With slot reuse, per-call variables of the same type whose lifetimes in the final
+    call order don't overlap share storage.
+
+    With array packing, per-call elements of array inputs are written straight into
+    the array passed as the input, instead of being gathered into it before the call.
+
+    Lazy components are never called, only marked dirty at the start of the tree.
+    Calls reading their outputs refresh them first, see assemble_lazy_refreshes.
+
+    Throttled roots are only marked pending, and what they alone trigger is left
+    for the throttle's flush, see assemble_throttle_flushes"""
+
+    if replay_profile is not None:
+        called_components = replay_profile.order(called_components)
+        replay_cold = replay_profile.cold_profile(called_components)
+        cold_profile = (
+            cold_profile.merged_with(replay_cold)
+            if cold_profile is not None
+            else replay_cold
+        )
+
+    cold_components = find_cold_components(called_components, cold_profile)
+
+    dirty_marks: List[TreeNode] = [
+        mark
+        for called in called_components
+        if is_lazy_component(called.component)
+        for mark in assemble_mark_dirty(called.component, called.callsets)
+    ]
+    called_components = [
+        called
+        for called in called_components
+        if not is_lazy_component(called.component)
+    ]
+
+    (called_components, pending) = split_throttled(
+        circuit_meta.circuit, called_components
+    )
+    (pending_marks, event_counts) = assemble_pending(circuit_meta, pending)
+
+    fusion = (
+        find_fused_chains(circuit_meta, called_components)
+        if fuse
+        else FusionPlan(chains={}, absorbed=set())
+    )
+    called_components = [
+        called
+        for called in called_components
+        if called.component.name not in fusion.absorbed
+    ]
+
+    units: List[CalledUnit] = (
+        batch_siblings(circuit_meta.circuit, called_components, cold_components)
+        if batch
+        else list(called_components)
+    )
+
+    if pack_arrays:
+        circuit_meta = with_packed_arrays(circuit_meta, called_components)
+
+    if reuse_slots:
+        circuit_meta = with_shared_slots(circuit_meta, units, fusion)
+
+    # Every assembled call along with whether it's cold
+    assembled: List[Tuple[List[TreeNode], bool]] = []
+
+    for unit in units:
+        refreshes: List[TreeNode] = list(assemble_refreshes(circuit_meta, unit, fusion))
+        match unit:
+            case CalledBatch(called_components=[first, *_]):
+                assembled.append(
+                    (
+                        refreshes + [assemble_batch_call(circuit_meta, unit)],
+                        first.component.name in cold_components,
+                    )
+                )
+            case CalledComponent(component=component) if (
+                component.name in fusion.chains
+            ):
+                fused = assemble_fused_call(circuit_meta, fusion.chains[component.name])
+                assembled.append(
+                    (refreshes + [fused], component.name in cold_components)
+                )
+            case CalledComponent(component=component, callsets=callsets):
+                if refreshes:
+                    assembled.append((refreshes, component.name in cold_components))
+                for callset in callsets:
+                    full_calls = assemble_full_calls(
+                        circuit_meta,
+                        component,
+                        callset,
+                        replay_profile,
+                        instrumentation,
+                    )
+                    is_cold = component.name in cold_components or is_callset_cold(
+                        component, callset, cold_profile
+                    )
+                    assembled.append((list(full_calls), is_cold))
+
+    calls: List[TreeNode] = dirty_marks + pending_marks
+    running_cold: List[TreeNode] = []
+
+    for (nodes, is_cold) in assembled:
+        if is_cold:
+            running_cold += nodes
+        else:
+            if running_cold:
+                calls.append(ColdCalls(calls=running_cold))
+                running_cold = []
+            calls += nodes
+
+    if running_cold:
+        calls.append(ColdCalls(calls=running_cold))
+
+    return CallTree(calls=calls + event_counts)
+
+
+def assemble_event_batch(
+    circuit_meta: CircuitMetadata,
+    group_name: str,
+    called_components: List[CalledComponent],
+    cold_profile: Optional[ColdProfile] = None,
+    batch: bool = False,
+    fuse: bool = False,
+) -> EventBatchEntry:
+    """Assembles the entry point running a call group for a slice of call structs.
+
+    Options are as in assemble_trigger. Slot reuse isn't supported, since the
+    leading and last calls are assembled separately but share hoisted variables"""
+
+    overwritten = find_overwritten_calls(circuit_meta.circuit, called_components)
+
+    leading = assemble_trigger(
+        circuit_meta,
+        [
+            called
+            for called in called_components
+            if called.component.name not in overwritten
+        ],
+        cold_profile=cold_profile,
+        batch=batch,
+        fuse=fuse,
+    )
+    last = assemble_trigger(
+        circuit_meta,
+        called_components,
+        cold_profile=cold_profile,
+        batch=batch,
+        fuse=fuse,
+    )
+
+    group = circuit_meta.circuit.call_groups[group_name]
+    return EventBatchEntry(
+        group_name=group_name,
+        struct_name=group.struct,
+        field_mapping=tuple(sorted(group.external_field_mapping.items())),
+        leading=leading,
+        last=last,
+    )
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pycircuit.circuit_builder.circuit import CircuitData
 
 from pycircuit.circuit_builder.component import (
@@ -10,7 +10,6 @@ from pycircuit.circuit_builder.component import (
     GraphOutput,
 )
 from pycircuit.common.frozen import FrozenDict
-from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import get_type_for_output
 from pycircuit.oxidiser.graph.variable import (
     AlwaysValid,
     GraphValid,
@@ -50,6 +49,31 @@ def is_invalid_by_default(output: ComponentOutput, circuit: CircuitData):
             return parent_component.definition.output_specs[output_name].assume_invalid
 
 
+def is_default_by_default(output: ComponentOutput, circuit: CircuitData):
+    match output:
+        case ExternalOutput():
+            return False
+        case GraphOutput(parent, output_name):
+            parent_component = circuit.components[parent]
+            return parent_component.definition.output_specs[output_name].assume_default
+
+
+def per_call_var_signature(
+    circuit_meta: CircuitMetadata, output: GraphOutput
+) -> Tuple[str, str]:
+    """The type and constructor of the per-call variable for an output"""
+    circuit = circuit_meta.circuit
+    var_type = circuit_meta.type_aliases.type_for_output(output)
+    output_specs = circuit.components[output.parent].definition.output_specs.get(
+        output.output_name, None
+    )
+    if output_specs is not None and output_specs.default_constructor is not None:
+        var_constructor = output_specs.default_constructor
+    else:
+        var_constructor = "Default::default()"
+    return (var_type, var_constructor)
+
+
 def output_to_var(
     circuit_meta: CircuitMetadata, output: ComponentOutput
 ) -> GraphVariable:
@@ -65,7 +89,9 @@ def output_to_var(
             val: Optional[GraphValid] = None
             var: GraphVar
 
-            always_valid = is_always_valid(the_output, circuit)
+            always_valid = is_always_valid(the_output, circuit) or (
+                is_ephemeral and the_output in circuit_meta.inferred_valid_outputs
+            )
             invalid_by_default = is_invalid_by_default(the_output, circuit)
 
             if always_valid:
@@ -76,21 +102,15 @@ def output_to_var(
 
             if is_ephemeral:
                 val = val or PerCallValid(output=the_output, valid_by_default=False)
-                var_type = get_type_for_output(circuit, the_output)
-                output_specs = circuit.components[parent].definition.output_specs.get(
-                    output_name, None
+                (var_type, var_constructor) = per_call_var_signature(
+                    circuit_meta, the_output
                 )
-                if (
-                    output_specs is not None
-                    and output_specs.default_constructor is not None
-                ):
-                    var_constructor = output_specs.default_constructor
-                else:
-                    var_constructor = "Default::default()"
                 var = PerCallVar(
                     output=the_output,
                     variable_type=var_type,
                     variable_constructor=var_constructor,
+                    slot=circuit_meta.per_call_slots.get(the_output),
+                    packed=circuit_meta.packed_elements.get(the_output),
                 )
             else:
                 val = val or StoredValid(
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Set
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import SingleComponentInput
+from pycircuit.circuit_builder.definition import CallSpec
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_names import (
+    TypeKey,
+    get_component_type_key,
+)
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+
+
+@dataclass
+class CalledBatch:
+    """Independent components with the same concrete type called with one batch call"""
+
+    callset: CallSpec
+    called_components: List[CalledComponent]
+
+
+CalledUnit = CalledComponent | CalledBatch
+
+
+def find_levels(called_components: List[CalledComponent]) -> List[int]:
+    """Finds the depth of each call in the tree, counting only in-tree parents.
+
+    Calls at the same depth can't depend on each other"""
+
+    name_to_idx = {
+        called_component.component.name: idx
+        for (idx, called_component) in enumerate(called_components)
+    }
+
+    levels: List[int] = []
+    for called_component in called_components:
+        parent_levels = [
+            levels[name_to_idx[parent]]
+            for input in called_component.component.inputs.values()
+            for parent in input.parents()
+            if parent in name_to_idx
+        ]
+        levels.append(1 + max(parent_levels, default=-1))
+
+    return levels
+
+
+def batch_key(
+    circuit: CircuitData,
+    called_component: CalledComponent,
+    type_cache: Dict[str, TypeKey],
+) -> Optional[Hashable]:
+    component = called_component.component
+
+    match called_component.callsets:
+        case [callset] if callset.batch_callback is not None:
+            pass
+        case _:
+            return None
+
+    if not all(
+        isinstance(component.inputs[input], SingleComponentInput)
+        for input in callset.inputs()
+        if input in component.inputs
+    ):
+        return None
+
+    return (
+        get_component_type_key(circuit, component, type_cache),
+        callset,
+        frozenset(component.inputs.keys()),
+    )
+
+
+def batch_siblings(
+    circuit: CircuitData,
+    called_components: List[CalledComponent],
+    cold_components: Optional[Set[str]] = None,
+) -> List[CalledUnit]:
+    """Groups calls to independent components of the same type into batches.
+
+    Calls at the same depth which opted into batching are grouped by type,
+    and each batch is called where its first member was. Otherwise the incoming
+    call order, which may come from replay statistics, is kept as is. So a call
+    only joins a batch when all of its in-tree parents are called before it.
+    Hot and cold components are never batched together"""
+
+    if cold_components is None:
+        cold_components = set()
+
+    levels = find_levels(called_components)
+    type_cache: Dict[str, TypeKey] = {}
+
+    units: List[CalledUnit] = []
+
+    # Index in units where each component is called
+    placed: Dict[str, int] = {}
+
+    # Maps a batch key to the index of its unit in units
+    open_batches: Dict[Hashable, int] = {}
+
+    for (idx, called_component) in enumerate(called_components):
+        component = called_component.component
+        key = batch_key(circuit, called_component, type_cache)
+
+        if key is None:
+            placed[component.name] = len(units)
+            units.append(called_component)
+            continue
+
+        key = (key, levels[idx], component.name in cold_components)
+        batch_idx = open_batches.get(key)
+
+        # Joining a batch moves the call up to where the batch is called,
+        # so every parent has to be called before that
+        if batch_idx is None or any(
+            placed.get(parent, -1) >= batch_idx
+            for input in component.inputs.values()
+            for parent in input.parents()
+        ):
+            open_batches[key] = len(units)
+            placed[component.name] = len(units)
+            units.append(called_component)
+            continue
+
+        placed[component.name] = batch_idx
+        match units[batch_idx]:
+            case CalledBatch() as batch:
+                batch.called_components.append(called_component)
+            case CalledComponent() as first:
+                units[batch_idx] = CalledBatch(
+                    callset=first.callsets[0],
+                    called_components=[first, called_component],
+                )
+
+    return units
@@ -100,3 +100,12 @@ def get_inputs_for_callset(
 ) -> Set[ComponentInput]:
     all_inputs = callset.observes | callset.written_set
     return {component.inputs[name] for name in all_inputs}
+
+
+def callset_key(callset: CallSpec) -> str:
+    """Name used to refer to a callset from outside the definition.
+
+    Unnamed callsets (usually generic or timer callsets) are referred to by their calls"""
+    if callset.name is not None:
+        return callset.name
+    return ",".join(callset.calls() or [])
@@ -0,0 +1,114 @@
+from dataclasses import dataclass, field
+from enum import Enum
+import json
+from typing import Dict, List, Optional, Set
+
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.component import Component
+from pycircuit.circuit_builder.definition import CallSpec
+from pycircuit.oxidiser.graph.callset import callset_key
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+
+# Definition metadata key holding a list of callset names which are cold
+# for every component of the definition
+COLD_CALLSETS_METADATA = "cold_callsets"
+
+
+class BranchHint(Enum):
+    Likely = "::pycircuit_rs::cold::likely"
+    Unlikely = "::pycircuit_rs::cold::unlikely"
+
+    def wrap(self, condition: str) -> str:
+        return f"{self.value}({condition})"
+
+
+@dataclass
+class ColdProfile(DataClassJsonMixin):
+    """Profile feedback listing calls which are rarely triggered
+
+    Attributes:
+
+        components: Maps component names to the keys of the cold callsets of said component.
+                    An empty list marks every callset of the component as cold
+    """
+
+    components: Dict[str, List[str]] = field(default_factory=dict)
+
+    @staticmethod
+    def from_file(path: str) -> "ColdProfile":
+        with open(path) as profile_file:
+            return ColdProfile.from_dict(json.load(profile_file))
+
+    def merged_with(self, other: "ColdProfile") -> "ColdProfile":
+        components = dict(self.components)
+        for (name, cold_keys) in other.components.items():
+            if name not in components:
+                components[name] = cold_keys
+            elif not components[name] or not cold_keys:
+                components[name] = []
+            else:
+                components[name] = sorted(set(components[name]) | set(cold_keys))
+        return ColdProfile(components=components)
+
+    def is_cold(self, component: Component, callset: CallSpec) -> bool:
+        if component.name not in self.components:
+            return False
+        cold_keys = self.components[component.name]
+        return not cold_keys or callset_key(callset) in cold_keys
+
+
+def is_callset_cold(
+    component: Component, callset: CallSpec, profile: Optional[ColdProfile] = None
+) -> bool:
+    definition_cold = component.definition.metadata.get(COLD_CALLSETS_METADATA, [])
+    if callset_key(callset) in definition_cold:
+        return True
+
+    if callset.outputs and all(
+        component.options(output).cold for output in callset.outputs
+    ):
+        return True
+
+    return profile is not None and profile.is_cold(component, callset)
+
+
+def find_cold_components(
+    called_components: List[CalledComponent], profile: Optional[ColdProfile] = None
+) -> Set[str]:
+    """Finds the components of a call tree that should be kept off the hot path.
+
+    A component is cold if all of the callsets it is called with are cold,
+    or if it's only triggered by cold components in the tree. The latter makes
+    a cold component take the rest of its subtree with it.
+
+    External triggers are conservatively assumed to be hot"""
+
+    own_component_names = {
+        called_component.component.name for called_component in called_components
+    }
+
+    cold_components: Set[str] = set()
+
+    for called_component in called_components:
+        component = called_component.component
+
+        if all(
+            is_callset_cold(component, callset, profile)
+            for callset in called_component.callsets
+        ):
+            cold_components.add(component.name)
+            continue
+
+        # Components outside of the tree are never written in it, so can't trigger
+        triggering_parents = {
+            parent
+            for input in component.triggering_inputs()
+            for parent in input.parents()
+            if parent in own_component_names or parent == "external"
+        }
+
+        if triggering_parents and triggering_parents <= cold_components:
+            cold_components.add(component.name)
+
+    return cold_components
@@ -1,6 +1,7 @@
 from typing import List, Set
 from pycircuit.circuit_builder.component import Component, ComponentOutput, GraphOutput
 from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+from pycircuit.oxidiser.graph.lazy import is_lazy_component
 
 
 def is_ephemeral(
@@ -11,7 +12,7 @@ def is_ephemeral(
     component_output = GraphOutput(parent=component.name, output_name=output)
 
     if potential_options is not None:
-        must_store = potential_options.force_stored
+        must_store = potential_options.force_stored or potential_options.lazy
     else:
         must_store = False
 
@@ -46,4 +47,11 @@ def find_nonephemeral_outputs(
                 if output.parent not in own_component_names:
                     non_ephemeral_outputs.add(output)
 
+        # Lazy components are called outside of the tree, from stored values
+        if is_lazy_component(component):
+            for input in component.inputs.values():
+                non_ephemeral_outputs |= set(input.outputs())
+            for output_name in component.definition.output_specs.keys():
+                non_ephemeral_outputs.add(component.output(output_name))
+
     return non_ephemeral_outputs
@@ -7,6 +7,7 @@ from pycircuit.oxidiser.graph.find_children_of import (
     find_all_children_of,
     find_all_children_of_from_outputs,
 )
+from pycircuit.oxidiser.graph.throttle import find_flush_subgraph, split_throttled
 
 
 def find_timer_subgraphs(circuit: CircuitData) -> Dict[str, List[CalledComponent]]:
@@ -34,6 +35,13 @@ def find_all_subgraphs(circuit: CircuitData) -> List[List[CalledComponent]]:
 
     called += list(find_timer_subgraphs(circuit).values())
 
+    # Throttled subgraphs are called from their flush instead of where triggered
+    called = [split_throttled(circuit, subgraph)[0] for subgraph in called]
+    called += [
+        find_flush_subgraph(circuit, throttle)
+        for throttle in circuit.throttles.values()
+    ]
+
     return called
 
 
@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+from pycircuit.circuit_builder.component import (
+    Component,
+    ComponentOutput,
+    GraphOutput,
+    SingleComponentInput,
+)
+from pycircuit.oxidiser.graph.ephemeral import is_ephemeral
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+
+_FUSED_OUTPUT = "out"
+
+# Operator names of arithmetic definitions, mapped to how they're rendered
+BINARY_OPERATORS = {"add": "+", "sub": "-", "mul": "*", "div": "/"}
+BINARY_METHODS = {"min": "min", "max": "max"}
+UNARY_METHODS = {"log": "ln", "exp": "exp", "sqrt": "sqrt", "abs": "abs"}
+UNARY_OPERATORS = {"neg": "-"}
+
+FUSIBLE_OPERATORS = (
+    BINARY_OPERATORS.keys()
+    | BINARY_METHODS.keys()
+    | UNARY_METHODS.keys()
+    | UNARY_OPERATORS.keys()
+)
+
+
+@dataclass(frozen=True, eq=True)
+class FusedLeaf:
+    output: ComponentOutput
+
+
+@dataclass(frozen=True, eq=True)
+class FusedOp:
+    operator: str
+    args: List["FusedExpression"]
+
+
+FusedExpression = FusedLeaf | FusedOp
+
+
+@dataclass
+class FusedChain:
+    """A tree of arithmetic components computed as a single expression.
+
+    Only the root writes its output, every other member is folded into it"""
+
+    root: Component
+    members: List[Component]
+    expression: FusedExpression
+
+    def leaves(self) -> List[ComponentOutput]:
+        leaves: List[ComponentOutput] = []
+        stack: List[FusedExpression] = [self.expression]
+        while stack:
+            match stack.pop():
+                case FusedLeaf(output) if output not in leaves:
+                    leaves.append(output)
+                case FusedOp(args=args):
+                    stack += reversed(args)
+        return leaves
+
+
+@dataclass
+class FusionPlan:
+    """Fused chains of a call tree keyed by the name of their root,
+    and the names of all components folded into some root"""
+
+    chains: Dict[str, FusedChain]
+    absorbed: Set[str]
+
+
+def render_expression(
+    expression: FusedExpression, paths: Dict[ComponentOutput, str]
+) -> str:
+    match expression:
+        case FusedLeaf(output):
+            return paths[output]
+        case FusedOp(operator, [a]) if operator in UNARY_METHODS:
+            return f"{render_expression(a, paths)}.{UNARY_METHODS[operator]}()"
+        case FusedOp(operator, [a]) if operator in UNARY_OPERATORS:
+            return f"({UNARY_OPERATORS[operator]}{render_expression(a, paths)})"
+        case FusedOp(operator, [a, b]) if operator in BINARY_METHODS:
+            a_str = render_expression(a, paths)
+            b_str = render_expression(b, paths)
+            return f"{a_str}.{BINARY_METHODS[operator]}({b_str})"
+        case FusedOp(operator, [a, b]) if operator in BINARY_OPERATORS:
+            a_str = render_expression(a, paths)
+            b_str = render_expression(b, paths)
+            return f"({a_str} {BINARY_OPERATORS[operator]} {b_str})"
+    raise ValueError(f"Can't render fused expression {expression}")
+
+
+def is_fusible(called_component: CalledComponent) -> bool:
+    component = called_component.component
+    definition = component.definition
+
+    if definition.differentiable_operator_name not in FUSIBLE_OPERATORS:
+        return False
+
+    if called_component.callsets != [definition.generic_callset]:
+        return False
+
+    options = component.output_options.get(_FUSED_OUTPUT)
+    if options is not None and (options.cold or options.lazy):
+        return False
+
+    return all(
+        isinstance(input, SingleComponentInput) for input in component.inputs.values()
+    )
+
+
+def find_fused_chains(
+    circuit_meta: CircuitMetadata, called_components: List[CalledComponent]
+) -> FusionPlan:
+    """Finds maximal trees of arithmetic components which can be fused.
+
+    A component is folded into its consumer when both are fusible and in this
+    call tree, and its output is ephemeral with that single consumer.
+    Every fused operation is valid exactly when all of its inputs are valid,
+    so the whole tree is valid exactly when all of its leaves are."""
+
+    circuit = circuit_meta.circuit
+
+    fusible = {
+        called.component.name: called.component
+        for called in called_components
+        if is_fusible(called)
+    }
+
+    consumers: Dict[ComponentOutput, List[str]] = {}
+    for component in circuit.components.values():
+        for input in component.inputs.values():
+            for output in input.outputs():
+                consumers.setdefault(output, []).append(component.name)
+
+    def can_absorb(output: ComponentOutput) -> bool:
+        match output:
+            case GraphOutput(parent, output_name) if parent in fusible:
+                users = consumers.get(output, [])
+                return (
+                    len(users) == 1
+                    and users[0] in fusible
+                    and is_ephemeral(
+                        fusible[parent],
+                        output_name,
+                        circuit_meta.non_ephemeral_outputs,
+                    )
+                )
+        return False
+
+    absorbed = {
+        name
+        for name in fusible
+        if can_absorb(GraphOutput(parent=name, output_name=_FUSED_OUTPUT))
+    }
+
+    chains: Dict[str, FusedChain] = {}
+    for name, root in fusible.items():
+        if name in absorbed:
+            continue
+
+        members: List[Component] = []
+
+        def build(component: Component) -> FusedExpression:
+            members.append(component)
+            args: List[FusedExpression] = []
+            for input_name in sorted(component.inputs.keys()):
+                output = component.inputs[input_name].outputs()[0]
+                match output:
+                    case GraphOutput(parent) if parent in absorbed:
+                        args.append(build(circuit.components[parent]))
+                    case _:
+                        args.append(FusedLeaf(output))
+            return FusedOp(
+                operator=component.definition.differentiable_operator_name, args=args
+            )
+
+        expression = build(root)
+
+        # There's nothing to gain from fusing a lone component
+        if len(members) > 1:
+            chains[name] = FusedChain(root=root, members=members, expression=expression)
+
+    return FusionPlan(chains=chains, absorbed=absorbed)
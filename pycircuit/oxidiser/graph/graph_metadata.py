@@ -1,11 +1,40 @@
-from dataclasses import dataclass
-from typing import Set
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
 
 from pycircuit.circuit_builder.circuit import CircuitData
 from pycircuit.circuit_builder.component import ComponentOutput
+from pycircuit.oxidiser.codegen.struct_il.typedefs.type_aliases import TypeAliases
+from pycircuit.oxidiser.graph.packing import PackedElement
+from pycircuit.oxidiser.graph.validity import find_inferred_valid_outputs
 
 
 @dataclass
 class CircuitMetadata:
     circuit: CircuitData
     non_ephemeral_outputs: Set[ComponentOutput]
+
+    # Shared storage for per-call variables of a single tree, see graph.liveness
+    per_call_slots: Dict[ComponentOutput, str] = field(default_factory=dict)
+
+    # Per-call variables written into arrays passed as inputs, see graph.packing
+    packed_elements: Dict[ComponentOutput, PackedElement] = field(default_factory=dict)
+
+    # Shared so type names are resolved once across every tree of the circuit
+    _type_aliases: Optional[TypeAliases] = field(default=None, repr=False)
+    _inferred_valid_outputs: Optional[Set[ComponentOutput]] = field(
+        default=None, repr=False
+    )
+
+    @property
+    def type_aliases(self) -> TypeAliases:
+        if self._type_aliases is None:
+            self._type_aliases = TypeAliases(self.circuit)
+        return self._type_aliases
+
+    @property
+    def inferred_valid_outputs(self) -> Set[ComponentOutput]:
+        if self._inferred_valid_outputs is None:
+            self._inferred_valid_outputs = find_inferred_valid_outputs(
+                self.circuit, self.non_ephemeral_outputs
+            )
+        return self._inferred_valid_outputs
@@ -0,0 +1,63 @@
+from typing import List, Set
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import Component, ComponentOutput, GraphOutput
+from pycircuit.circuit_builder.definition import CallSpec
+from pycircuit.oxidiser.graph.callset import callset_key
+
+# Dirty and pending callsets are tracked as bits of a u32
+MAX_DEFERRED_CALLSETS = 32
+
+
+def is_lazy_component(component: Component) -> bool:
+    """A component is lazy when every one of its outputs is marked lazy"""
+    output_names = component.definition.output_specs.keys()
+    return bool(output_names) and all(
+        component.options(output_name).lazy for output_name in output_names
+    )
+
+
+def find_lazy_components(circuit: CircuitData) -> List[str]:
+    return [
+        component.name
+        for component in circuit.components.values()
+        if is_lazy_component(component)
+    ]
+
+
+def deferred_callsets(component: Component) -> List[CallSpec]:
+    """Every callset a lazy or throttled component can defer, in the order
+    they're called once due.
+
+    Callsets are a set in the definition, so they're sorted by key to keep
+    generated code the same between runs, followed by the generic and timer
+    callsets. The index of a callset is its bit in the component's dirty
+    or pending mask"""
+    definition = component.definition
+    callsets: List[CallSpec] = []
+    for callset in sorted(definition.callsets, key=callset_key) + [
+        definition.generic_callset,
+        definition.timer_callset,
+    ]:
+        if callset is not None and callset not in callsets:
+            callsets.append(callset)
+
+    if len(callsets) > MAX_DEFERRED_CALLSETS:
+        raise ValueError(
+            f"Component {component.name} has {len(callsets)} callsets, "
+            f"more than the {MAX_DEFERRED_CALLSETS} which can be deferred"
+        )
+
+    return callsets
+
+
+def lazy_parents(circuit: CircuitData, reads: Set[ComponentOutput]) -> List[str]:
+    """The lazy components which must be recomputed before reading the outputs"""
+    return sorted(
+        {
+            output.parent
+            for output in reads
+            if isinstance(output, GraphOutput)
+            and is_lazy_component(circuit.components[output.parent])
+        }
+    )
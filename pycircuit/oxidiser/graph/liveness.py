@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+import heapq
+from typing import Dict, Hashable, List, Set, Tuple
+
+from pycircuit.circuit_builder.component import ComponentOutput
+
+_SLOT_HEADER = "__raw_slot_"
+
+
+@dataclass
+class CallStep:
+    """The outputs read and written by a single step of a call tree"""
+
+    reads: Set[ComponentOutput] = field(default_factory=set)
+    writes: Set[ComponentOutput] = field(default_factory=set)
+
+
+def find_live_ranges(
+    steps: List[CallStep], candidates: Set[ComponentOutput]
+) -> Dict[ComponentOutput, Tuple[int, int]]:
+    """Finds the steps from the first write to the last read of each candidate.
+
+    Candidates read before they're written are left out, since their value
+    comes from outside the tree and can't share storage"""
+
+    ranges: Dict[ComponentOutput, Tuple[int, int]] = {}
+    read_first: Set[ComponentOutput] = set()
+
+    for (idx, step) in enumerate(steps):
+        for output in step.reads & candidates:
+            if output in ranges:
+                ranges[output] = (ranges[output][0], idx)
+            else:
+                read_first.add(output)
+        for output in step.writes & candidates:
+            if output not in ranges and output not in read_first:
+                ranges[output] = (idx, idx)
+
+    return ranges
+
+
+def assign_slots(
+    ranges: Dict[ComponentOutput, Tuple[int, int]],
+    slot_classes: Dict[ComponentOutput, Hashable],
+) -> Dict[ComponentOutput, str]:
+    """Assigns outputs to shared slots, so that outputs in the same slot
+    have the same class (i.e. type) and don't overlap.
+
+    Ranges are inclusive, so an output written by the step which last reads
+    another never shares with it. This is linear scan allocation per class"""
+
+    slots: Dict[ComponentOutput, str] = {}
+
+    # Per class, a heap of (last step, slot name) of allocated slots
+    allocated: Dict[Hashable, List[Tuple[int, str]]] = {}
+    slot_count = 0
+
+    ordered = sorted(
+        ranges.keys(),
+        key=lambda output: (ranges[output], output.parent, output.output_name),
+    )
+    for output in ordered:
+        (start, end) = ranges[output]
+        heap = allocated.setdefault(slot_classes[output], [])
+
+        if heap and heap[0][0] < start:
+            (_, slot) = heapq.heappop(heap)
+        else:
+            slot = f"{_SLOT_HEADER}{slot_count}"
+            slot_count += 1
+
+        slots[output] = slot
+        heapq.heappush(heap, (end, slot))
+
+    return slots
@@ -0,0 +1,62 @@
+from typing import Dict, List, Set
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+from pycircuit.oxidiser.graph.fusion import is_fusible
+from pycircuit.oxidiser.graph.lazy import find_lazy_components
+from pycircuit.oxidiser.graph.throttle import find_flush_children
+
+
+def find_mid_batch_readers(circuit: CircuitData) -> Set[str]:
+    """Components which can read outputs of a tree while it's running for a batch,
+    since they're called from within it by a lazy refresh or throttle flush"""
+    readers = set(find_lazy_components(circuit))
+    for throttle in circuit.throttles.values():
+        readers |= set(throttle.components)
+        if throttle.every_events is not None:
+            readers |= {
+                called.component.name
+                for called in find_flush_children(circuit, throttle)
+            }
+    return readers
+
+
+def find_overwritten_calls(
+    circuit: CircuitData, called_components: List[CalledComponent]
+) -> Set[str]:
+    """Finds calls whose results are overwritten before being observed when a tree
+    runs for several events in a row, so only the last event has to make them.
+
+    Only pure arithmetic is known to keep no state between calls, so only it can
+    be skipped. A call's results are observed when one of its outputs is read by
+    a call in the tree which isn't skipped, or by something which runs from
+    within the tree. Everything else reads the outputs after the batch is over"""
+
+    own_component_names = {
+        called_component.component.name for called_component in called_components
+    }
+    mid_batch_readers = find_mid_batch_readers(circuit)
+
+    consumers: Dict[str, Set[str]] = {}
+    for component in circuit.components.values():
+        for input in component.inputs.values():
+            for parent in input.parents():
+                consumers.setdefault(parent, set()).add(component.name)
+
+    overwritten: Set[str] = set()
+
+    # Consumers come after what they read, so are decided first in reverse order
+    for called_component in reversed(called_components):
+        name = called_component.component.name
+        if not is_fusible(called_component):
+            continue
+
+        if all(
+            consumer in overwritten
+            if consumer in own_component_names
+            else consumer not in mid_batch_readers
+            for consumer in consumers.get(name, set())
+        ):
+            overwritten.add(name)
+
+    return overwritten
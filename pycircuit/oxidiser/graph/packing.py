@@ -0,0 +1,94 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Set, Tuple
+
+from pycircuit.circuit_builder.component import (
+    ArrayComponentInput,
+    Component,
+    ComponentOutput,
+)
+
+_PACKED_HEADER = "__raw_packed_"
+
+
+@dataclass(frozen=True, eq=True)
+class PackedElement:
+    """Where a per-call variable lives in the array packing a field of an array input"""
+
+    array: str
+    index: int
+    length: int
+
+
+def packed_array_name(component_name: str, input_name: str, field_name: str) -> str:
+    # Array inputs without named fields have a single field named after the input
+    if field_name == input_name:
+        return f"{_PACKED_HEADER}{component_name}_{input_name}"
+    return f"{_PACKED_HEADER}{component_name}_{input_name}_{field_name}"
+
+
+def _array_fields(
+    components: List[Component],
+) -> List[Tuple[str, List[ComponentOutput]]]:
+    fields = []
+    for component in components:
+        for (input_name, component_input) in sorted(component.inputs.items()):
+            match component_input:
+                case ArrayComponentInput(inputs=batches) if len(batches) > 0:
+                    for field_name in sorted(batches[0].inputs.keys()):
+                        array = packed_array_name(
+                            component.name, input_name, field_name
+                        )
+                        elements = [batch.inputs[field_name] for batch in batches]
+                        fields.append((array, elements))
+    return fields
+
+
+def find_packed_elements(
+    components: List[Component],
+    signatures: Dict[ComponentOutput, Hashable],
+) -> Dict[ComponentOutput, PackedElement]:
+    """Assigns the elements of array input fields to arrays they're written into
+    directly, so the field is passed without first gathering its elements.
+
+    Only per-call outputs, those with a signature (i.e. type), are packed, and
+    only when every element of the field shares one. An output can only live in
+    a single array, so fields sharing an element aren't packed.
+
+    Indexing borrows the whole array, so a field also isn't packed when
+    a component writes several of its elements or reads one while writing another"""
+
+    fields = _array_fields(components)
+    uses = Counter(output for (_, elements) in fields for output in elements)
+
+    steps: List[Tuple[Set[ComponentOutput], Set[ComponentOutput]]] = [
+        (
+            {
+                output
+                for input in component.inputs.values()
+                for output in input.outputs()
+            },
+            {component.output(output) for output in component.definition.outputs()},
+        )
+        for component in components
+    ]
+
+    packed: Dict[ComponentOutput, PackedElement] = {}
+    for (array, elements) in fields:
+        members = set(elements)
+        if any(output not in signatures or uses[output] > 1 for output in elements):
+            continue
+        if len({signatures[output] for output in elements}) > 1:
+            continue
+        if any(
+            len(writes & members) > 1 or (writes & members and reads & members)
+            for (reads, writes) in steps
+        ):
+            continue
+
+        for (index, output) in enumerate(elements):
+            packed[output] = PackedElement(
+                array=array, index=index, length=len(elements)
+            )
+
+    return packed
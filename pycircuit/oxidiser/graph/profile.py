@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+import heapq
+import json
+from typing import Dict, List, Optional
+
+from dataclasses_json import DataClassJsonMixin
+
+from pycircuit.circuit_builder.component import Component, ComponentOutput, GraphOutput
+from pycircuit.oxidiser.graph.callset import callset_key
+from pycircuit.oxidiser.graph.cold import BranchHint, ColdProfile
+from pycircuit.oxidiser.graph.find_children_of import CalledComponent
+
+
+@dataclass
+class CallsetStats(DataClassJsonMixin):
+    """Counts collected from a replay for a single callset of a component
+
+    Attributes:
+
+        triggered: Number of times the callset was called
+
+        valid: Number of those calls after which the outputs of the callset were valid
+    """
+
+    triggered: int = 0
+    valid: int = 0
+
+
+@dataclass
+class ReplayProfile(DataClassJsonMixin):
+    """Replay statistics used to lay out generated call trees.
+
+    The file format is a json object mapping component names to callset keys
+    (the callset name, or the call for unnamed callsets) to CallsetStats, i.e:
+
+    {"components": {"add0": {"call": {"triggered": 1000, "valid": 998}}}}
+
+    Attributes:
+
+        components: Per-component, per-callset counts
+
+        cold_ratio: Callsets triggered less than this fraction of the most triggered
+                    callset in a call tree are considered cold
+
+        likely_ratio: Outputs which were valid at least this fraction of the time
+                      get their validity checks hinted as likely, and those valid
+                      at most 1 - likely_ratio of the time as unlikely
+    """
+
+    components: Dict[str, Dict[str, CallsetStats]] = field(default_factory=dict)
+    cold_ratio: float = 0.01
+    likely_ratio: float = 0.95
+
+    @staticmethod
+    def from_file(path: str) -> "ReplayProfile":
+        with open(path) as profile_file:
+            return ReplayProfile.from_dict(json.load(profile_file))
+
+    def stats_for(self, component: Component, key: str) -> Optional[CallsetStats]:
+        return self.components.get(component.name, {}).get(key)
+
+    def called_stats(self, called_component: CalledComponent) -> List[CallsetStats]:
+        all_stats = [
+            self.stats_for(called_component.component, callset_key(callset))
+            for callset in called_component.callsets
+        ]
+        return [stats for stats in all_stats if stats is not None]
+
+    def trigger_count(self, called_component: CalledComponent) -> Optional[int]:
+        counts = [stats.triggered for stats in self.called_stats(called_component)]
+        return max(counts) if counts else None
+
+    def cold_profile(self, called_components: List[CalledComponent]) -> ColdProfile:
+        """Marks callsets as cold relative to the most triggered callset in the tree"""
+        reference = max(
+            (
+                stats.triggered
+                for called_component in called_components
+                for stats in self.called_stats(called_component)
+            ),
+            default=0,
+        )
+
+        cold: Dict[str, List[str]] = {}
+
+        if reference == 0:
+            return ColdProfile(components=cold)
+
+        for called_component in called_components:
+            component = called_component.component
+            for callset in called_component.callsets:
+                key = callset_key(callset)
+                stats = self.stats_for(component, key)
+                if stats is not None and stats.triggered < reference * self.cold_ratio:
+                    cold.setdefault(component.name, []).append(key)
+
+        return ColdProfile(components=cold)
+
+    def valid_hint(
+        self, output: ComponentOutput, components: Dict[str, Component]
+    ) -> Optional[BranchHint]:
+        match output:
+            case GraphOutput(parent, output_name) if parent in components:
+                component = components[parent]
+            case _:
+                return None
+
+        triggered = 0
+        valid = 0
+        for callset in component.definition.all_callsets():
+            stats = self.stats_for(component, callset_key(callset))
+            if stats is not None and output_name in callset.outputs:
+                triggered += stats.triggered
+                valid += stats.valid
+
+        if triggered == 0:
+            return None
+
+        valid_ratio = valid / triggered
+
+        if valid_ratio >= self.likely_ratio:
+            return BranchHint.Likely
+        elif valid_ratio <= 1 - self.likely_ratio:
+            return BranchHint.Unlikely
+        else:
+            return None
+
+    def order(self, called_components: List[CalledComponent]) -> List[CalledComponent]:
+        """Reorders a call tree so that frequently triggered calls come first.
+
+        This is a topological sort which, out of the calls with all parents already
+        called, picks the most triggered call. Ties keep the original order, and
+        calls without statistics are treated as the most triggered ones
+        so they don't get moved around."""
+
+        name_to_idx = {
+            called_component.component.name: idx
+            for (idx, called_component) in enumerate(called_components)
+        }
+
+        counts = [self.trigger_count(called) for called in called_components]
+        reference = max((c for c in counts if c is not None), default=0)
+        priorities = [reference if c is None else c for c in counts]
+
+        children: Dict[int, List[int]] = {idx: [] for idx in name_to_idx.values()}
+        waiting_on = []
+        for (idx, called_component) in enumerate(called_components):
+            parents = {
+                name_to_idx[parent]
+                for input in called_component.component.inputs.values()
+                for parent in input.parents()
+                if parent in name_to_idx
+            }
+            for parent in parents:
+                children[parent].append(idx)
+            waiting_on.append(len(parents))
+
+        ready = [
+            (-priorities[idx], idx)
+            for idx in range(len(called_components))
+            if waiting_on[idx] == 0
+        ]
+        heapq.heapify(ready)
+
+        ordered = []
+        while ready:
+            (_, idx) = heapq.heappop(ready)
+            ordered.append(called_components[idx])
+            for child in children[idx]:
+                waiting_on[child] -= 1
+                if waiting_on[child] == 0:
+                    heapq.heappush(ready, (-priorities[child], child))
+
+        assert len(ordered) == len(called_components), "Call tree was not a DAG"
+
+        return ordered
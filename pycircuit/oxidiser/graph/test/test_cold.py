@@ -0,0 +1,66 @@
+from pycircuit.oxidiser.codegen.call_il.cold import COLD_CALL_PATH
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.cold import ColdProfile, find_cold_components
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of,
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.find_ephemeral_components import (
+    all_nonephemeral_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import make_chain
+
+
+def test_nothing_cold_by_default():
+    circuit, _ = make_chain(3)
+
+    called = find_all_children_of({"x"}, circuit)
+
+    assert find_cold_components(called) == set()
+
+
+def test_cold_output_takes_subtree():
+    circuit, chain = make_chain(4)
+
+    chain[1].mark_cold()
+
+    called = find_all_children_of({"x"}, circuit)
+
+    assert find_cold_components(called) == {"chain_1", "chain_2", "chain_3"}
+
+
+def test_cold_from_profile():
+    circuit, _ = make_chain(3)
+
+    profile = ColdProfile.from_dict({"components": {"chain_2": ["call"]}})
+
+    called = find_all_children_of({"x"}, circuit)
+
+    assert find_cold_components(called, profile) == {"chain_2"}
+
+
+def test_cold_calls_outlined():
+    circuit, chain = make_chain(4)
+
+    chain[2].mark_cold()
+
+    called = find_all_children_of_from_outputs(circuit, {chain[0].output()})
+
+    meta = CircuitMetadata(
+        circuit=circuit, non_ephemeral_outputs=all_nonephemeral_outputs(circuit)
+    )
+
+    lines = generate_code_from_tree(assemble_trigger(meta, called)).split("\n")
+
+    cold_idx = lines.index(f"{COLD_CALL_PATH}(|| {{")
+    hot_call_idx = next(
+        idx for (idx, line) in enumerate(lines) if "self.components.chain_1" in line
+    )
+    cold_call_idx = next(
+        idx for (idx, line) in enumerate(lines) if "self.components.chain_3" in line
+    )
+
+    assert hot_call_idx < cold_idx < cold_call_idx
+    assert lines[-1] == "});"
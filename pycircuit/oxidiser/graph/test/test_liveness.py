@@ -0,0 +1,74 @@
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.circuit_builder.component import GraphOutput
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.graph.liveness import CallStep, assign_slots, find_live_ranges
+from pycircuit.oxidiser.test.test_common import (
+    PASS_DEFINITION,
+    defaulted_pass_definition,
+    pass_definition,
+)
+
+DEFAULTED_DEFINITION = "defaulted"
+
+A = GraphOutput(parent="a", output_name="out")
+B = GraphOutput(parent="b", output_name="out")
+C = GraphOutput(parent="c", output_name="out")
+D = GraphOutput(parent="d", output_name="out")
+
+
+def test_live_ranges():
+    steps = [
+        CallStep(reads={D}, writes={A}),
+        CallStep(reads={A}, writes={B}),
+        CallStep(reads={B}, writes={C}),
+    ]
+
+    assert find_live_ranges(steps, {A, B, C, D}) == {
+        A: (0, 1),
+        B: (1, 2),
+        C: (2, 2),
+    }
+
+
+def test_slots_reused_when_disjoint():
+    ranges = {A: (0, 1), B: (1, 2), C: (2, 2)}
+
+    slots = assign_slots(ranges, {A: "f64", B: "f64", C: "f64"})
+    # B is written while A is read so they can't share, but C can reuse A's slot
+    assert slots[A] != slots[B]
+    assert slots[C] == slots[A]
+
+    typed_slots = assign_slots(ranges, {A: "f64", B: "f64", C: "i64"})
+    assert typed_slots[C] not in {typed_slots[A], typed_slots[B]}
+
+
+def test_defaulted_outputs_not_shared():
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            DEFAULTED_DEFINITION: defaulted_pass_definition(),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    for idx in range(2):
+        circuit.make_component(
+            DEFAULTED_DEFINITION,
+            name=f"defaulted_{idx}",
+            inputs={"a": root},
+            force_insert=True,
+        )
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+
+    code = generate_code_from_tree(assemble_trigger(meta, called, reuse_slots=True))
+
+    # Their lifetimes don't overlap, but each has to start from its default
+    assert "__raw_slot_" not in code
+    assert "let mut __raw_var_defaulted_0_out:" in code
+    assert "let mut __raw_var_defaulted_1_out:" in code
@@ -0,0 +1,58 @@
+from pycircuit.circuit_builder.circuit import CircuitBuilder, OutputArray
+from pycircuit.oxidiser.codegen.test.test_soa import SUM_DEFINITION, sum_definition
+from pycircuit.oxidiser.graph.packing import PackedElement, find_packed_elements
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, pass_definition
+
+
+def make_elements(chained: bool):
+    "Two elements of a sum, the second computed from the first when chained"
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            SUM_DEFINITION: sum_definition(),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    first = circuit.make_component(
+        PASS_DEFINITION, name="first", inputs={"a": root}, force_insert=True
+    )
+    second = circuit.make_component(
+        PASS_DEFINITION,
+        name="second",
+        inputs={"a": first if chained else root},
+        force_insert=True,
+    )
+    summed = circuit.make_component(
+        SUM_DEFINITION,
+        name="summed",
+        inputs={"values": OutputArray([{"values": first}, {"values": second}])},
+    )
+    components = [root, first, second, summed]
+    signatures = {first.output(): "f64", second.output(): "f64"}
+    return (components, signatures)
+
+
+def test_elements_packed():
+    (components, signatures) = make_elements(chained=False)
+    packed = find_packed_elements(components, signatures)
+
+    assert [(output.parent, element) for (output, element) in packed.items()] == [
+        ("first", PackedElement(array="__raw_packed_summed_values", index=0, length=2)),
+        (
+            "second",
+            PackedElement(array="__raw_packed_summed_values", index=1, length=2),
+        ),
+    ]
+
+
+def test_chained_elements_not_packed():
+    # Writing the second element borrows the array while the first is read
+    (components, signatures) = make_elements(chained=True)
+    assert find_packed_elements(components, signatures) == {}
+
+
+def test_mixed_types_not_packed():
+    (components, signatures) = make_elements(chained=False)
+    signatures[components[2].output()] = "f32"
+    assert find_packed_elements(components, signatures) == {}
@@ -0,0 +1,57 @@
+from pycircuit.oxidiser.graph.cold import BranchHint
+from pycircuit.oxidiser.graph.find_children_of import find_all_children_of
+from pycircuit.oxidiser.graph.profile import ReplayProfile
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, make_chain
+
+
+def make_fork():
+    circuit, chain = make_chain(2)
+    # Forced since it would otherwise be deduplicated against chain_1
+    rare = circuit.make_component(
+        PASS_DEFINITION, name="rare", inputs={"a": chain[0]}, force_insert=True
+    )
+    return circuit, chain, rare
+
+
+PROFILE = ReplayProfile.from_dict(
+    {
+        "components": {
+            "chain_0": {"call": {"triggered": 1000, "valid": 1000}},
+            "rare": {"call": {"triggered": 1, "valid": 0}},
+            "chain_1": {"call": {"triggered": 900, "valid": 10}},
+        }
+    }
+)
+
+
+def test_orders_frequent_first():
+    circuit, _, _ = make_fork()
+
+    called = find_all_children_of({"x"}, circuit)
+    assert [c.component.name for c in called] == ["chain_0", "chain_1", "rare"]
+
+    # rare was inserted after chain_1 so reverse the natural order to check sorting
+    reordered = PROFILE.order(list(reversed(called[1:])) + [called[0]])
+    assert [c.component.name for c in reordered] == ["chain_0", "chain_1", "rare"]
+
+
+def test_rare_is_cold():
+    circuit, _, _ = make_fork()
+
+    called = find_all_children_of({"x"}, circuit)
+
+    assert PROFILE.cold_profile(called).components == {"rare": ["call"]}
+
+
+def test_valid_hints():
+    circuit, chain, rare = make_fork()
+
+    assert PROFILE.valid_hint(chain[0].output(), circuit.components) == (
+        BranchHint.Likely
+    )
+    assert PROFILE.valid_hint(chain[1].output(), circuit.components) == (
+        BranchHint.Unlikely
+    )
+    assert PROFILE.valid_hint(rare.output(), circuit.components) == (
+        BranchHint.Unlikely
+    )
@@ -0,0 +1,82 @@
+from pycircuit.circuit_builder.circuit import CircuitBuilder
+from pycircuit.circuit_builder.circuit_context import CircuitContextManager
+from pycircuit.circuit_builder.definition import (
+    BasicInput,
+    CallSpec,
+    Definition,
+    OutputSpec,
+)
+from pycircuit.common.frozen import FrozenDict
+from pycircuit.oxidiser.codegen.tree.tree_node import generate_code_from_tree
+from pycircuit.oxidiser.codegen.trigger.assemble_trigger import assemble_trigger
+from pycircuit.oxidiser.graph.find_children_of import (
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.graph_metadata import CircuitMetadata
+from pycircuit.oxidiser.test.test_common import PASS_DEFINITION, pass_definition
+
+VALID_DEFINITION = "valid"
+
+
+def valid_definition() -> Definition:
+    return Definition(
+        inputs=FrozenDict({"a": BasicInput()}),
+        output_specs=FrozenDict(
+            {"out": OutputSpec(ephemeral=True, type_path="Out", always_valid=True)}
+        ),
+        class_name="ValidComponent",
+        module="test",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+        ),
+    ).validate()
+
+
+def make_circuit():
+    circuit = CircuitBuilder(
+        definitions={
+            PASS_DEFINITION: pass_definition(),
+            VALID_DEFINITION: valid_definition(),
+        }
+    )
+    x = circuit.get_external("x", "f64")
+    root = circuit.make_component(PASS_DEFINITION, name="root", inputs={"a": x})
+    v0 = circuit.make_component(VALID_DEFINITION, name="v0", inputs={"a": root})
+    v1 = circuit.make_component(
+        VALID_DEFINITION, name="v1", inputs={"a": root}, force_insert=True
+    )
+
+    with CircuitContextManager(circuit):
+        summed = v0 + v1
+        scaled = summed * root
+
+    called = find_all_children_of_from_outputs(circuit, {root.output()})
+    meta = CircuitMetadata(circuit=circuit, non_ephemeral_outputs=set())
+    return meta, called, summed, scaled
+
+
+def test_inferred_valid():
+    meta, _, summed, scaled = make_circuit()
+
+    assert summed.output() in meta.inferred_valid_outputs
+    assert scaled.output() not in meta.inferred_valid_outputs
+
+
+def test_stored_not_inferred_valid():
+    meta, _, summed, _ = make_circuit()
+    stored_meta = CircuitMetadata(
+        circuit=meta.circuit, non_ephemeral_outputs={summed.output()}
+    )
+
+    assert summed.output() not in stored_meta.inferred_valid_outputs
+
+
+def test_checks_elided():
+    meta, called, summed, scaled = make_circuit()
+    code = generate_code_from_tree(assemble_trigger(meta, called))
+
+    assert f"__raw_var_{summed.name}_out_valid = __output_valid" not in code
+    assert f"Option<&_> = Some(& __raw_var_{summed.name}_out);" in code
+    assert f"__raw_var_{scaled.name}_out_valid = __output_valid.out;" in code
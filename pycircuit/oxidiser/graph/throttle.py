@@ -0,0 +1,91 @@
+from typing import Dict, List, Set, Tuple
+
+from pycircuit.circuit_builder.circuit import CircuitData, Throttle
+from pycircuit.oxidiser.graph.find_children_of import (
+    CalledComponent,
+    find_all_children_of_from_outputs,
+)
+from pycircuit.oxidiser.graph.lazy import deferred_callsets
+
+
+def throttled_roots(circuit: CircuitData) -> Dict[str, str]:
+    """Maps the root components of every throttle to the throttle's name"""
+    return {
+        component_name: name
+        for (name, throttle) in circuit.throttles.items()
+        for component_name in throttle.components
+    }
+
+
+def split_throttled(
+    circuit: CircuitData, called_components: List[CalledComponent]
+) -> Tuple[List[CalledComponent], List[CalledComponent]]:
+    """Splits a call tree into the calls made now and the throttled roots
+    which are only marked pending.
+
+    Like with cold components, a component only triggered by throttled roots
+    or components dropped for them is dropped too, since it's called when the
+    throttle is flushed instead. External triggers are never throttled"""
+
+    roots = throttled_roots(circuit)
+
+    own_component_names = {
+        called_component.component.name for called_component in called_components
+    }
+
+    kept: List[CalledComponent] = []
+    pending: List[CalledComponent] = []
+    dropped: Set[str] = set()
+
+    for called_component in called_components:
+        component = called_component.component
+
+        if component.name in roots:
+            pending.append(called_component)
+            dropped.add(component.name)
+            continue
+
+        triggering_parents = {
+            parent
+            for input in component.triggering_inputs()
+            for parent in input.parents()
+            if parent in own_component_names or parent == "external"
+        }
+
+        if triggering_parents and triggering_parents <= dropped:
+            dropped.add(component.name)
+            continue
+
+        kept.append(called_component)
+
+    return (kept, pending)
+
+
+def find_flush_children(
+    circuit: CircuitData, throttle: Throttle
+) -> List[CalledComponent]:
+    """The components below the roots of a throttle, called when it's flushed"""
+    root_outputs = {
+        circuit.components[name].output(output_name)
+        for name in throttle.components
+        for output_name in circuit.components[name].definition.output_specs.keys()
+    }
+    return [
+        called
+        for called in find_all_children_of_from_outputs(circuit, root_outputs)
+        if called.component.name not in throttle.components
+    ]
+
+
+def find_flush_subgraph(
+    circuit: CircuitData, throttle: Throttle
+) -> List[CalledComponent]:
+    """Everything called when a throttle is flushed, roots first"""
+    roots = [
+        CalledComponent(
+            callsets=deferred_callsets(circuit.components[name]),
+            component=circuit.components[name],
+        )
+        for name in throttle.components
+    ]
+    return roots + find_flush_children(circuit, throttle)
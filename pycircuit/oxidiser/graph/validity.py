@@ -0,0 +1,90 @@
+from typing import Set
+
+from pycircuit.circuit_builder.circuit import CircuitData
+from pycircuit.circuit_builder.component import (
+    Component,
+    ComponentOutput,
+    ExternalOutput,
+    GraphOutput,
+)
+
+
+def _always_written_with_inputs(component: Component, output: str) -> bool:
+    """Whether every call of the component writes the output, making it valid
+    whenever all inputs are valid"""
+    definition = component.definition
+    spec = definition.output_specs[output]
+
+    if not spec.valid_with_inputs or spec.assume_invalid or spec.assume_default:
+        return False
+
+    return all(
+        not callset.skippable and output in callset.outputs
+        for callset in definition.all_callsets()
+    )
+
+
+def find_inferred_valid_outputs(
+    circuit: CircuitData, non_ephemeral_outputs: Set[ComponentOutput]
+) -> Set[ComponentOutput]:
+    """Finds per-call outputs which are provably valid wherever they're read.
+
+    Outputs marked always valid are valid statically. An ephemeral output is only
+    read in call trees which also call its component, after the call.
+    So if every call of the component writes the output, and the output is valid
+    whenever the component's inputs are, it's valid whenever triggered
+    as long as all of those inputs are provably valid too.
+
+    Stored outputs are never inferred valid, since they're invalid until
+    first written and read from trees which may not write them."""
+
+    valid: Set[ComponentOutput] = set()
+    resolved: Set[str] = set()
+
+    def is_valid(output: ComponentOutput) -> bool:
+        match output:
+            case ExternalOutput():
+                return False
+            case GraphOutput(parent, output_name):
+                spec = circuit.components[parent].definition.output_specs[output_name]
+                return spec.always_valid or output in valid
+        return False
+
+    # Resolve components after their parents with an explicit stack,
+    # since chains of arithmetic can be deep
+    for root in circuit.components.values():
+        stack = [root]
+        while stack:
+            component = stack[-1]
+            if component.name in resolved:
+                stack.pop()
+                continue
+
+            unresolved = [
+                circuit.components[output.parent]
+                for input in component.inputs.values()
+                for output in input.outputs()
+                if isinstance(output, GraphOutput) and output.parent not in resolved
+            ]
+            if unresolved:
+                stack += unresolved
+                continue
+
+            inputs_valid = all(
+                is_valid(output)
+                for input in component.inputs.values()
+                for output in input.outputs()
+            )
+
+            if inputs_valid:
+                for output_name in component.definition.output_specs.keys():
+                    output = component.output(output_name)
+                    if output not in non_ephemeral_outputs and (
+                        _always_written_with_inputs(component, output_name)
+                    ):
+                        valid.add(output)
+
+            resolved.add(component.name)
+            stack.pop()
+
+    return valid
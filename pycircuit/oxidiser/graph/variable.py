@@ -1,7 +1,8 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Hashable, List, Optional
 from pycircuit.circuit_builder.component import ComponentOutput
 from pycircuit.oxidiser.codegen import separated_names
+from pycircuit.oxidiser.graph.packing import PackedElement
 
 from pycircuit.oxidiser.codegen.tree.tree_node import (
     CodeLeaf,
@@ -15,9 +16,11 @@ _RAW_VAR_HEADER = "__raw_var_"
 # HACK MOVE THIS VAR
 _OUTPUT_NAME = "outputs"
 
+_STORED_VALID_SUFFIX = "_valid"
+
 
 def _generate_valid_init(valid_name: str, mut: str, ctor: bool) -> str:
-    return f"let {mut} {valid_name}: bool = {ctor};"
+    return f"let {mut} {valid_name}: bool = {str(ctor).lower()};"
 
 
 def _valid_name(var_name: str) -> str:
@@ -37,10 +40,38 @@ class PerCallVar(GlobalInitLeaf, OutputVar):
     variable_type: str
     variable_constructor: str
 
+    # Storage shared with other variables whose lifetimes don't overlap
+    slot: Optional[str] = None
+
+    # Element of an array passed as an input, which is initialized as a whole
+    packed: Optional[PackedElement] = None
+
+    def _packed_constructor(self) -> str:
+        return f"::core::array::from_fn(|_| {self.variable_constructor})"
+
     def generate_global_init_code(self) -> str:
+        if self.packed is not None:
+            array_type = f"[{self.variable_type}; {self.packed.length}]"
+            return f"let mut {self.packed.array}: {array_type} = {self._packed_constructor()};"
         return f"let mut {self.var_path()}: {self.variable_type} = {self.variable_constructor};"
 
+    def generate_reset_code(self) -> Optional[str]:
+        if self.packed is not None:
+            return f"{self.packed.array} = {self._packed_constructor()};"
+        return f"{self.var_path()} = {self.variable_constructor};"
+
+    def key(self) -> Hashable:
+        if self.packed is not None:
+            return self.packed.array
+        if self.slot is not None:
+            return (self.slot, self.variable_type, self.variable_constructor)
+        return self
+
     def var_path(self) -> str:
+        if self.packed is not None:
+            return f"{self.packed.array}[{self.packed.index}]"
+        if self.slot is not None:
+            return self.slot
         return f"{_RAW_VAR_HEADER}{self.variable_name()}"
 
 
@@ -49,8 +80,11 @@ class StoredVar(CodeLeaf, OutputVar):
     def generate_code(self) -> str:
         return ""
 
+    def field_name(self) -> str:
+        return self.variable_name()
+
     def var_path(self) -> str:
-        return f"self.{_OUTPUT_NAME}.{self.variable_name()}"
+        return f"self.{_OUTPUT_NAME}.{self.field_name()}"
 
 
 @dataclass(eq=True, frozen=True)
@@ -61,17 +95,23 @@ class PerCallValid(GlobalInitLeaf, OutputVar):
         valid_name = self.valid_path()
         return _generate_valid_init(valid_name, "mut", self.valid_by_default)
 
+    def generate_reset_code(self) -> Optional[str]:
+        return f"{self.valid_path()} = {str(self.valid_by_default).lower()};"
+
     def valid_path(self) -> str:
         return _valid_name(self.variable_name())
 
 
 @dataclass(eq=True, frozen=True)
 class StoredValid(CodeLeaf, OutputVar):
+    def field_name(self) -> str:
+        return f"{self.variable_name()}{_STORED_VALID_SUFFIX}"
+
     def valid_path(self) -> str:
-        return f"self.{_OUTPUT_NAME}.{self.variable_name()}"
+        return f"self.{_OUTPUT_NAME}.{self.field_name()}"
 
     def generate_code(self) -> str:
-        raise NotImplementedError()
+        return ""
 
 
 @dataclass(eq=True, frozen=True)
@@ -1,4 +1,7 @@
+import dataclasses
+
 from frozenlist import FrozenList
+from pycircuit.circuit_builder.circuit import CircuitBuilder
 from pycircuit.common.frozen import FrozenDict
 from pycircuit.circuit_builder.component import (
     Component,
@@ -111,7 +114,7 @@ def basic_definition(generic_callset=GENERIC_CALLSET) -> Definition:
         ),
         class_name=COMPONENT_CLASS,
         init_spec=InitSpec(init_call="dummy"),
-        header="test.hh",
+        module="test",
         generic_callset=generic_callset,
         callsets=frozenset(
             {
@@ -139,3 +142,57 @@ def basic_component() -> Component:
         params=FrozenDict(),
     )
     return comp
+
+
+PASS_DEFINITION = "pass"
+PASS_CLASS = "PassComponent"
+
+
+def pass_definition(batch_callback=None) -> Definition:
+    "A definition which takes a single input and writes a single ephemeral output"
+    return Definition(
+        inputs=FrozenDict({"a": BasicInput()}),
+        output_specs=FrozenDict({"out": OutputSpec(ephemeral=True, type_path="Out")}),
+        class_name=PASS_CLASS,
+        module="test",
+        generic_callset=CallSpec(
+            written_set=frozenset({"a"}),
+            callback="call",
+            outputs=frozenset({"out"}),
+            batch_callback=batch_callback,
+        ),
+        generics_order=FrozenDict({"a": 0}),
+    ).validate()
+
+
+def defaulted_pass_definition(default_constructor=None) -> Definition:
+    "A pass whose output holds its default whenever a call doesn't write it"
+    return dataclasses.replace(
+        pass_definition(),
+        output_specs=FrozenDict(
+            {
+                "out": OutputSpec(
+                    ephemeral=True,
+                    type_path="Out",
+                    always_valid=True,
+                    assume_default=True,
+                    default_constructor=default_constructor,
+                )
+            }
+        ),
+    ).validate()
+
+
+def make_chain(length: int):
+    circuit = CircuitBuilder(definitions={PASS_DEFINITION: pass_definition()})
+    x = circuit.get_external("x", "f64")
+
+    chain = []
+    parent = x
+    for idx in range(length):
+        parent = circuit.make_component(
+            PASS_DEFINITION, name=f"chain_{idx}", inputs={"a": parent}
+        )
+        chain.append(parent)
+
+    return circuit, chain